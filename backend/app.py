@@ -2,43 +2,111 @@ import compat
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Body, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Body, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
-import io
+from concurrent.futures import ThreadPoolExecutor
+import os
+import hmac
+import time
 import asyncio
 import uvicorn
 
-from stt import SpeechToText
+from stt import SpeechToText, AudioTooLong
 from tts import TextToSpeech
 from translate import Translator
 from gemini_service import GeminiService
 from avatar import AvatarController
+from shared_store import SharedStore
+import metrics
+from metrics import span
+import http_pool
+import transcode
+import profiling
+import jobs
+import scheduler
+import uploads
 
 app = FastAPI(title="Anything-to-Speech")
 
+# Request bodies on the upload endpoints are capped at MAX_UPLOAD_BYTES (0
+# disables); added before CORS so the 413 still carries CORS headers
+app.add_middleware(
+    uploads.UploadLimitMiddleware,
+    max_bytes=int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024))),
+    paths=("/api/stt", "/api/complete", "/api/jobs"),
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Target languages one job translates and synthesizes at the same time
+JOB_LANGUAGE_CONCURRENCY = int(os.getenv("JOB_LANGUAGE_CONCURRENCY", "3"))
+
+# Blocking provider calls run here once the scheduler grants them a slot
+EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", "16"))
+executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="provider")
+
+# Provider calls wait here for a slot: interactive before batch, fair
+# across clients (X-API-Key or IP), within PROVIDER_RATE_LIMITS
+# ("translate=20,gemini=1", calls/second per worker)
+provider_scheduler = scheduler.Scheduler(
+    executor,
+    concurrency=int(os.getenv("SCHEDULER_CONCURRENCY", str(EXECUTOR_WORKERS))),
+    rate_limits=scheduler.parse_limits(os.getenv("PROVIDER_RATE_LIMITS")),
+    weights=scheduler.parse_limits(os.getenv("CLIENT_WEIGHTS"))
+)
+
+# Translation cache, audio cache and voice registry live in a SQLite (WAL)
+# file so every worker started with WEB_CONCURRENCY > 1 shares them.
 try:
-    stt_service = SpeechToText()
+    shared_store = SharedStore()
+except Exception as e:
+    print("Shared store init failed:", e)
+    shared_store = None
+
+# Pipeline jobs submitted to /api/jobs; finished jobs are kept for JOB_TTL
+# seconds. With several workers, events, audio and cancel requests go
+# through the shared store so any worker can serve a job's follow-up
+# requests; those entries live JOB_TTL + JOB_MAX_RUNTIME seconds.
+JOB_TTL = float(os.getenv("JOB_TTL", "600"))
+shared_jobs = None
+if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+    if shared_store is not None:
+        shared_jobs = jobs.SharedJobs(shared_store, JOB_TTL + float(os.getenv("JOB_MAX_RUNTIME", "3600")))
+    else:
+        print("Shared store unavailable: job events and audio are only served by the worker running the job")
+job_store = jobs.JobStore(
+    max_jobs=int(os.getenv("MAX_JOBS", "200")),
+    ttl=JOB_TTL,
+    shared=shared_jobs
+)
+
+try:
+    # Long recordings make one Google request per chunk; each takes an "stt" rate token
+    stt_service = SpeechToText(
+        max_audio_seconds=float(os.getenv("MAX_AUDIO_SECONDS", "600")),
+        before_request=lambda: provider_scheduler.wait_for_token("stt")
+    )
 except Exception as e:
     print("STT init failed:", e)
     stt_service = None
 
 try:
-    tts_service = TextToSpeech()
+    tts_service = TextToSpeech(store=shared_store)
 except Exception as e:
     print("TTS init failed:", e)
     tts_service = None
 
 try:
-    translator = Translator()
+    translator = Translator(store=shared_store)
 except Exception as e:
     print("Translator init failed:", e)
     translator = None
@@ -55,36 +123,170 @@ except Exception as e:
     print("Avatar init failed:", e)
     avatar_controller = None
 
+def _cache_ratio():
+    if not shared_store:
+        return {}
+    ratios = {}
+    for namespace, counts in shared_store.stats().items():
+        lookups = counts["hits"] + counts["misses"]
+        ratios[(namespace,)] = counts["hits"] / lookups if lookups else 0.0
+    return ratios
+
+
+metrics.registry.register(metrics.Gauge(
+    "voicemaker_executor_queue_depth", "Provider calls waiting for an executor thread",
+    callback=lambda: {(): provider_scheduler.executor_queued}
+))
+metrics.registry.register(metrics.Gauge(
+    "voicemaker_cache_hits", "Shared cache hits since worker start", ("namespace",),
+    callback=lambda: {(ns,): c["hits"] for ns, c in shared_store.stats().items()} if shared_store else {}
+))
+metrics.registry.register(metrics.Gauge(
+    "voicemaker_cache_misses", "Shared cache misses since worker start", ("namespace",),
+    callback=lambda: {(ns,): c["misses"] for ns, c in shared_store.stats().items()} if shared_store else {}
+))
+metrics.registry.register(metrics.Gauge(
+    "voicemaker_http_requests", "Provider HTTP requests sent through the keep-alive pool",
+    ("host",),
+    callback=lambda: {(h,): s["requests"] for h, s in http_pool.pool.stats().items()}
+))
+metrics.registry.register(metrics.Gauge(
+    "voicemaker_http_connections_opened", "Provider HTTP connections opened (requests minus reuses)",
+    ("host",),
+    callback=lambda: {(h,): s["connections"] for h, s in http_pool.pool.stats().items()}
+))
+metrics.registry.register(metrics.Gauge(
+    "voicemaker_singleflight_coalesced", "Provider calls answered by an identical in-flight call",
+    ("service",),
+    callback=lambda: {
+        (name,): service._flight.coalesced
+        for name, service in (("translate", translator), ("tts", tts_service)) if service
+    }
+))
+metrics.registry.register(metrics.Gauge(
+    "voicemaker_scheduler_queued", "Provider calls waiting for a scheduler slot", ("provider",),
+    callback=lambda: {(p,): n for p, n in provider_scheduler.queued().items()}
+))
+metrics.registry.register(metrics.Gauge(
+    "voicemaker_jobs", "Pipeline jobs held in this worker's job store", ("status",),
+    callback=lambda: {(status,): n for status, n in job_store.counts().items()}
+))
+metrics.registry.register(metrics.Gauge(
+    "voicemaker_cache_hit_ratio", "Shared cache hit ratio since worker start", ("namespace",),
+    callback=_cache_ratio
+))
+
+
+@app.middleware("http")
+async def client_middleware(request: Request, call_next):
+    """Identify the caller for fair queuing; `X-Priority: batch` opts out of interactive."""
+    client = request.headers.get("X-API-Key") or (request.client.host if request.client else "anonymous")
+    scheduler.set_client(client, request.headers.get("X-Priority"))
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    timer = metrics.start_request_timer()
+    metrics.IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["Server-Timing"] = timer.server_timing()
+        return response
+    finally:
+        metrics.IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - timer.started,
+            getattr(route, "path", "unmatched"), request.method, str(status)
+        )
+
+
+# Profiling endpoints and the X-Profile header only work when ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+cpu_profile_lock = asyncio.Lock()
+# One tracemalloc window at a time: another request's stop() would break its snapshot
+memory_profile_lock = asyncio.Lock()
+
+
+def is_admin(request: Request) -> bool:
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(404, "Not Found")
+    if not is_admin(request):
+        raise HTTPException(403, "Admin token required")
+
+
+@app.middleware("http")
+async def request_profiling_middleware(request: Request, call_next):
+    """Sample the whole worker while a request sent with `X-Profile: 1` runs."""
+    if request.headers.get("X-Profile") != "1" or not is_admin(request):
+        return await call_next(request)
+
+    profiler = profiling.SamplingProfiler(interval=0.002).start()
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.stop()
+    path = profiling.write_profile(PROFILE_DIR, "request" + request.url.path, profiler.collapsed())
+    response.headers["X-Profile-File"] = path
+    return response
+
+
 class TranslationRequest(BaseModel):
     text: str
     target_languages: List[str]
     voice_id: Optional[str] = None
     voice_id: Optional[str] = None
+    source_language: Optional[str] = None  # skips translation into the same language
+    format: Optional[str] = None   # mp3 | opus | ogg | webm | wav | pcm
+    bitrate: Optional[str] = None  # e.g. "24k"; ignored for wav/pcm
+
+
+def check_output_format(fmt: Optional[str], bitrate: Optional[str]):
+    try:
+        transcode.normalize(fmt, bitrate)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
 
 @app.get("/")
 async def root():
     return {"message": "Backend OK"}
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition for this worker process."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/stt")
 async def api_stt(
     file: UploadFile = File(...),
-    language: Optional[str] = Form(None)
+    language: Optional[str] = Form(None),
+    long_audio: Optional[bool] = Form(None)
 ):
     if not stt_service:
         raise HTTPException(503, "STT not initialized")
 
     try:
-        data = await file.read()
-        if not data:
+        if not file.size:
             raise HTTPException(400, "Empty audio")
 
-        bio = io.BytesIO(data)
         filename_hint = file.filename or "recording.webm"
         
         lang = language or "en"
         
-        result = stt_service.transcribe(bio, filename_hint=filename_hint, language=lang)
+        # The spooled upload goes straight to STT, which copies it to disk in chunks
+        result = await provider_scheduler.run(
+            "stt", stt_service.transcribe, file.file, filename_hint, lang, long_audio
+        )
         
         if not result.get("text") or result.get("text", "").strip() == "":
             error_msg = result.get("error", "No speech detected or transcription failed")
@@ -97,6 +299,9 @@ async def api_stt(
         
     except HTTPException:
         raise
+    except AudioTooLong as e:
+        uploads.UPLOADS_REJECTED.inc(1, "duration")
+        raise HTTPException(413, str(e))
     except Exception as e:
         print(f"STT API Error: {e}")
         raise HTTPException(500, f"STT processing error: {str(e)}")
@@ -106,10 +311,11 @@ async def api_translate(req: TranslationRequest):
     if not translator:
         raise HTTPException(503, "Translator not available")
 
-    output = {
-        lang: translator.translate(req.text, target_lang=lang)
-        for lang in req.target_languages
-    }
+    output = {}
+    for lang in req.target_languages:
+        output[lang] = await provider_scheduler.run(
+            "translate", translator.translate, req.text, lang, req.source_language
+        )
     return {"original": req.text, "translated": output}
 
 
@@ -119,23 +325,53 @@ async def api_tts(req: TranslationRequest):
         raise HTTPException(503, "TTS not available")
     if not translator:
         raise HTTPException(503, "Translator not available")
+    check_output_format(req.format, req.bitrate)
 
-    loop = asyncio.get_event_loop()
     audio_out = {}
+    audio_sizes = {}
     translated_texts = {}
 
     for lang in req.target_languages:
-        translated = translator.translate(req.text, target_lang=lang)
+        translated = await provider_scheduler.run(
+            "translate", translator.translate, req.text, lang, req.source_language
+        )
         translated_texts[lang] = translated
-        audio_out[lang] = await loop.run_in_executor(
-            None,
-            tts_service.synthesize,
+        audio, mime = await provider_scheduler.run(
+            "tts",
+            tts_service.synthesize_bytes,
             translated,
             lang,
-            req.voice_id
+            req.voice_id,
+            req.format,
+            req.bitrate
         )
+        audio_out[lang] = tts_service.to_data_url(audio, mime)
+        audio_sizes[lang] = {"bytes": len(audio), "mime": mime}
+
+    return {"audio_urls": audio_out, "translated_texts": translated_texts, "audio_sizes": audio_sizes}
+
+
+async def enhance_for_pipeline(text: str, langs: List[str], source_lang: Optional[str],
+                               single_call: Optional[bool] = None):
+    """
+    Gemini enhancement for the pipeline. In multilingual mode
+    (GEMINI_MULTILINGUAL, or `single_call` per request) the same Gemini call
+    also translates; returns (enhanced text, {lang: translation}) holding only
+    the languages Gemini got right. The rest are left to the Translator.
+    """
+    if not (gemini_service and gemini_service.is_available()):
+        return text, {}
+
+    multilingual = gemini_service.multilingual if single_call is None else single_call
+    wanted = [l for l in langs if translator.needs_translation(text, l, source_lang)] if multilingual else []
+    if not wanted:
+        result = await provider_scheduler.run("gemini", gemini_service.enhance_text, text)
+        return result.get("enhanced_text") or text, {}
 
-    return {"audio_urls": audio_out, "translated_texts": translated_texts}
+    result = await provider_scheduler.run(
+        "gemini", gemini_service.enhance_and_translate, text, wanted, source_lang
+    )
+    return result["enhanced_text"], result["translations"]
 
 
 @app.post("/api/complete")
@@ -143,48 +379,238 @@ async def api_complete(
     file: UploadFile = File(...),
     target_languages: Optional[str] = None,
     voice_id: Optional[str] = None,
-    stt_language: Optional[str] = None
+    stt_language: Optional[str] = None,
+    format: Optional[str] = None,
+    bitrate: Optional[str] = None,
+    single_call: Optional[bool] = None
 ):
     if not stt_service or not tts_service or not translator:
         raise HTTPException(503, "Required services missing")
-
-    audio_bytes = await file.read()
-    bio = io.BytesIO(audio_bytes)
+    check_output_format(format, bitrate)
 
     lang_for_stt = stt_language or "en-US"
-    stt_result = stt_service.transcribe(bio, language=lang_for_stt)
+    try:
+        stt_result = await provider_scheduler.run(
+            "stt", stt_service.transcribe, file.file, file.filename, lang_for_stt
+        )
+    except AudioTooLong as e:
+        uploads.UPLOADS_REJECTED.inc(1, "duration")
+        raise HTTPException(413, str(e))
     original_text = stt_result.get("text", "")
-
-    enhanced = original_text
-    if gemini_service and gemini_service.is_available():
-        enhanced = gemini_service.enhance_text(original_text).get("enhanced_text")
+    # The transcript is in the language STT recognized; no need to detect it
+    source_lang = stt_result.get("language") or lang_for_stt
 
     langs = [l.strip() for l in (target_languages or "").split(",") if l.strip()]
+    enhanced, prefilled = await enhance_for_pipeline(original_text, langs, source_lang, single_call)
 
-    loop = asyncio.get_event_loop()
     translated_texts = {}
     audio_urls = {}
+    audio_sizes = {}
 
     for lang in langs:
-        translated = translator.translate(enhanced, target_lang=lang)
+        translated = prefilled.get(lang)
+        if translated is None:
+            translated = await provider_scheduler.run(
+                "translate", translator.translate, enhanced, lang, source_lang
+            )
         translated_texts[lang] = translated
 
-        audio_urls[lang] = await loop.run_in_executor(
-            None,
-            tts_service.synthesize,
+        audio, mime = await provider_scheduler.run(
+            "tts",
+            tts_service.synthesize_bytes,
             translated,
             lang,
-            voice_id
+            voice_id,
+            format,
+            bitrate
         )
+        audio_urls[lang] = tts_service.to_data_url(audio, mime)
+        audio_sizes[lang] = {"bytes": len(audio), "mime": mime}
 
     return {
         "text": original_text,
         "enhanced_text": enhanced if enhanced != original_text else None,
         "translated_texts": translated_texts,
-        "audio_urls": audio_urls
+        "audio_urls": audio_urls,
+        "audio_sizes": audio_sizes,
+        "translated_by": {l: "gemini" if l in prefilled else "translator" for l in langs}
     }
 
 
+# ----- PIPELINE JOBS -----
+
+async def run_pipeline_job(job: jobs.Job, audio_path: Optional[str], filename: Optional[str],
+                           text: Optional[str], langs: List[str], voice_id: Optional[str],
+                           stt_language: Optional[str], fmt: Optional[str], bitrate: Optional[str],
+                           single_call: Optional[bool] = None, enhance: bool = True):
+    """
+    The /api/complete pipeline, publishing each result as soon as it exists.
+    With `enhance` off the text is translated and spoken as given.
+    """
+    source_lang = None
+    if audio_path is not None:
+        lang_for_stt = stt_language or "en-US"
+        stt_result = await provider_scheduler.run(
+            "stt", stt_service.transcribe, audio_path, filename, lang_for_stt
+        )
+        text = stt_result.get("text", "")
+        if not text.strip():
+            raise Exception(stt_result.get("error", "No speech detected"))
+        source_lang = stt_result.get("language") or lang_for_stt
+        job.publish("transcript", {"text": text, "language": source_lang})
+    elif stt_language:
+        source_lang = stt_language
+
+    enhanced, prefilled = text, {}
+    if enhance:
+        enhanced, prefilled = await enhance_for_pipeline(text, langs, source_lang, single_call)
+    job.publish("enhanced", {"text": enhanced, "changed": enhanced != text})
+
+    limit = asyncio.Semaphore(JOB_LANGUAGE_CONCURRENCY)
+
+    async def render(lang: str):
+        async with limit:
+            try:
+                translated = prefilled.get(lang)
+                if translated is None:
+                    translated = await provider_scheduler.run(
+                        "translate", translator.translate, enhanced, lang, source_lang
+                    )
+                job.publish("translation", {
+                    "language": lang, "text": translated,
+                    "by": "gemini" if lang in prefilled else "translator"
+                })
+
+                # Native edge-tts coroutine; cancelling the job cancels it
+                audio, mime = await provider_scheduler.run_async(
+                    "tts", tts_service.synthesize_async,
+                    translated, lang, voice_id, fmt, bitrate
+                )
+            except Exception as e:
+                print(f"Job {job.id}: {lang} failed: {e}")
+                job.publish("language_error", {"language": lang, "error": str(e)})
+                return False
+
+            job.add_artifact(lang, audio, mime)
+            job.publish("audio", {
+                "language": lang,
+                "url": f"/api/jobs/{job.id}/audio/{lang}",
+                "bytes": len(audio),
+                "mime": mime
+            })
+            return True
+
+    rendered = await asyncio.gather(*(render(lang) for lang in langs))
+    if langs and not any(rendered):
+        raise Exception("No language could be rendered")
+
+
+async def _get_job(job_id: str):
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found or expired")
+    return job
+
+
+@app.post("/api/jobs", status_code=202)
+async def api_submit_job(
+    file: Optional[UploadFile] = File(None),
+    text: Optional[str] = Form(None),
+    target_languages: str = Form(...),
+    voice_id: Optional[str] = Form(None),
+    stt_language: Optional[str] = Form(None),
+    format: Optional[str] = Form(None),
+    bitrate: Optional[str] = Form(None),
+    single_call: Optional[bool] = Form(None),
+    enhance: bool = Form(True)
+):
+    """
+    Start the complete pipeline in the background. Send either an audio
+    `file` (transcribed first) or `text`. Results stream from events_url.
+    `enhance=false` skips the Gemini rewrite and speaks the text as sent.
+    """
+    if not tts_service or not translator or (file is not None and not stt_service):
+        raise HTTPException(503, "Required services missing")
+    check_output_format(format, bitrate)
+
+    langs = [l.strip() for l in target_languages.split(",") if l.strip()]
+    if not langs:
+        raise HTTPException(400, "No target languages")
+
+    if file is not None:
+        if not file.size:
+            raise HTTPException(400, "Empty audio")
+    elif not (text or "").strip():
+        raise HTTPException(400, "Send an audio file or text")
+
+    # The upload is closed once this response is sent; the job keeps a copy on disk
+    audio_path = None
+    if file is not None:
+        audio_path = await asyncio.to_thread(uploads.spool_to_disk, file.file)
+
+    try:
+        job = job_store.create()
+    except jobs.JobStoreFull as e:
+        uploads.discard(audio_path)
+        raise HTTPException(429, f"Too many jobs in progress: {e}")
+
+    job_store.start(job, run_pipeline_job(
+        job, audio_path, file.filename if file is not None else None,
+        text, langs, voice_id, stt_language, format, bitrate, single_call, enhance
+    ))
+    job.task.add_done_callback(lambda _: uploads.discard(audio_path))
+    # Another worker may get the follow-up requests; let it find the job
+    await job_store.flush()
+    return {
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}",
+        "events_url": f"/api/jobs/{job.id}/events"
+    }
+
+
+@app.get("/api/jobs/{job_id}")
+async def api_job_status(job_id: str):
+    return (await _get_job(job_id)).snapshot()
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def api_job_events(job_id: str, request: Request):
+    """Server-Sent Events; reconnecting clients resume after Last-Event-ID."""
+    job = await _get_job(job_id)
+    try:
+        after = int(request.headers.get("Last-Event-ID", "-1"))
+    except ValueError:
+        after = -1
+
+    async def stream():
+        async for event in job.subscribe(after):
+            yield jobs.format_sse(event)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
+@app.get("/api/jobs/{job_id}/audio/{lang}")
+async def api_job_audio(job_id: str, lang: str):
+    job = await _get_job(job_id)
+    # A RemoteJob reads the audio from SQLite
+    artifact = await asyncio.to_thread(job.artifact, lang)
+    if artifact is None:
+        raise HTTPException(404, "Audio not ready")
+    audio, mime = artifact
+    return Response(audio, media_type=mime)
+
+
+@app.delete("/api/jobs/{job_id}")
+async def api_cancel_job(job_id: str):
+    job = await _get_job(job_id)
+    if not job_store.cancel(job):
+        raise HTTPException(409, f"Job already {job.status}")
+    return {"job_id": job.id, "cancelled": True}
+
+
 @app.post("/api/avatar")
 async def avatar_from_text(
     text: str = Body(...),
@@ -193,7 +619,8 @@ async def avatar_from_text(
     if not avatar_controller:
         raise HTTPException(503, "Avatar unavailable")
 
-    return avatar_controller.process_text(text, language)
+    with span("avatar.text"):
+        return avatar_controller.process_text(text, language)
 
 
 @app.get("/api/languages")
@@ -233,6 +660,75 @@ async def api_languages():
             "stt": []
         }
 
+@app.get("/admin/profile/cpu")
+async def admin_profile_cpu(request: Request, seconds: float = 10.0, interval_ms: float = 5.0):
+    """Sample all threads of this worker for `seconds`; returns collapsed stacks."""
+    require_admin(request)
+    if cpu_profile_lock.locked():
+        raise HTTPException(409, "A CPU profile is already running")
+
+    seconds = min(max(seconds, 0.1), 120.0)
+    async with cpu_profile_lock:
+        profiler = profiling.SamplingProfiler(interval=max(interval_ms, 1.0) / 1000.0).start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+
+    content = profiler.collapsed()
+    path = profiling.write_profile(PROFILE_DIR, "cpu", content)
+    return PlainTextResponse(content, headers={
+        "X-Profile-File": path,
+        "X-Profile-Samples": str(profiler.samples),
+        "Content-Disposition": f'attachment; filename="{os.path.basename(path)}"',
+    })
+
+
+@app.get("/admin/profile/memory")
+async def admin_profile_memory(request: Request, top: int = 25, seconds: float = 5.0):
+    """
+    tracemalloc top allocators. Traces for `seconds` unless tracemalloc is
+    already running (PYTHONTRACEMALLOC), in which case it snapshots at once.
+    """
+    require_admin(request)
+    seconds = min(max(seconds, 0.0), 120.0)
+    top = min(max(top, 1), 500)
+
+    if memory_profile_lock.locked():
+        raise HTTPException(409, "A memory profile is already running")
+    async with memory_profile_lock:
+        # Its own thread: the trace window sleeps, and provider threads are for providers
+        snapshot = await asyncio.to_thread(profiling.memory_snapshot, top, seconds)
+    path = profiling.write_profile(PROFILE_DIR, "memory", snapshot.pop("collapsed"))
+    snapshot["collapsed_file"] = path
+    return snapshot
+
+
+# Shared caches an admin can flush for every worker at once
+CACHES = {"translation": Translator.NAMESPACES, "audio": TextToSpeech.NAMESPACES}
+
+
+@app.post("/admin/cache/{name}/invalidate")
+async def admin_cache_invalidate(request: Request, name: str):
+    """
+    Drop a shared cache for all workers. Bumps the namespace generation,
+    so results computed before the flush are not written back afterwards.
+    """
+    require_admin(request)
+    if not shared_store:
+        raise HTTPException(503, "Shared store unavailable")
+    if name not in CACHES:
+        raise HTTPException(404, f"Unknown cache {name!r}; expected one of {', '.join(CACHES)}")
+
+    generations = {}
+    for namespace in CACHES[name]:
+        generations[namespace] = await asyncio.to_thread(shared_store.invalidate, namespace)
+    return {"cache": name, "generations": generations}
+
+
+# Voice cloning is disabled, so no VoiceCloning service is built. Enabling
+# it means constructing VoiceCloning(store=shared_store), which keeps its
+# registry in the shared store for every worker.
 @app.get("/api/voice/status")
 async def voice_status():
     return {"available": False, "message": "Voice cloning disabled"}
@@ -246,4 +742,5 @@ async def clone_voice():
     raise HTTPException(503, "Voice cloning disabled")
 
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=False)
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=False, workers=workers)
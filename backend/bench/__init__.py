@@ -0,0 +1 @@
+# Offline benchmark and load-test tooling
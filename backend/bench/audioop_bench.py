@@ -0,0 +1,235 @@
+"""
+Benchmark and conformance check for the NumPy audioop shim in compat.py.
+
+Times every shim function on a synthetic 16 kHz recording and, when the
+interpreter still ships CPython's audioop (<= 3.12), times the C module
+too and checks that both return identical results.
+
+Usage (from backend/):
+    python -m bench.audioop_bench --seconds 60
+    python -m bench.audioop_bench --verify 200   # randomized conformance rounds only
+    python -m bench.audioop_bench --write-reference tests/data/audioop_reference.json
+"""
+import sys
+import json
+import math
+import base64
+import time
+import random
+import argparse
+import warnings
+
+import compat
+
+shim = compat.build_audioop_module()
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop as reference
+    # On 3.13+ compat registers the shim itself under this name
+    if getattr(reference, "__file__", None) is None:
+        reference = None
+except ImportError:
+    reference = None
+
+
+def make_fragment(seconds: float, width: int = 2, rate: int = 16000, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    peak = (1 << (8 * width - 1)) - 1
+    samples = (
+        int(peak * 0.6 * math.sin(2 * math.pi * 220 * i / rate)) + rng.randint(-200, 200)
+        for i in range(int(seconds * rate))
+    )
+    return b"".join(max(-peak - 1, min(peak, s)).to_bytes(width, sys.byteorder, signed=True)
+                    for s in samples)
+
+
+def cases(fragment: bytes, width: int):
+    stereo = shim.tostereo(fragment, width, 1.0, 1.0)
+    half = fragment[: len(fragment) // 2 // width * width]
+    return [
+        ("rms", (fragment, width)),
+        ("max", (fragment, width)),
+        ("avg", (fragment, width)),
+        ("minmax", (fragment, width)),
+        ("avgpp", (fragment, width)),
+        ("maxpp", (fragment, width)),
+        ("cross", (fragment, width)),
+        ("mul", (fragment, width, 0.8)),
+        ("bias", (fragment, width, 100)),
+        ("add", (fragment, fragment, width)),
+        ("reverse", (fragment, width)),
+        ("byteswap", (fragment, width)),
+        ("lin2lin", (fragment, width, 4)),
+        ("tomono", (stereo, width, 0.5, 0.5)),
+        ("tostereo", (fragment, width, 1.0, 1.0)),
+        ("lin2ulaw", (fragment, width)),
+        ("ulaw2lin", (shim.lin2ulaw(fragment, width), width)),
+        ("lin2alaw", (fragment, width)),
+        ("alaw2lin", (shim.lin2alaw(fragment, width), width)),
+        ("ratecv", (fragment, width, 1, 16000, 8000, None)),
+        ("ratecv", (fragment, width, 1, 16000, 44100, None)),
+        ("ratecv", (stereo, width, 2, 16000, 22050, None)),
+        ("lin2adpcm", (half, width, None)),
+        ("findmax", (fragment[:32000], 800)),
+        ("findfit", (fragment[:16000], fragment[4000:4800])),
+    ]
+
+
+def timed(fn, args, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return a == b or (math.isnan(a) and math.isnan(b))
+    if isinstance(a, tuple) and isinstance(b, tuple) and len(a) == len(b):
+        return all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def benchmark(seconds: float, width: int, repeat: int) -> int:
+    fragment = make_fragment(seconds, width)
+    print(f"{seconds:.0f}s of {width * 8}-bit audio ({len(fragment)} bytes), best of {repeat}")
+    header = f"{'function':<12} {'shim ms':>10}"
+    if reference is not None:
+        header += f" {'C ms':>10} {'ratio':>7}  match"
+    print(header)
+
+    mismatches = 0
+    for name, args in cases(fragment, width):
+        shim_s, shim_out = timed(getattr(shim, name), args, repeat)
+        line = f"{name:<12} {shim_s * 1000:>10.2f}"
+        if reference is not None:
+            ref_s, ref_out = timed(getattr(reference, name), args, repeat)
+            same = _same(shim_out, ref_out)
+            mismatches += not same
+            line += f" {ref_s * 1000:>10.2f} {shim_s / ref_s if ref_s else 0:>7.1f}  {'ok' if same else 'DIFF'}"
+        print(line)
+    return mismatches
+
+
+def random_cases(rounds: int, seed: int = 0):
+    """Seeded (name, args) conformance cases over every width and edge length."""
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        width = rng.choice((1, 2, 3, 4))
+        n = rng.choice((0, 1, 2, 3, 17, 64))
+        frag = bytes(rng.getrandbits(8) for _ in range(n * width))
+        other = bytes(rng.getrandbits(8) for _ in range(n * width))
+        for name in ("max", "minmax", "avg", "rms", "avgpp", "maxpp", "cross",
+                     "reverse", "byteswap", "lin2ulaw", "lin2alaw"):
+            yield name, (frag, width)
+        yield "getsample", (frag, width, rng.randint(-1, n))
+        yield "mul", (frag, width, rng.uniform(-3, 3))
+        yield "tomono", (frag, width, rng.uniform(-2, 2), rng.uniform(-2, 2))
+        yield "tostereo", (frag, width, rng.uniform(-2, 2), rng.uniform(-2, 2))
+        yield "add", (frag, other, width)
+        yield "bias", (frag, width, rng.randint(-2 ** 31, 2 ** 31 - 1))
+        yield "lin2lin", (frag, width, rng.choice((1, 2, 3, 4)))
+        yield "ulaw2lin", (frag, width)
+        yield "alaw2lin", (frag, width)
+        yield "lin2adpcm", (frag, width, None)
+        yield "adpcm2lin", (frag, width, (rng.randint(-32768, 32767), rng.randint(0, 88)))
+        nch = rng.choice((1, 2))
+        rates = rng.choice(((8000, 16000), (44100, 16000), (48000, 16000), (3, 7)))
+        weights = rng.choice(((1, 0), (3, 1)))
+        yield "ratecv", (frag, width, nch, rates[0], rates[1], None) + weights
+        shorts = frag[: len(frag) // 2 * 2]
+        yield "findmax", (shorts, rng.randint(0, len(shorts) // 2))
+        yield "findfit", (shorts, shorts[: rng.randint(0, len(shorts) // 2) * 2])
+        yield "findfactor", (shorts, other[: len(shorts)])
+
+
+def reference_cases():
+    """Fixed cases: realistic audio at every width, then the seeded random rounds."""
+    for width in (1, 2, 3, 4):
+        yield from cases(make_fragment(0.02, width, seed=width), width)
+    yield from random_cases(40)
+
+
+def outcome(module, name, args):
+    try:
+        return ("ok", getattr(module, name)(*args))
+    except Exception as e:
+        return ("raise", type(e).__name__, str(e))
+
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return {"bytes": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, tuple):
+        return {"tuple": [_encode(v) for v in value]}
+    return value
+
+
+def decode(value):
+    """Inverse of the JSON encoding used by --write-reference."""
+    if isinstance(value, dict):
+        if "bytes" in value:
+            return base64.b64decode(value["bytes"])
+        return tuple(decode(v) for v in value["tuple"])
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    return value
+
+
+def write_reference(path: str) -> int:
+    """Record CPython audioop outputs for reference_cases() as JSON vectors."""
+    if reference is None:
+        print("CPython audioop not available; run this on Python <= 3.12")
+        return 1
+    vectors = [
+        {"name": name, "args": _encode(args), "expected": _encode(outcome(reference, name, args))}
+        for name, args in reference_cases()
+    ]
+    with open(path, "w") as f:
+        json.dump({"python": sys.version.split()[0], "vectors": vectors}, f, separators=(",", ":"))
+    print(f"Wrote {len(vectors)} vectors to {path}")
+    return 0
+
+
+def verify(rounds: int, seed: int = 0) -> int:
+    """Randomized conformance rounds against CPython's audioop."""
+    if reference is None:
+        print("CPython audioop not available; nothing to verify against "
+              "(the tests in tests/ check the shim against recorded vectors)")
+        return 0
+    mismatches = checks = 0
+    for name, args in random_cases(rounds, seed):
+        checks += 1
+        if not _same(outcome(reference, name, args), outcome(shim, name, args)):
+            mismatches += 1
+            print(f"MISMATCH {name} widths/lengths={[len(a) if isinstance(a, bytes) else a for a in args]}")
+
+    print(f"{checks} comparisons, {mismatches} mismatches")
+    return mismatches
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy audioop shim")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--width", type=int, default=2, choices=(1, 2, 3, 4))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--verify", type=int, metavar="ROUNDS",
+                        help="Only run randomized conformance rounds against CPython audioop")
+    parser.add_argument("--write-reference", metavar="PATH",
+                        help="Record CPython audioop outputs as test vectors (Python <= 3.12)")
+    args = parser.parse_args(argv)
+
+    if args.write_reference:
+        return write_reference(args.write_reference)
+    if args.verify:
+        return 1 if verify(args.verify) else 0
+    return 1 if benchmark(args.seconds, args.width, args.repeat) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Injectable local stand-ins for every external provider.
+
+install_fakes() patches Google STT, Google Translate (deep_translator),
+edge-tts, gTTS and Gemini with in-process fakes whose latency and error
+rate come from a FakeProfile per provider. Each fake records how long it
+ran so the load generator can report a per-stage breakdown.
+
+Must be called before `app` is imported so the services pick up the fakes.
+"""
+import os
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+PROVIDERS = ("stt", "translate", "edge_tts", "gtts", "gemini")
+
+
+@dataclass
+class FakeProfile:
+    """Latency distribution (milliseconds) and failure probability for one provider."""
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    distribution: str = "normal"  # normal | lognormal | fixed
+
+    @classmethod
+    def parse(cls, spec: str) -> "FakeProfile":
+        """Parse 'latency[:jitter[:error_rate[:distribution]]]', e.g. '80:20:0.01:lognormal'."""
+        parts = spec.split(":")
+        profile = cls()
+        if len(parts) > 0 and parts[0]:
+            profile.latency_ms = float(parts[0])
+        if len(parts) > 1 and parts[1]:
+            profile.jitter_ms = float(parts[1])
+        if len(parts) > 2 and parts[2]:
+            profile.error_rate = float(parts[2])
+        if len(parts) > 3 and parts[3]:
+            profile.distribution = parts[3]
+        return profile
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        if self.distribution == "fixed" or self.jitter_ms <= 0:
+            ms = self.latency_ms
+        elif self.distribution == "lognormal":
+            # Parameterised so the mean is latency_ms and the stddev is jitter_ms
+            mean, sd = max(self.latency_ms, 1e-3), self.jitter_ms
+            sigma2 = math.log(1 + (sd / mean) ** 2)
+            mu = math.log(mean) - sigma2 / 2
+            ms = rng.lognormvariate(mu, sigma2 ** 0.5)
+        else:
+            ms = rng.gauss(self.latency_ms, self.jitter_ms)
+        return max(0.0, ms) / 1000.0
+
+    def should_fail(self, rng: random.Random) -> bool:
+        return self.error_rate > 0 and rng.random() < self.error_rate
+
+
+class StageRecorder:
+    """Thread-safe collection of per-provider call durations and failures."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float, failed: bool = False):
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+            if failed:
+                self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.durations.clear()
+            self.errors.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {k: list(v) for k, v in self.durations.items()}, dict(self.errors)
+
+
+recorder = StageRecorder()
+_profiles: Dict[str, FakeProfile] = {p: FakeProfile() for p in PROVIDERS}
+_rng = random.Random(1234)
+_rng_lock = threading.Lock()
+
+
+def _draw(provider: str):
+    profile = _profiles[provider]
+    with _rng_lock:
+        return profile.sample_seconds(_rng), profile.should_fail(_rng)
+
+
+def _blocking_call(provider: str, exc_factory):
+    delay, fail = _draw(provider)
+    time.sleep(delay)
+    recorder.record(provider, delay, fail)
+    if fail:
+        raise exc_factory()
+
+
+async def _async_call(provider: str, exc_factory):
+    delay, fail = _draw(provider)
+    await asyncio.sleep(delay)
+    recorder.record(provider, delay, fail)
+    if fail:
+        raise exc_factory()
+
+
+# A few hundred bytes standing in for MP3 frames; nothing downstream decodes them.
+FAKE_AUDIO = b"ID3\x03\x00\x00\x00\x00\x00\x00" + bytes(range(256)) * 2
+
+
+class FakeGoogleTranslator:
+    def __init__(self, source="auto", target="en", **kwargs):
+        self.source = source
+        self.target = target
+
+    def translate(self, text, **kwargs):
+        _blocking_call("translate", lambda: Exception("fake translate failure"))
+        return f"[{self.target}] {text}"
+
+    def get_supported_languages(self, as_dict=False):
+        from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
+        return dict(GOOGLE_LANGUAGES_TO_CODES) if as_dict else list(GOOGLE_LANGUAGES_TO_CODES)
+
+
+class FakeCommunicate:
+    def __init__(self, text, voice=None, **kwargs):
+        self.text = text
+        self.voice = voice
+
+    async def stream(self):
+        await _async_call("edge_tts", lambda: Exception("fake edge-tts failure"))
+        yield {"type": "audio", "data": FAKE_AUDIO}
+
+
+class FakeGTTS:
+    def __init__(self, text, lang="en", **kwargs):
+        self.text = text
+        self.lang = lang
+
+    def save(self, path):
+        _blocking_call("gtts", lambda: Exception("fake gTTS failure"))
+        with open(path, "wb") as f:
+            f.write(FAKE_AUDIO)
+
+
+class _FakeGeminiResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+_GREETINGS = {
+    "ja": "こんにちは、お元気ですか。", "zh": "你好，今天怎么样。", "ko": "안녕하세요, 잘 지내세요.",
+    "el": "Γεια σου, τι κάνεις; ", "he": "שלום, מה שלומך? ", "th": "สวัสดีครับ สบายดีไหม ",
+}
+
+
+def _fake_translation(text: str, lang: str) -> str:
+    """Filler in the target language and about as long as `text`, so output validation accepts it."""
+    import langid
+    sample = next((samples[lang] for samples in langid.SEED_TEXTS.values() if lang in samples), None)
+    sample = sample or _GREETINGS.get(lang)
+    if not sample:
+        return f"[{lang}] {text}"
+    return (sample * (len(text) // len(sample) + 1))[:max(len(text), 12)]
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name=None, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, **kwargs):
+        _blocking_call("gemini", lambda: Exception("fake Gemini failure"))
+        text = prompt.rsplit("Text:", 1)[-1].strip()
+        codes = re.search(r"language codes: ([\w, -]+)\.", prompt)
+        if codes:
+            # Multilingual mode: answer in the requested JSON shape
+            langs = [c.strip() for c in codes.group(1).split(",") if c.strip()]
+            return _FakeGeminiResponse(json.dumps({
+                "enhanced_text": text,
+                "translations": {lang: _fake_translation(text, lang) for lang in langs},
+            }))
+        return _FakeGeminiResponse(text)
+
+
+def install_fakes(profiles: Optional[Dict[str, FakeProfile]] = None, seed: int = 1234):
+    """Patch every provider with its fake. Safe to call more than once."""
+    import speech_recognition as sr
+    import deep_translator
+    import edge_tts
+    import gtts
+    import google.generativeai as genai
+
+    global _rng
+    _rng = random.Random(seed)
+    for name in PROVIDERS:
+        _profiles[name] = (profiles or {}).get(name, _profiles[name])
+
+    def fake_recognize_google(self, audio_data, key=None, language="en-US",
+                              pfilter=0, show_all=False, with_confidence=False):
+        _blocking_call("stt", lambda: sr.RequestError("fake recognition failure"))
+        seconds = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        text = f"fake transcript of {seconds:.1f} seconds"
+        return (text, 0.9) if with_confidence else text
+
+    sr.Recognizer.recognize_google = fake_recognize_google
+    deep_translator.GoogleTranslator = FakeGoogleTranslator
+    edge_tts.Communicate = FakeCommunicate
+    gtts.gTTS = FakeGTTS
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+    os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+    # Modules that imported the names directly need patching too
+    import sys
+    for module_name, attr, fake in (
+        ("translate", "GoogleTranslator", FakeGoogleTranslator),
+        ("tts", "gTTS", FakeGTTS),
+    ):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            setattr(module, attr, fake)
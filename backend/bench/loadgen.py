@@ -0,0 +1,308 @@
+"""
+Open-loop load generator for the HTTP API.
+
+By default the app is started in-process on a free port with every
+provider replaced by the fakes in bench.fakes, so runs are reproducible
+and need no network. Pass --url to drive an already running server
+instead (no fakes, no per-stage breakdown).
+
+Usage (from backend/):
+    python -m bench.loadgen --rps 20 --duration 30 \\
+        --endpoints stt,tts,complete,avatar \\
+        --fake stt=300:60 --fake translate=80:20:0.01:lognormal \\
+        --out bench/results/latest.json --baseline bench/results/baseline.json
+
+Results are written as JSON; with --baseline the run is compared against a
+previous result and the process exits non-zero when any endpoint's p95
+latency regresses by more than --max-regression.
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import wave
+import socket
+import struct
+import asyncio
+import argparse
+import tempfile
+import threading
+import platform
+from typing import Dict, List
+
+from bench.fakes import FakeProfile, PROVIDERS, install_fakes, recorder
+
+ENDPOINTS = ("stt", "tts", "complete", "avatar")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile; values need not be sorted."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lo, hi = math.floor(rank), math.ceil(rank)
+    if lo == hi:
+        return ordered[lo]
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3) if values else 0.0,
+    }
+
+
+def make_wav(seconds: float = 3.0, rate: int = 16000) -> bytes:
+    """A mono 16-bit tone with a pause in the middle, standing in for speech."""
+    frames = bytearray()
+    total = int(seconds * rate)
+    for i in range(total):
+        t = i / rate
+        amplitude = 0 if 0.45 * seconds < t < 0.55 * seconds else 8000
+        frames += struct.pack("<h", int(amplitude * math.sin(2 * math.pi * 220 * t)))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+    return buf.getvalue()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_local_server(profiles: Dict[str, FakeProfile], seed: int) -> str:
+    """Install fakes, import the app and serve it on a background thread."""
+    os.environ.setdefault("SHARED_STORE_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+    install_fakes(profiles, seed=seed)
+
+    import uvicorn
+    import app as app_module
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        app_module.app, host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("local server did not start")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, endpoints, languages, wav: bytes, unique_text: bool):
+        self.base_url = base_url.rstrip("/")
+        self.endpoints = list(endpoints)
+        self.languages = list(languages)
+        self.wav = wav
+        self.unique_text = unique_text
+        self.latencies: Dict[str, List[float]] = {e: [] for e in self.endpoints}
+        self.errors: Dict[str, Dict[str, int]] = {e: {} for e in self.endpoints}
+        self._counter = 0
+
+    def _text(self) -> str:
+        self._counter += 1
+        base = "Hello, this is a benchmark sentence for the speech pipeline."
+        return f"{base} #{self._counter}" if self.unique_text else base
+
+    async def _request(self, session, endpoint: str):
+        import aiohttp
+
+        url = f"{self.base_url}/api/{endpoint}"
+        kwargs = {}
+        if endpoint == "stt":
+            form = aiohttp.FormData()
+            form.add_field("file", self.wav, filename="sample.wav", content_type="audio/wav")
+            form.add_field("language", "en")
+            kwargs["data"] = form
+        elif endpoint == "complete":
+            form = aiohttp.FormData()
+            form.add_field("file", self.wav, filename="sample.wav", content_type="audio/wav")
+            kwargs["data"] = form
+            kwargs["params"] = {"target_languages": ",".join(self.languages), "stt_language": "en"}
+        elif endpoint == "tts":
+            kwargs["json"] = {"text": self._text(), "target_languages": self.languages}
+        elif endpoint == "avatar":
+            kwargs["json"] = self._text()
+            kwargs["params"] = {"language": "en"}
+
+        start = time.perf_counter()
+        try:
+            async with session.post(url, **kwargs) as resp:
+                await resp.read()
+                status = str(resp.status)
+        except Exception as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - start
+
+        if status == "200":
+            self.latencies[endpoint].append(elapsed)
+        else:
+            self.errors[endpoint][status] = self.errors[endpoint].get(status, 0) + 1
+
+    async def run(self, rps: float, duration: float, concurrency: int) -> float:
+        """Fire requests on a fixed schedule regardless of response times (open loop)."""
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        timeout = aiohttp.ClientTimeout(total=120)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            interval = 1.0 / rps
+            total = int(rps * duration)
+            tasks = []
+            started = time.perf_counter()
+            for i in range(total):
+                target = started + i * interval
+                delay = target - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                endpoint = self.endpoints[i % len(self.endpoints)]
+                tasks.append(asyncio.create_task(self._request(session, endpoint)))
+            await asyncio.gather(*tasks)
+            return time.perf_counter() - started
+
+
+def build_report(gen: LoadGenerator, elapsed: float, args, local: bool) -> Dict:
+    endpoints = {}
+    for endpoint in gen.endpoints:
+        lat = gen.latencies[endpoint]
+        stats = summarize(lat)
+        stats["throughput_rps"] = round(len(lat) / elapsed, 3) if elapsed else 0.0
+        stats["errors"] = gen.errors[endpoint]
+        endpoints[endpoint] = stats
+
+    stages = {}
+    if local:
+        durations, errors = recorder.snapshot()
+        for stage, values in durations.items():
+            stages[stage] = summarize(values)
+            stages[stage]["errors"] = errors.get(stage, 0)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "rps": args.rps,
+            "duration": args.duration,
+            "endpoints": gen.endpoints,
+            "languages": gen.languages,
+            "unique_text": args.unique_text,
+            "fakes": args.fake if local else None,
+            "url": None if local else args.url,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "elapsed_s": round(elapsed, 3),
+        "endpoints": endpoints,
+        "stages": stages,
+    }
+
+
+def compare(report: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Return a list of regressions (empty when the run is within budget)."""
+    failures = []
+    for endpoint, stats in report["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(endpoint)
+        if not base or not base.get("p95_ms"):
+            continue
+        change = (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+        line = f"{endpoint:<10} p95 {base['p95_ms']:>9.1f} -> {stats['p95_ms']:>9.1f} ms ({change:+.1%})"
+        print(line)
+        if change > max_regression:
+            failures.append(line)
+    return failures
+
+
+def print_report(report: Dict):
+    print(f"\n{'endpoint':<10} {'count':>6} {'rps':>7} {'p50':>9} {'p95':>9} {'p99':>9}  errors")
+    for endpoint, s in report["endpoints"].items():
+        print(f"{endpoint:<10} {s['count']:>6} {s['throughput_rps']:>7.2f} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}  {s['errors'] or '-'}")
+    if report["stages"]:
+        print(f"\n{'stage':<10} {'calls':>6} {'p50':>9} {'p95':>9} {'p99':>9}  errors")
+        for stage, s in sorted(report["stages"].items()):
+            print(f"{stage:<10} {s['count']:>6} {s['p50_ms']:>9.1f} "
+                  f"{s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}  {s['errors']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the speech API against local fakes")
+    parser.add_argument("--url", help="Drive an existing server instead of an in-process one")
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--concurrency", type=int, default=200, help="Max open connections")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--languages", default="es,fr", help="Target languages for tts/complete")
+    parser.add_argument("--audio-seconds", type=float, default=3.0)
+    parser.add_argument("--unique-text", action="store_true", help="Vary text so caches miss")
+    parser.add_argument("--fake", action="append", default=[], metavar="PROVIDER=SPEC",
+                        help=f"Fake profile, providers: {', '.join(PROVIDERS)}; "
+                             "spec latency_ms[:jitter_ms[:error_rate[:normal|lognormal|fixed]]]")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--out", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed relative p95 increase vs. baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        print(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        return 2
+
+    profiles = {}
+    for spec in args.fake:
+        name, _, value = spec.partition("=")
+        if name not in PROVIDERS:
+            print(f"Unknown provider '{name}'")
+            return 2
+        profiles[name] = FakeProfile.parse(value)
+
+    local = not args.url
+    base_url = start_local_server(profiles, args.seed) if local else args.url
+    languages = [l.strip() for l in args.languages.split(",") if l.strip()]
+
+    gen = LoadGenerator(base_url, endpoints, languages, make_wav(args.audio_seconds), args.unique_text)
+    recorder.reset()
+    elapsed = asyncio.run(gen.run(args.rps, args.duration, args.concurrency))
+
+    report = build_report(gen, elapsed, args, local)
+    print_report(report)
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print("\nBaseline comparison:")
+        failures = compare(report, baseline, args.max_regression)
+        if failures:
+            print(f"\n{len(failures)} endpoint(s) regressed more than {args.max_regression:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+CPU micro-benchmarks for the audio hot paths, with regression budgets.
+
+Each benchmark runs against generated speech-like fixtures of several
+lengths (1 s to 10 min by default) and records the best and median wall
+time plus the peak Python-heap allocation (tracemalloc, measured in a
+separate run so tracing does not skew the timings). Everything is local:
+no provider is contacted. Benchmarks that make pydub probe the input
+need ffmpeg and ffprobe, and are skipped when either is not on PATH.
+
+Budgets in bench/budgets.json scale with fixture length:
+    {"stt.preprocess": {"base_ms": 20, "ms_per_s": 2.0, "base_mb": 5, "mb_per_s": 0.5}}
+A run fails (exit 1) when a result exceeds its budget, or, with
+--baseline, when its best time regresses by more than --max-regression.
+
+Usage (from backend/):
+    python -m bench.micro
+    python -m bench.micro --sizes 1,10 --only stt,audioop
+    python -m bench.micro --out bench/results/micro.json --save-baseline
+    python -m bench.micro --baseline bench/results/micro-baseline.json
+"""
+import compat  # noqa: F401  (must precede speech/audio imports)
+
+import io
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import statistics
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_SIZES = (1, 10, 60, 600)
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "budgets.json")
+UPLOAD_RATE = 44100  # typical browser capture rate; STT resamples to 16 kHz
+SPEECH_CHARS_PER_SECOND = 15
+
+
+# ----- FIXTURES -----
+
+def speech_like(seconds: float, rate: int = UPLOAD_RATE, seed: int = 0) -> np.ndarray:
+    """
+    int16 mono signal shaped like speech: 150-300 ms voiced syllables with
+    a few harmonics, short gaps between words and a ~600 ms pause every
+    few seconds, so silence detection has real work to do.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * rate)
+    out = np.zeros(total, dtype=np.float32)
+    pos = 0
+    since_pause = 0.0
+    while pos < total:
+        if since_pause > rng.uniform(2.5, 5.0):
+            pos += int(0.6 * rate)
+            since_pause = 0.0
+            continue
+        length = int(rng.uniform(0.15, 0.3) * rate)
+        t = np.arange(min(length, total - pos)) / rate
+        pitch = rng.uniform(90, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in (1, 2, 3, 4))
+        envelope = np.sin(np.pi * np.linspace(0, 1, len(t))) ** 0.5
+        out[pos:pos + len(t)] = voiced * envelope * rng.uniform(0.2, 0.6)
+        gap = int(rng.uniform(0.03, 0.12) * rate)
+        pos += length + gap
+        since_pause += (length + gap) / rate
+    out += rng.normal(0, 0.003, total).astype(np.float32)
+    return (np.clip(out, -1, 1) * 32767 * 0.5).astype(np.int16)
+
+
+def wav_bytes(samples: np.ndarray, rate: int = UPLOAD_RATE) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+
+class Fixture:
+    """One generated recording, materialized lazily in the forms benchmarks need."""
+
+    def __init__(self, seconds: float, workdir: str):
+        self.seconds = seconds
+        self.samples = speech_like(seconds)
+        self.wav = wav_bytes(self.samples)
+        self.path = os.path.join(workdir, f"fixture_{seconds:g}s.wav")
+        with open(self.path, "wb") as f:
+            f.write(self.wav)
+        self.pcm = self.samples.tobytes()
+        self.text = _text_of_length(int(seconds * SPEECH_CHARS_PER_SECOND))
+        # edge-tts MP3 is ~48 kbit/s; random bytes stand in for it
+        self.mp3_sized = np.random.default_rng(1).bytes(int(seconds * 6000))
+
+
+def _text_of_length(chars: int) -> str:
+    words = ("the quick brown fox jumps over the lazy dog while seven "
+             "wizards quietly judge boxing matches ").split()
+    out, length, i = [], 0, 0
+    while length < chars:
+        out.append(words[i % len(words)])
+        length += len(out[-1]) + 1
+        i += 1
+    return " ".join(out)[:max(chars, 1)]
+
+
+# ----- BENCHMARKS -----
+
+class Benchmark:
+    def __init__(self, name: str, setup: Callable[[Fixture], Callable[[], object]],
+                 needs_ffmpeg: bool = False):
+        self.name = name
+        self.setup = setup  # fixture -> zero-arg callable to time
+        self.needs_ffmpeg = needs_ffmpeg
+
+
+def _services():
+    from stt import SpeechToText
+    from tts import TextToSpeech
+    from avatar import AvatarController
+    return SpeechToText(), TextToSpeech(), AvatarController()
+
+
+def build_benchmarks() -> List[Benchmark]:
+    stt, tts, avatar = _services()
+    shim = compat.build_audioop_module()
+    loaded = {}
+
+    def decoded(fx: Fixture):
+        if fx.seconds not in loaded:
+            loaded[fx.seconds] = stt._load_audio(fx.path, "fixture.wav")
+        return loaded[fx.seconds]
+
+    return [
+        # Decode, downmix, resample to 16 kHz, normalize and gain
+        Benchmark("stt.preprocess", lambda fx: lambda: stt._load_audio(fx.path, "fixture.wav")),
+        Benchmark("stt.split_on_silence", lambda fx: (lambda a: lambda: stt.split_on_silence(a))(decoded(fx))),
+        Benchmark("avatar.process_audio", lambda fx: lambda: avatar.process_audio(fx.wav),
+                  needs_ffmpeg=True),
+        Benchmark("avatar.process_text", lambda fx: lambda: avatar.process_text(fx.text)),
+        Benchmark("audioop.rms", lambda fx: lambda: shim.rms(fx.pcm, 2)),
+        Benchmark("audioop.max", lambda fx: lambda: shim.max(fx.pcm, 2)),
+        Benchmark("audioop.mul", lambda fx: lambda: shim.mul(fx.pcm, 2, 1.5)),
+        Benchmark("audioop.ratecv", lambda fx: lambda: shim.ratecv(fx.pcm, 2, 1, UPLOAD_RATE, 16000, None)),
+        Benchmark("audioop.lin2lin", lambda fx: lambda: shim.lin2lin(fx.pcm, 2, 4)),
+        Benchmark("audioop.tostereo", lambda fx: lambda: shim.tostereo(fx.pcm, 2, 1, 1)),
+        Benchmark("tts.base64", lambda fx: lambda: tts.to_data_url(fx.mp3_sized)),
+    ]
+
+
+def measure(fn: Callable[[], object], min_time: float, max_repeat: int) -> Dict[str, float]:
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_repeat and (not times or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_ms": round(min(times) * 1000, 3),
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "runs": len(times),
+        "peak_mb": round(peak / 2 ** 20, 3),
+    }
+
+
+def run(sizes, only: Optional[List[str]], min_time: float, max_repeat: int) -> Dict:
+    has_ffmpeg = bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+    benchmarks = [
+        b for b in build_benchmarks()
+        if not only or any(b.name == o or b.name.startswith(o + ".") for o in only)
+    ]
+    results, skipped = {}, []
+    with tempfile.TemporaryDirectory() as workdir:
+        for seconds in sizes:
+            fixture = Fixture(seconds, workdir)
+            for bench in benchmarks:
+                key = f"{bench.name}@{seconds:g}s"
+                if bench.needs_ffmpeg and not has_ffmpeg:
+                    skipped.append(f"{key} (needs ffmpeg and ffprobe)")
+                    continue
+                result = measure(bench.setup(fixture), min_time, max_repeat)
+                result.update(name=bench.name, seconds=seconds)
+                results[key] = result
+                print(f"  {key:<32} {result['best_ms']:>10.2f} ms  "
+                      f"(median {result['median_ms']:.2f}, n={result['runs']})  "
+                      f"peak {result['peak_mb']:.2f} MB")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "ffmpeg": has_ffmpeg,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+# ----- BUDGETS / BASELINES -----
+
+def check_budgets(report: Dict, budgets: Dict) -> List[str]:
+    failures = []
+    for key, result in report["results"].items():
+        budget = budgets.get(result["name"])
+        if not budget:
+            continue
+        seconds = result["seconds"]
+        limit_ms = budget.get("base_ms", 0) + budget.get("ms_per_s", 0) * seconds
+        if limit_ms and result["best_ms"] > limit_ms:
+            failures.append(f"{key}: {result['best_ms']:.1f} ms > budget {limit_ms:.1f} ms")
+        limit_mb = budget.get("base_mb", 0) + budget.get("mb_per_s", 0) * seconds
+        if limit_mb and result["peak_mb"] > limit_mb:
+            failures.append(f"{key}: peak {result['peak_mb']:.1f} MB > budget {limit_mb:.1f} MB")
+    return failures
+
+
+def compare(report: Dict, baseline: Dict, max_regression: float, floor_ms: float = 1.0) -> List[str]:
+    """Best-time regressions beyond max_regression; sub-`floor_ms` results are noise."""
+    failures = []
+    for key, result in report["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if not before or before["best_ms"] < floor_ms:
+            continue
+        change = result["best_ms"] / before["best_ms"] - 1
+        if change > max_regression:
+            failures.append(f"{key}: {before['best_ms']:.1f} -> {result['best_ms']:.1f} ms (+{change:.0%})")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="CPU micro-benchmarks for audio hot paths")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Fixture lengths in seconds, comma separated")
+    parser.add_argument("--only", help="Benchmark names or prefixes, comma separated (e.g. stt,audioop.rms)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds to spend timing each case")
+    parser.add_argument("--max-repeat", type=int, default=20)
+    parser.add_argument("--budgets", default=BUDGETS_PATH)
+    parser.add_argument("--no-budgets", action="store_true")
+    parser.add_argument("--out", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Also write the report to --baseline (default bench/results/micro-baseline.json)")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed relative best-time increase vs. baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+    only = [o.strip() for o in args.only.split(",")] if args.only else None
+
+    print(f"Micro-benchmarks, fixtures: {', '.join(f'{s:g}s' for s in sizes)}")
+    report = run(sizes, only, args.min_time, args.max_repeat)
+    for item in report["skipped"]:
+        print(f"  skipped {item}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+
+    failures = []
+    if not args.no_budgets and os.path.exists(args.budgets):
+        with open(args.budgets) as f:
+            failures += check_budgets(report, json.load(f))
+
+    baseline_path = args.baseline or os.path.join("bench", "results", "micro-baseline.json")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            failures += compare(report, json.load(f), args.max_regression)
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nAll benchmarks within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,6 @@ Must be imported before any other library imports.
 
 import sys
 import types
-import struct
-import array
 import email.message
 
 # ----------------------------------------------------
@@ -63,58 +61,514 @@ except ModuleNotFoundError:
 # ----------------------------------------------------
 # 3. AUDIOOP MODULE (removed in Python 3.13)
 # ----------------------------------------------------
-try:
-    import audioop  # noqa
-except ModuleNotFoundError:
+# NumPy re-implementation of the full audioop API. Results are
+# bit-identical to CPython's C module: integer paths are computed exactly
+# in int64, and floating-point paths repeat the C code's double
+# operations in the same order (sequential sums via np.add.accumulate,
+# truncation/floor exactly where the C code casts). Only the ADPCM codec
+# and ratecv's weighted filter are inherently sequential and stay loops.
+def build_audioop_module():
+    import numpy as np
+
     audioop_module = types.ModuleType("audioop")
 
-    def byteswap(fragment, width):
-        if width == 1:
-            return fragment
-        if width == 2:
-            return struct.pack("<" + str(len(fragment) // 2) + "H",
-                               *struct.unpack(">" + str(len(fragment) // 2) + "H", fragment))
-        if width == 4:
-            return struct.pack("<" + str(len(fragment) // 4) + "I",
-                               *struct.unpack(">" + str(len(fragment) // 4) + "I", fragment))
-        raise ValueError("width must be 1, 2 or 4")
+    class error(Exception):
+        pass
+
+    MAXVALS = {1: 0x7F, 2: 0x7FFF, 3: 0x7FFFFF, 4: 0x7FFFFFFF}
+    MINVALS = {1: -0x80, 2: -0x8000, 3: -0x800000, 4: -0x80000000}
+    NATIVE = {1: np.int8, 2: np.int16, 4: np.int32}
+    LITTLE = sys.byteorder == "little"
+
+    def _check_size(width):
+        if width not in (1, 2, 3, 4):
+            raise error("Size should be 1, 2, 3 or 4")
+
+    def _check_parameters(fragment, width):
+        _check_size(width)
+        if len(fragment) % width != 0:
+            raise error("not a whole number of frames")
+
+    def _buffer(fragment):
+        if isinstance(fragment, str):
+            raise TypeError("a bytes-like object is required, not 'str'")
+        return np.frombuffer(memoryview(fragment).cast("B"), dtype=np.uint8)
+
+    def _raw(fragment, width):
+        """Samples as int64, read the way the C module reads them (native order)."""
+        buf = _buffer(fragment)
+        if width == 3:
+            b = buf.reshape(-1, 3).astype(np.int64)
+            if not LITTLE:
+                b = b[:, ::-1]
+            value = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+            return np.where(value & 0x800000, value - 0x1000000, value)
+        return buf.view(NATIVE[width]).astype(np.int64)
+
+    def _pack(values, width):
+        """Wrap int64 samples to `width` bytes (like the C casts) and serialize."""
+        if width == 3:
+            v = values.astype(np.int64) & 0xFFFFFF
+            out = np.empty((len(v), 3), dtype=np.uint8)
+            out[:, 0] = v & 0xFF
+            out[:, 1] = (v >> 8) & 0xFF
+            out[:, 2] = (v >> 16) & 0xFF
+            if not LITTLE:
+                out = out[:, ::-1]
+            return out.tobytes()
+        return values.astype(NATIVE[width]).tobytes()
+
+    def _to32(values, width):
+        return values << (32 - 8 * width)
+
+    def _from32(values, width):
+        return values >> (32 - 8 * width)
+
+    def _fbound(values, width):
+        """C fbound(): clamp, floor, truncate to int."""
+        maxval, minval = MAXVALS[width], MINVALS[width]
+        v = np.where(values > maxval, maxval, np.where(values < minval + 1.0, minval, values))
+        return np.floor(v).astype(np.int64)
+
+    def _seq_sum(values):
+        """Sequential double summation, identical rounding to a C loop."""
+        if len(values) == 0:
+            return 0.0
+        return float(np.add.accumulate(values.astype(np.float64))[-1])
+
+    # ---------------- sample access / statistics ----------------
+    def getsample(fragment, width, index):
+        _check_parameters(fragment, width)
+        if index < 0 or index >= len(fragment) // width:
+            raise error("Index out of range")
+        return int(_raw(fragment, width)[index])
+
+    def max_(fragment, width):
+        _check_parameters(fragment, width)
+        s = _raw(fragment, width)
+        return int(np.abs(s).max()) if len(s) else 0
+
+    def minmax(fragment, width):
+        _check_parameters(fragment, width)
+        s = _raw(fragment, width)
+        if not len(s):
+            return (0x7FFFFFFF, -0x80000000)
+        return (int(s.min()), int(s.max()))
+
+    def avg(fragment, width):
+        _check_parameters(fragment, width)
+        s = _raw(fragment, width)
+        if not len(s):
+            return 0
+        return int(np.floor(_seq_sum(s) / float(len(s))))
+
+    def rms(fragment, width):
+        _check_parameters(fragment, width)
+        s = _raw(fragment, width)
+        if not len(s):
+            return 0
+        f = s.astype(np.float64)
+        return int(np.sqrt(_seq_sum(f * f) / float(len(s))))
+
+    def _extremes(fragment, width):
+        """Successive peak-to-peak differences, as the avgpp/maxpp C loops see them."""
+        s = _raw(fragment, width)
+        if len(s) <= 1:
+            return np.zeros(0, dtype=np.int64)
+        # Runs of equal samples are skipped by the C loop
+        keep = np.concatenate(([True], s[1:] != s[:-1]))
+        s = s[keep]
+        if len(s) < 3:
+            return np.zeros(0, dtype=np.int64)
+        falling = s[1:] < s[:-1]
+        turns = np.nonzero(falling[1:] != falling[:-1])[0] + 1
+        peaks = s[turns]
+        return np.abs(np.diff(peaks))
+
+    def avgpp(fragment, width):
+        _check_parameters(fragment, width)
+        diffs = _extremes(fragment, width)
+        if not len(diffs):
+            return 0
+        return int(_seq_sum(diffs) / float(len(diffs)))
+
+    def maxpp(fragment, width):
+        _check_parameters(fragment, width)
+        diffs = _extremes(fragment, width)
+        return int(diffs.max()) if len(diffs) else 0
+
+    def cross(fragment, width):
+        _check_parameters(fragment, width)
+        negative = _raw(fragment, width) < 0
+        if not len(negative):
+            return -1
+        return int(np.count_nonzero(negative[1:] != negative[:-1]))
+
+    # ---------------- 16-bit fitting helpers ----------------
+    def _shorts(fragment):
+        if len(fragment) & 1:
+            raise error("Strings should be even-sized")
+        return _raw(fragment, 2)
+
+    def findfactor(fragment, reference):
+        a = _shorts(fragment)
+        b = _shorts(reference)
+        if len(a) != len(b):
+            raise error("Samples should be same size")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float(np.float64(_seq_sum(a * b)) / np.float64(_seq_sum(b * b)))
+
+    def findfit(fragment, reference):
+        a = _shorts(fragment)
+        b = _shorts(reference)
+        len1, len2 = len(a), len(b)
+        if len1 < len2:
+            raise error("First sample should be longer")
+
+        sum_ri_2 = np.float64(int(np.dot(b, b)))
+        squares = np.concatenate(([0], np.cumsum(a * a)))
+        sum_aij_2 = (squares[len2:] - squares[:len1 - len2 + 1]).astype(np.float64)
+        if len2:
+            sum_aij_ri = np.correlate(a, b, mode="valid").astype(np.float64)
+        else:
+            sum_aij_ri = np.zeros(len1 + 1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = (sum_ri_2 * sum_aij_2 - sum_aij_ri * sum_aij_ri) / sum_aij_2
+            if np.isnan(result[0]):
+                best_j = 0
+            else:
+                best_j = int(np.argmin(np.where(np.isnan(result), np.inf, result)))
+            factor = float(sum_aij_ri[best_j] / sum_ri_2)
+        return (best_j, factor)
+
+    def findmax(fragment, length):
+        a = _shorts(fragment)
+        if length < 0 or len(a) < length:
+            raise error("Input sample should be longer")
+        squares = np.concatenate(([0], np.cumsum(a * a)))
+        windows = squares[length:] - squares[:len(a) - length + 1]
+        return int(np.argmax(windows))
+
+    # ---------------- sample transforms ----------------
+    def mul(fragment, width, factor):
+        _check_parameters(fragment, width)
+        s = _raw(fragment, width).astype(np.float64)
+        return _pack(_fbound(s * float(factor), width), width)
 
     def tomono(fragment, width, lfactor, rfactor):
-        if width not in (1, 2, 4):
-            raise ValueError("width must be 1, 2 or 4")
+        _check_parameters(fragment, width)
+        if (len(fragment) // width) & 1:
+            raise error("not a whole number of frames")
+        s = _raw(fragment, width).astype(np.float64)
+        mixed = s[0::2] * float(lfactor) + s[1::2] * float(rfactor)
+        return _pack(_fbound(mixed, width), width)
 
-        typecode = {1: "b", 2: "h", 4: "i"}[width]
-        samples = array.array(typecode, fragment)
-        mono = array.array(typecode)
+    def tostereo(fragment, width, lfactor, rfactor):
+        _check_parameters(fragment, width)
+        s = _raw(fragment, width).astype(np.float64)
+        out = np.empty(len(s) * 2, dtype=np.int64)
+        out[0::2] = _fbound(s * float(lfactor), width)
+        out[1::2] = _fbound(s * float(rfactor), width)
+        return _pack(out, width)
 
-        for i in range(0, len(samples), 2):
-            if i + 1 < len(samples):
-                mono.append(int((samples[i] * lfactor + samples[i + 1] * rfactor) / 2))
+    def add(fragment1, fragment2, width):
+        _check_parameters(fragment1, width)
+        if len(fragment1) != len(fragment2):
+            raise error("Lengths should be the same")
+        total = _raw(fragment1, width) + _raw(fragment2, width)
+        return _pack(np.clip(total, MINVALS[width], MAXVALS[width]), width)
 
-        return mono.tobytes()
+    def bias(fragment, width, bias):
+        _check_parameters(fragment, width)
+        # Unsigned wrap-around, exactly like the C code
+        mask = (1 << (8 * width)) - 1
+        shifted = (_raw(fragment, width) + (int(bias) & 0xFFFFFFFF)) & mask
+        return _pack(shifted, width)
 
     def reverse(fragment, width):
-        typecode = {1: "b", 2: "h", 4: "i"}[width]
-        samples = array.array(typecode, fragment)
-        samples.reverse()
-        return samples.tobytes()
-
-    # Minimal stubs for unused operations
-    def stub(*args, **kwargs):
-        return b""
-
-    audioop_module.byteswap = byteswap
-    audioop_module.tomono = tomono
-    audioop_module.tostereo = stub
-    audioop_module.ratecv = lambda frag, width, *args: (frag, None)
-    audioop_module.reverse = reverse
-
-    # stubs
-    for name in [
-        "add", "bias", "lin2lin", "ulaw2lin", "lin2ulaw",
-        "alaw2lin", "lin2alaw", "rms", "max", "maxpp", "avg",
-        "avgpp", "cross", "findfactor", "findfit", "findmax"
-    ]:
-        setattr(audioop_module, name, stub)
-
-    sys.modules["audioop"] = audioop_module
+        _check_parameters(fragment, width)
+        frames = _buffer(fragment).reshape(-1, width)
+        return frames[::-1].tobytes()
+
+    def byteswap(fragment, width):
+        _check_parameters(fragment, width)
+        frames = _buffer(fragment).reshape(-1, width)
+        return frames[:, ::-1].tobytes()
+
+    def lin2lin(fragment, width, newwidth):
+        _check_parameters(fragment, width)
+        _check_size(newwidth)
+        if width == newwidth:
+            return bytes(fragment)
+        return _pack(_from32(_to32(_raw(fragment, width), width), newwidth), newwidth)
+
+    # ---------------- G.711 u-law / A-law ----------------
+    def _search(value, table):
+        for i, end in enumerate(table):
+            if value <= end:
+                return i
+        return len(table)
+
+    def _ulaw_encode_scalar(pcm):
+        seg_uend = (0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF)
+        if pcm < 0:
+            pcm, mask = -pcm, 0x7F
+        else:
+            mask = 0xFF
+        pcm = min(pcm, 8159) + (0x84 >> 2)
+        seg = _search(pcm, seg_uend)
+        if seg >= 8:
+            return 0x7F ^ mask
+        return ((seg << 4) | ((pcm >> (seg + 1)) & 0xF)) ^ mask
+
+    def _alaw_encode_scalar(pcm):
+        seg_aend = (0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF)
+        if pcm >= 0:
+            mask = 0xD5
+        else:
+            mask, pcm = 0x55, -pcm - 1
+        seg = _search(pcm, seg_aend)
+        if seg >= 8:
+            return 0x7F ^ mask
+        aval = seg << 4
+        aval |= (pcm >> (1 if seg < 2 else seg)) & 0xF
+        return aval ^ mask
+
+    def _ulaw_decode_scalar(u):
+        u = ~u & 0xFF
+        t = (((u & 0x0F) << 3) + 0x84) << ((u & 0x70) >> 4)
+        return (0x84 - t) if u & 0x80 else (t - 0x84)
+
+    def _alaw_decode_scalar(a):
+        a ^= 0x55
+        t = (a & 0x0F) << 4
+        seg = (a & 0x70) >> 4
+        if seg == 0:
+            t += 8
+        else:
+            t = (t + 0x108) << (seg - 1)
+        return t if a & 0x80 else -t
+
+    tables = {}
+
+    def _table(name):
+        # Built on first use: lookups replace the per-sample C branches
+        if name not in tables:
+            if name == "ulaw_enc":
+                tables[name] = np.array([_ulaw_encode_scalar(v) for v in range(-8192, 8192)], dtype=np.uint8)
+            elif name == "alaw_enc":
+                tables[name] = np.array([_alaw_encode_scalar(v) for v in range(-4096, 4096)], dtype=np.uint8)
+            elif name == "ulaw_dec":
+                tables[name] = np.array([_ulaw_decode_scalar(v) for v in range(256)], dtype=np.int64)
+            else:
+                tables[name] = np.array([_alaw_decode_scalar(v) for v in range(256)], dtype=np.int64)
+        return tables[name]
+
+    def lin2ulaw(fragment, width):
+        _check_parameters(fragment, width)
+        pcm14 = _to32(_raw(fragment, width), width) >> 18
+        return _table("ulaw_enc")[pcm14 + 8192].tobytes()
+
+    def lin2alaw(fragment, width):
+        _check_parameters(fragment, width)
+        pcm13 = _to32(_raw(fragment, width), width) >> 19
+        return _table("alaw_enc")[pcm13 + 4096].tobytes()
+
+    def ulaw2lin(fragment, width):
+        _check_size(width)
+        linear = _table("ulaw_dec")[_buffer(fragment)]
+        return _pack(_from32(linear << 16, width), width)
+
+    def alaw2lin(fragment, width):
+        _check_size(width)
+        linear = _table("alaw_dec")[_buffer(fragment)]
+        return _pack(_from32(linear << 16, width), width)
+
+    # ---------------- IMA ADPCM (sequential by nature) ----------------
+    INDEX_TABLE = (-1, -1, -1, -1, 2, 4, 6, 8, -1, -1, -1, -1, 2, 4, 6, 8)
+    STEPSIZE_TABLE = (
+        7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+        50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+        253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+        1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+        3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+        11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+        32767
+    )
+
+    def _adpcm_state(state):
+        if state is None:
+            return 0, 0
+        if not isinstance(state, tuple):
+            raise TypeError("state must be a tuple or None")
+        valpred, index = state
+        if not -0x8000 <= valpred <= 0x7FFF or not 0 <= index < len(STEPSIZE_TABLE):
+            raise ValueError("bad state")
+        return valpred, index
+
+    def lin2adpcm(fragment, width, state):
+        _check_parameters(fragment, width)
+        valpred, index = _adpcm_state(state)
+        samples = (_to32(_raw(fragment, width), width) >> 16).tolist()
+        out = bytearray(len(samples) // 2)
+        step = STEPSIZE_TABLE[index]
+        outputbuffer = 0
+        for n, val in enumerate(samples):
+            if val < valpred:
+                diff, sign = valpred - val, 8
+            else:
+                diff, sign = val - valpred, 0
+            delta = 0
+            vpdiff = step >> 3
+            if diff >= step:
+                delta = 4
+                diff -= step
+                vpdiff += step
+            step >>= 1
+            if diff >= step:
+                delta |= 2
+                diff -= step
+                vpdiff += step
+            step >>= 1
+            if diff >= step:
+                delta |= 1
+                vpdiff += step
+            valpred = valpred - vpdiff if sign else valpred + vpdiff
+            valpred = min(32767, max(-32768, valpred))
+            delta |= sign
+            index = min(88, max(0, index + INDEX_TABLE[delta]))
+            step = STEPSIZE_TABLE[index]
+            if n & 1 == 0:
+                outputbuffer = (delta << 4) & 0xF0
+            else:
+                out[n >> 1] = (delta & 0x0F) | outputbuffer
+        return bytes(out), (valpred, index)
+
+    def adpcm2lin(fragment, width, state):
+        _check_size(width)
+        valpred, index = _adpcm_state(state)
+        step = STEPSIZE_TABLE[index]
+        out = []
+        for byte in _buffer(fragment).tolist():
+            for delta in ((byte >> 4) & 0xF, byte & 0xF):
+                index = min(88, max(0, index + INDEX_TABLE[delta]))
+                sign = delta & 8
+                delta &= 7
+                vpdiff = step >> 3
+                if delta & 4:
+                    vpdiff += step
+                if delta & 2:
+                    vpdiff += step >> 1
+                if delta & 1:
+                    vpdiff += step >> 2
+                valpred = valpred - vpdiff if sign else valpred + vpdiff
+                valpred = min(32767, max(-32768, valpred))
+                step = STEPSIZE_TABLE[index]
+                out.append(valpred)
+        linear = np.array(out, dtype=np.int64) << 16
+        return _pack(_from32(linear, width), width), (valpred, index)
+
+    # ---------------- sample-rate conversion ----------------
+    def ratecv(fragment, width, nchannels, inrate, outrate, state, weightA=1, weightB=0):
+        """
+        Closed form of CPython's ratecv loop. The loop's counter d only
+        depends on the rates, so output m is taken after consuming
+        c_m = max(0, ceil((m*inrate - d0) / outrate)) input frames, with
+        d_m = d0 + c_m*outrate - m*inrate, interpolating between the
+        previous and current (filtered) frame exactly as the C code does.
+        """
+        import math
+
+        _check_size(width)
+        if nchannels < 1:
+            raise error("# of channels should be >= 1")
+        bytes_per_frame = width * nchannels
+        if weightA < 1 or weightB < 0:
+            raise error("weightA should be >= 1, weightB should be >= 0")
+        if len(fragment) % bytes_per_frame != 0:
+            raise error("not a whole number of frames")
+        if inrate <= 0 or outrate <= 0:
+            raise error("sampling rate not > 0")
+
+        g = math.gcd(inrate, outrate)
+        inrate, outrate = inrate // g, outrate // g
+        g = math.gcd(weightA, weightB)
+        weightA, weightB = weightA // g, weightB // g
+
+        if state is None:
+            d0 = -outrate
+            prev = [0] * nchannels
+            cur = [0] * nchannels
+        else:
+            if not isinstance(state, tuple):
+                raise TypeError("state must be a tuple or None")
+            try:
+                d0, samps = state
+                d0 = int(d0)
+            except (TypeError, ValueError):
+                raise TypeError("ratecv(): illegal state argument")
+            if not isinstance(samps, tuple):
+                raise TypeError("ratecv(): illegal state argument")
+            if len(samps) != nchannels:
+                raise error("illegal state argument")
+            prev, cur = [], []
+            for channel in samps:
+                if not isinstance(channel, tuple) or len(channel) != 2:
+                    raise TypeError("ratecv(): illegal state argument")
+                prev.append(int(channel[0]))
+                cur.append(int(channel[1]))
+
+        frames = len(fragment) // bytes_per_frame
+        x = _to32(_raw(fragment, width), width).reshape(frames, nchannels)
+
+        # F[c] / F[c+1] are prev / cur after consuming c frames
+        F = np.empty((frames + 2, nchannels), dtype=np.int64)
+        F[0] = prev
+        F[1] = cur
+        if weightB == 0:
+            F[2:] = x
+        else:
+            wa, wb = float(weightA), float(weightB)
+            last = np.array(cur, dtype=np.float64)
+            for k in range(frames):
+                last = np.trunc((wa * x[k] + wb * last) / (wa + wb))
+                F[k + 2] = last.astype(np.int64)
+
+        count = (frames * outrate + d0) // inrate + 1
+        if count > 0:
+            m = np.arange(count, dtype=np.int64)
+            c = np.maximum(0, -((d0 - m * inrate) // outrate))
+            d = (d0 + c * outrate - m * inrate).astype(np.float64)[:, None]
+            p = F[c].astype(np.float64)
+            q = F[c + 1].astype(np.float64)
+            out = np.trunc((p * d + q * (float(outrate) - d)) / float(outrate)).astype(np.int64)
+            data = _pack(_from32(out.reshape(-1), width), width)
+        else:
+            count = 0
+            data = b""
+
+        d_final = d0 + frames * outrate - count * inrate
+        new_state = (d_final, tuple(
+            (int(F[frames, ch]), int(F[frames + 1, ch])) for ch in range(nchannels)
+        ))
+        return (data, new_state)
+
+    for name, fn in {
+        "error": error, "getsample": getsample, "max": max_, "minmax": minmax,
+        "avg": avg, "rms": rms, "avgpp": avgpp, "maxpp": maxpp, "cross": cross,
+        "findfactor": findfactor, "findfit": findfit, "findmax": findmax,
+        "mul": mul, "tomono": tomono, "tostereo": tostereo, "add": add,
+        "bias": bias, "reverse": reverse, "byteswap": byteswap, "lin2lin": lin2lin,
+        "lin2ulaw": lin2ulaw, "ulaw2lin": ulaw2lin, "lin2alaw": lin2alaw,
+        "alaw2lin": alaw2lin, "lin2adpcm": lin2adpcm, "adpcm2lin": adpcm2lin,
+        "ratecv": ratecv,
+    }.items():
+        setattr(audioop_module, name, fn)
+    return audioop_module
+
+
+try:
+    import audioop  # noqa
+except ModuleNotFoundError:
+    sys.modules["audioop"] = build_audioop_module()
@@ -1,11 +1,28 @@
 import os
+import re
+import json
 import google.generativeai as genai
+from typing import Dict, List, Optional
+
+import metrics
+from metrics import span
+from langid import identifier, same_language
+
+GEMINI_TRANSLATIONS = metrics.registry.register(metrics.Counter(
+    "voicemaker_gemini_translations", "Per-language results of single-call Gemini translation",
+    ("outcome",)
+))
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
 
 class GeminiService:
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
         self.model_name = "gemini-pro"
         self.client = None
+        # Single-call enhancement + translation (enhance_and_translate) for /api/complete
+        self.multilingual = os.getenv("GEMINI_MULTILINGUAL", "0").lower() in ("1", "true", "yes")
+        self._json_mode = True
 
         if not self.api_key:
             print("Gemini disabled: GEMINI_API_KEY not found")
@@ -32,11 +49,97 @@ Text:
 {text}
 """
         try:
-            response = self.client.generate_content(prompt)
+            with span("gemini.generate"):
+                response = self.client.generate_content(prompt)
             enhanced = response.text.strip()
             return {"enhanced_text": enhanced}
         except:
             return {"enhanced_text": text}
 
+    def enhance_and_translate(self, text: str, target_langs: List[str],
+                              source_lang: Optional[str] = None) -> Dict:
+        """
+        Grammar enhancement plus translation into every target language in
+        one structured generation. Returns enhanced_text, the translations
+        that passed validation, and the languages that are `missing` and
+        still need the regular Translator. On any failure, all languages
+        are missing and enhanced_text is the input.
+        """
+        result = {"enhanced_text": text, "translations": {}, "missing": list(target_langs)}
+        if not self.client or not text.strip():
+            return result
+
+        prompt = f"""
+Improve the grammar, spelling and clarity of the text below without
+changing its language, then translate the improved text into each of
+these language codes: {", ".join(target_langs)}.
+
+Respond with JSON only, exactly in this shape:
+{{"enhanced_text": "<improved text>", "translations": {{"<code>": "<translation>"}}}}
+
+Text:
+{text}
+"""
+        try:
+            with span("gemini.generate"):
+                response = self._generate_json(prompt)
+            data = json.loads(_FENCE.sub("", response.text.strip()))
+        except Exception as e:
+            print("Gemini multilingual generation failed:", e)
+            GEMINI_TRANSLATIONS.inc(len(target_langs), "failed")
+            return result
+
+        if not isinstance(data, dict):
+            GEMINI_TRANSLATIONS.inc(len(target_langs), "failed")
+            return result
+        enhanced = data.get("enhanced_text")
+        if isinstance(enhanced, str) and enhanced.strip():
+            result["enhanced_text"] = enhanced.strip()
+
+        translations = data.get("translations")
+        if not isinstance(translations, dict):
+            translations = {}
+        for lang in target_langs:
+            candidate = translations.get(lang)
+            if self._valid_translation(candidate, result["enhanced_text"], lang, source_lang):
+                result["translations"][lang] = candidate.strip()
+                GEMINI_TRANSLATIONS.inc(1, "accepted")
+            else:
+                GEMINI_TRANSLATIONS.inc(1, "missing" if candidate is None else "rejected")
+        result["missing"] = [l for l in target_langs if l not in result["translations"]]
+        return result
+
+    def _generate_json(self, prompt: str):
+        """Ask for application/json output; older models reject that, so fall back to plain text."""
+        if self._json_mode:
+            try:
+                return self.client.generate_content(
+                    prompt, generation_config={"response_mime_type": "application/json", "temperature": 0.2}
+                )
+            except Exception as e:
+                if "mime" not in str(e).lower():
+                    raise
+                print("Gemini JSON mode unsupported, using plain output:", e)
+                self._json_mode = False
+        return self.client.generate_content(prompt, generation_config={"temperature": 0.2})
+
+    def _valid_translation(self, candidate, source_text: str, lang: str, source_lang: Optional[str]) -> bool:
+        if not isinstance(candidate, str) or not candidate.strip():
+            return False
+        candidate = candidate.strip()
+        # Runaway or truncated generations
+        if len(candidate) > 4 * len(source_text) + 200 or len(candidate) * 4 < len(source_text):
+            return False
+        # Left untranslated
+        if candidate == source_text and len(source_text) > 20 and not same_language(source_lang, lang):
+            return False
+        # Confidently in some other language than the one asked for
+        detected, confidence = identifier.identify(candidate)
+        expected = lang.split("-")[0].lower()
+        # Kanji-only Japanese looks like Chinese to script detection
+        if detected and confidence >= 0.9 and detected != expected and {detected, expected} != {"zh", "ja"}:
+            return False
+        return True
+
     def is_available(self):
         return self.client is not None
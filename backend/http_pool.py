@@ -0,0 +1,124 @@
+"""
+Pooled keep-alive HTTP sessions for the translation and gTTS providers.
+
+deep_translator calls `requests.get` and gTTS opens a fresh
+`requests.Session()` for every request, so each translation or gTTS
+synthesis pays for a new TCP connection and TLS handshake. install()
+points both libraries at a shim that routes their requests through one
+long-lived Session per host, whose urllib3 pool keeps connections alive
+between calls.
+"""
+import os
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+
+
+class SessionPool:
+    """One requests.Session per host, each with a bounded keep-alive pool."""
+
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self.pool_size = pool_size
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # A few pools per host: gTTS sends with verify=False, which
+                # urllib3 keys separately from verified connections
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def request(self, method: str, url: str, **kwargs):
+        kwargs.setdefault("timeout", TIMEOUT)
+        return self.session_for(url).request(method, url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per host: requests sent and connections opened (the rest were reused)."""
+        result = {}
+        with self._lock:
+            sessions = dict(self._sessions)
+        for host, session in sessions.items():
+            sent = opened = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    conn_pool = pools.get(key)
+                    if conn_pool is not None:
+                        sent += conn_pool.num_requests
+                        opened += conn_pool.num_connections
+            result[host] = {"requests": sent, "connections": opened, "reused": max(0, sent - opened)}
+        return result
+
+
+pool = SessionPool()
+
+
+class _PooledSession:
+    """Stands in for `requests.Session()` inside gTTS; close() keeps the pool open."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def send(self, request, **kwargs):
+        kwargs.setdefault("timeout", TIMEOUT)
+        return pool.session_for(request.url).send(request, **kwargs)
+
+
+class _RequestsShim:
+    """Module-like proxy for `requests` that sends through the shared pool."""
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+    def get(self, url, **kwargs):
+        return pool.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return pool.request("POST", url, **kwargs)
+
+    def Session(self):
+        return _PooledSession()
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install():
+    """Route deep_translator's Google backend and gTTS through the pool. Idempotent."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        shim = _RequestsShim()
+        try:
+            import deep_translator.google
+            deep_translator.google.requests = shim
+        except Exception as e:
+            print("HTTP pool: could not patch deep_translator:", e)
+        try:
+            import gtts.tts
+            gtts.tts.requests = shim
+        except Exception as e:
+            print("HTTP pool: could not patch gTTS:", e)
+        _installed = True
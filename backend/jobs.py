@@ -0,0 +1,362 @@
+"""
+Background pipeline jobs with progressive results over Server-Sent Events.
+
+A Job owns one asyncio task and an append-only event log. Subscribers
+replay the log from any point (the SSE Last-Event-ID) and then wait for
+new events, so a client that reconnects, or connects after the job has
+finished, still sees every result. Everything here runs on the event
+loop; blocking provider work happens in the task via the executor.
+
+The store is bounded twice: finished jobs expire `ttl` seconds after
+they finish, and when `max_jobs` is reached the oldest finished job is
+evicted to make room. If every slot holds a running job, create()
+raises JobStoreFull.
+
+With several workers (WEB_CONCURRENCY > 1) a job runs in the worker that
+accepted it, but its other requests can land anywhere. A JobStore given
+SharedJobs mirrors every event and artifact into the SQLite SharedStore;
+other workers serve them from there as a RemoteJob and forward DELETE as
+a cancel flag the owning worker polls. Store access never runs on the
+event loop: writes go through one background thread in publish order,
+reads through asyncio.to_thread.
+"""
+import json
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobStoreFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, job_id: str, shared: Optional["SharedJobs"] = None):
+        self.id = job_id
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.artifacts: Dict[str, Tuple[bytes, str]] = {}  # (data, mime), e.g. audio served by URL
+        self.task: Optional[asyncio.Task] = None
+        self._shared = shared
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def publish(self, event: str, data: Optional[Dict[str, Any]] = None):
+        self.events.append({"id": len(self.events), "event": event, "data": data or {}})
+        if self._shared is not None:
+            self._shared.write(self._shared.save_event, self.id, self.events[-1], self.meta())
+        # Wake current subscribers; later ones wait on a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def add_artifact(self, name: str, data: bytes, mime: str):
+        self.artifacts[name] = (data, mime)
+        if self._shared is not None:
+            self._shared.write(self._shared.save_artifact, self.id, name, data, mime)
+
+    def artifact(self, name: str) -> Optional[Tuple[bytes, str]]:
+        return self.artifacts.get(name)
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "events": len(self.events),
+        }
+
+    def finish(self, status: str, data: Optional[Dict[str, Any]] = None):
+        if self.finished:
+            return
+        self.status = status
+        self.finished_at = time.time()
+        self.publish(status, data)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "events": self.events,
+        }
+
+    async def subscribe(self, after: int = -1, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events with id > `after`, then new ones as they are published,
+        until the job finishes. Yields None every `keepalive` seconds of
+        silence so the caller can keep the connection open.
+        """
+        position = after + 1
+        while True:
+            changed = self._changed
+            while position < len(self.events):
+                yield self.events[position]
+                position += 1
+            if self.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+
+class SharedJobs:
+    """
+    Job events, artifacts and cancel requests in a SharedStore. Entries
+    expire `ttl` seconds after they are written, so pass the job TTL plus
+    the longest a job may run.
+    """
+    NAMESPACE = "jobs"
+    ARTIFACT_NAMESPACE = "job_artifacts"
+
+    def __init__(self, store, ttl: float):
+        self.store = store
+        self.ttl = ttl
+        # A commit can wait on another worker's lock for busy_timeout; one
+        # writer thread keeps that off the event loop and keeps writes ordered
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-writer")
+
+    def write(self, fn, *args):
+        """Queue fn(*args) on the writer thread."""
+        return self._writer.submit(self._run_write, fn, *args)
+
+    @staticmethod
+    def _run_write(fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"Shared job write failed: {e}")
+
+    async def flush(self):
+        """Wait until every write queued so far is committed."""
+        await asyncio.wrap_future(self._writer.submit(lambda: None))
+
+    def save_event(self, job_id: str, event: Dict[str, Any], meta: Dict[str, Any]):
+        self.store.set_json(self.NAMESPACE, f"{job_id}/event/{event['id']}", event, self.ttl)
+        self.save_meta(job_id, meta)
+
+    def save_meta(self, job_id: str, meta: Dict[str, Any]):
+        self.store.set_json(self.NAMESPACE, job_id, meta, self.ttl)
+
+    def save_artifact(self, job_id: str, name: str, data: bytes, mime: str):
+        self.store.set(self.ARTIFACT_NAMESPACE, f"{job_id}/{name}", mime.encode() + b"\n" + data, self.ttl)
+
+    def meta(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get_json(self.NAMESPACE, job_id)
+
+    def events(self, job_id: str, start: int, stop: int) -> List[Dict[str, Any]]:
+        events = []
+        for event_id in range(start, stop):
+            event = self.store.get_json(self.NAMESPACE, f"{job_id}/event/{event_id}")
+            if event is None:
+                break
+            events.append(event)
+        return events
+
+    def artifact(self, job_id: str, name: str) -> Optional[Tuple[bytes, str]]:
+        raw = self.store.get(self.ARTIFACT_NAMESPACE, f"{job_id}/{name}")
+        if raw is None:
+            return None
+        mime, _, data = raw.partition(b"\n")
+        return data, mime.decode()
+
+    def request_cancel(self, job_id: str):
+        self.store.set(self.NAMESPACE, f"{job_id}/cancel", b"1", self.ttl)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return self.store.get(self.NAMESPACE, f"{job_id}/cancel") is not None
+
+    def load(self, job_id: str) -> Optional["RemoteJob"]:
+        """A RemoteJob with the events published so far, or None. Blocking."""
+        meta = self.meta(job_id)
+        if meta is None:
+            return None
+        return RemoteJob(self, job_id, meta, self.events(job_id, 0, meta["events"]))
+
+
+class RemoteJob:
+    """
+    Read-only view of a job running in another worker, as loaded by
+    SharedJobs.load(). artifact() reads the store, so call it off the loop.
+    """
+
+    def __init__(self, shared: SharedJobs, job_id: str, meta: Dict[str, Any],
+                 events: List[Dict[str, Any]]):
+        self.id = job_id
+        self.events = events
+        self._shared = shared
+        self._update(meta)
+
+    def _update(self, meta: Dict[str, Any]):
+        self.status = meta["status"]
+        self.created_at = meta["created_at"]
+        self.finished_at = meta["finished_at"]
+        self.event_count = meta["events"]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def artifact(self, name: str) -> Optional[Tuple[bytes, str]]:
+        return self._shared.artifact(self.id, name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return Job.snapshot(self)
+
+    def _poll(self, position: int) -> List[Dict[str, Any]]:
+        meta = self._shared.meta(self.id)
+        if meta is not None:
+            self._update(meta)
+        return self._shared.events(self.id, position, self.event_count)
+
+    async def subscribe(self, after: int = -1, keepalive: float = 15.0,
+                        interval: float = 0.25) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Job.subscribe, polling the shared store every `interval` seconds."""
+        position = after + 1
+        quiet = 0.0
+        while True:
+            finished = self.finished
+            events = await asyncio.to_thread(self._poll, position)
+            for event in events:
+                yield event
+            position += len(events)
+            if events:
+                quiet = 0.0
+            # Status was read before these events, so none can be missing
+            if finished and position >= self.event_count:
+                return
+            await asyncio.sleep(interval)
+            quiet += interval
+            if quiet >= keepalive:
+                quiet = 0.0
+                yield None
+
+
+class JobStore:
+    def __init__(self, max_jobs: int = 200, ttl: float = 600.0, shared: Optional[SharedJobs] = None,
+                 cancel_poll: float = 0.5):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.shared = shared
+        self.cancel_poll = cancel_poll
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def prune(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+
+    def create(self) -> Job:
+        self.prune()
+        if len(self._jobs) >= self.max_jobs:
+            oldest = next((j for j in self._jobs.values() if j.finished), None)
+            if oldest is None:
+                raise JobStoreFull(f"{self.max_jobs} jobs already running")
+            del self._jobs[oldest.id]
+
+        job = Job(uuid.uuid4().hex, self.shared)
+        self._jobs[job.id] = job
+        if self.shared is not None:
+            self.shared.write(self.shared.save_meta, job.id, job.meta())
+        return job
+
+    async def get(self, job_id: str):
+        """The local Job, else a RemoteJob when another worker runs it, else None."""
+        self.prune()
+        job = self._jobs.get(job_id)
+        if job is None and self.shared is not None:
+            job = await asyncio.to_thread(self.shared.load, job_id)
+        return job
+
+    async def flush(self):
+        """Wait until other workers can see every job change made so far."""
+        if self.shared is not None:
+            await self.shared.flush()
+
+    async def _watch_cancel(self, job: Job):
+        # DELETE handled by another worker only leaves a flag in the store
+        while not job.finished:
+            await asyncio.sleep(self.cancel_poll)
+            if await asyncio.to_thread(self.shared.cancel_requested, job.id):
+                job.task.cancel()
+                return
+
+    def start(self, job: Job, coro) -> Job:
+        """Run `coro` as the job's task; its outcome becomes the final event."""
+        async def run():
+            job.status = RUNNING
+            job.publish("status", {"status": RUNNING})
+            watcher = None
+            if self.shared is not None:
+                watcher = asyncio.get_running_loop().create_task(self._watch_cancel(job))
+            try:
+                await coro
+            except asyncio.CancelledError:
+                job.finish(CANCELLED)
+                raise
+            except Exception as e:
+                print(f"Job {job.id} failed: {e}")
+                job.finish(FAILED, {"error": str(e)})
+            else:
+                job.finish(DONE)
+            finally:
+                if watcher is not None:
+                    watcher.cancel()
+
+        def cancelled_early(task):
+            # A task cancelled before its first step never runs `run`
+            if task.cancelled() and not job.finished:
+                coro.close()
+                job.finish(CANCELLED)
+
+        job.task = asyncio.get_running_loop().create_task(run())
+        job.task.add_done_callback(cancelled_early)
+        return job
+
+    def cancel(self, job) -> bool:
+        if job.finished:
+            return False
+        if isinstance(job, RemoteJob):
+            self.shared.write(self.shared.request_cancel, job.id)
+            return True
+        if job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+    def counts(self) -> Dict[str, int]:
+        counts = {s: 0 for s in (QUEUED, RUNNING) + FINISHED}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+
+def format_sse(event: Optional[Dict[str, Any]]) -> str:
+    """One SSE frame; None becomes a keep-alive comment."""
+    if event is None:
+        return ": keep-alive\n\n"
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['event']}\n"
+        f"data: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+    )
@@ -0,0 +1,472 @@
+"""
+Offline language identification.
+
+Two stages, no network and no model files:
+  1. Script detection. Most scripts belong to exactly one supported
+     language (Hangul -> ko, Thai -> th, Tamil -> ta, ...) and answer
+     the question on their own.
+  2. For scripts shared by several languages (Latin, Cyrillic, Arabic,
+     Devanagari), a character 1-3-gram model built from the short seed
+     texts below scores each candidate with add-one-smoothed log
+     probabilities.
+
+Accuracy is good for a sentence or more and falls off on a few words;
+callers get a confidence and should treat low values as "unknown".
+"""
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+# ----- SCRIPTS -----
+
+# (first code point, last code point, script)
+_SCRIPT_RANGES = (
+    (0x0041, 0x024F, "latin"), (0x1E00, 0x1EFF, "latin"),
+    (0x0370, 0x03FF, "greek"), (0x1F00, 0x1FFF, "greek"),
+    (0x0400, 0x052F, "cyrillic"),
+    (0x0590, 0x05FF, "hebrew"),
+    (0x0600, 0x06FF, "arabic"), (0x0750, 0x077F, "arabic"), (0xFB50, 0xFEFF, "arabic"),
+    (0x0900, 0x097F, "devanagari"),
+    (0x0980, 0x09FF, "bengali"),
+    (0x0A00, 0x0A7F, "gurmukhi"),
+    (0x0A80, 0x0AFF, "gujarati"),
+    (0x0B80, 0x0BFF, "tamil"),
+    (0x0C00, 0x0C7F, "telugu"),
+    (0x0C80, 0x0CFF, "kannada"),
+    (0x0D00, 0x0D7F, "malayalam"),
+    (0x0D80, 0x0DFF, "sinhala"),
+    (0x0E00, 0x0E7F, "thai"),
+    (0x0E80, 0x0EFF, "lao"),
+    (0x1000, 0x109F, "myanmar"),
+    (0x1780, 0x17FF, "khmer"),
+    (0x1100, 0x11FF, "hangul"), (0x3130, 0x318F, "hangul"), (0xAC00, 0xD7AF, "hangul"),
+    (0x3040, 0x30FF, "kana"),
+    (0x3400, 0x4DBF, "han"), (0x4E00, 0x9FFF, "han"), (0xF900, 0xFAFF, "han"),
+)
+
+# Scripts that identify a single supported language
+_SCRIPT_LANGUAGE = {
+    "greek": "el", "hebrew": "he", "bengali": "bn", "gurmukhi": "pa",
+    "gujarati": "gu", "tamil": "ta", "telugu": "te", "kannada": "kn",
+    "malayalam": "ml", "sinhala": "si", "thai": "th", "lao": "lo",
+    "myanmar": "my", "khmer": "km", "hangul": "ko", "kana": "ja", "han": "zh",
+}
+
+
+def _script(ch: str) -> Optional[str]:
+    cp = ord(ch)
+    for first, last, name in _SCRIPT_RANGES:
+        if first <= cp <= last:
+            return name
+    return None
+
+
+def script_counts(text: str) -> Counter:
+    """Letters per script, ignoring digits, punctuation and unknown scripts."""
+    counts = Counter()
+    for ch in text:
+        if ch.isalpha():
+            name = _script(ch)
+            if name:
+                counts[name] += 1
+    return counts
+
+
+# ----- N-GRAM SEED TEXTS -----
+
+# Short samples of everyday language per shared-script language. They only
+# need to carry each language's characteristic letters and function words.
+SEED_TEXTS: Dict[str, Dict[str, str]] = {
+    "latin": {
+        "en": "the quick brown fox jumps over the lazy dog. this is what we have been "
+              "talking about with them and they would like to know where you are going "
+              "today. there is nothing which could be done without your help, thank you "
+              "for everything and see you tomorrow at the station.",
+        "es": "el rápido zorro marrón salta sobre el perro perezoso. esto es lo que "
+              "estábamos hablando con ellos y quieren saber dónde vas hoy. no hay nada "
+              "que se pueda hacer sin tu ayuda, gracias por todo y nos vemos mañana en la "
+              "estación. ¿qué hora es? el niño pequeño está en la casa de su abuela.",
+        "fr": "le renard brun rapide saute par-dessus le chien paresseux. c'est ce dont "
+              "nous parlions avec eux et ils veulent savoir où tu vas aujourd'hui. il n'y a "
+              "rien qu'on puisse faire sans ton aide, merci pour tout et à demain à la gare. "
+              "les enfants sont déjà à l'école et nous sommes très contents.",
+        "de": "der schnelle braune fuchs springt über den faulen hund. das ist es, worüber "
+              "wir mit ihnen gesprochen haben, und sie möchten wissen, wohin du heute gehst. "
+              "es gibt nichts, was ohne deine hilfe getan werden könnte, vielen dank für "
+              "alles und bis morgen am bahnhof. die straße ist schön und groß.",
+        "it": "la rapida volpe marrone salta sopra il cane pigro. questo è ciò di cui "
+              "stavamo parlando con loro e vogliono sapere dove vai oggi. non c'è niente che "
+              "si possa fare senza il tuo aiuto, grazie di tutto e ci vediamo domani alla "
+              "stazione. gli amici della famiglia sono molto gentili.",
+        "pt": "a rápida raposa marrom pula sobre o cão preguiçoso. isto é o que estávamos "
+              "conversando com eles e eles querem saber aonde você vai hoje. não há nada que "
+              "possa ser feito sem a sua ajuda, obrigado por tudo e até amanhã na estação. "
+              "as crianças estão em casa com a mãe e o irmão.",
+        "tr": "hızlı kahverengi tilki tembel köpeğin üzerinden atlar. onlarla bunun "
+              "hakkında konuşuyorduk ve bugün nereye gittiğini bilmek istiyorlar. senin "
+              "yardımın olmadan yapılabilecek hiçbir şey yok, her şey için teşekkür ederim "
+              "ve yarın istasyonda görüşürüz. çocuklar okulda ve öğretmen çok güzel.",
+        "pl": "szybki brązowy lis przeskakuje nad leniwym psem. o tym właśnie z nimi "
+              "rozmawialiśmy i chcą wiedzieć, dokąd dzisiaj idziesz. nie ma niczego, co "
+              "można zrobić bez twojej pomocy, dziękuję za wszystko i do zobaczenia jutro na "
+              "dworcu. dzieci są w szkole, a ja jestem w domu.",
+        "nl": "de snelle bruine vos springt over de luie hond. dit is waar we het met hen "
+              "over hadden en ze willen weten waar je vandaag naartoe gaat. er is niets dat "
+              "zonder jouw hulp gedaan kan worden, bedankt voor alles en tot morgen op het "
+              "station. de kinderen zijn op school en wij zijn thuis.",
+        "sv": "den snabba bruna räven hoppar över den lata hunden. det här är vad vi "
+              "pratade om med dem och de vill veta vart du ska i dag. det finns ingenting "
+              "som kan göras utan din hjälp, tack för allt och vi ses i morgon på stationen. "
+              "barnen är i skolan och jag är hemma med min fru.",
+        "da": "den hurtige brune ræv springer over den dovne hund. det er det, vi talte "
+              "med dem om, og de vil gerne vide, hvor du skal hen i dag. der er intet, der "
+              "kan gøres uden din hjælp, tak for alt og vi ses i morgen på stationen. "
+              "børnene er i skole, og jeg er hjemme med min kone. hvad synes du?",
+        "no": "den raske brune reven hopper over den late hunden. det er dette vi snakket "
+              "med dem om, og de vil vite hvor du skal i dag. det er ingenting som kan "
+              "gjøres uten din hjelp, takk for alt og vi ses i morgen på stasjonen. barna er "
+              "på skolen, og jeg er hjemme med kona mi. hva synes du? ikke noe problem.",
+        "fi": "nopea ruskea kettu hyppää laiskan koiran yli. tästä me puhuimme heidän "
+              "kanssaan ja he haluavat tietää, minne olet menossa tänään. mitään ei voi "
+              "tehdä ilman sinun apuasi, kiitos kaikesta ja nähdään huomenna asemalla. "
+              "lapset ovat koulussa ja minä olen kotona vaimoni kanssa.",
+        "cs": "rychlá hnědá liška skáče přes líného psa. o tom jsme s nimi mluvili a "
+              "chtějí vědět, kam dnes jdeš. není nic, co by se dalo udělat bez tvé pomoci, "
+              "děkuji za všechno a uvidíme se zítra na nádraží. děti jsou ve škole a já "
+              "jsem doma se svou ženou. to je opravdu hezký den.",
+        "ro": "vulpea maro rapidă sare peste câinele leneș. despre asta vorbeam cu ei și "
+              "vor să știe unde mergi astăzi. nu există nimic care să poată fi făcut fără "
+              "ajutorul tău, mulțumesc pentru tot și ne vedem mâine la gară. copiii sunt "
+              "la școală și eu sunt acasă cu soția mea.",
+        "hu": "a gyors barna róka átugrik a lusta kutya fölött. erről beszélgettünk "
+              "velük, és tudni szeretnék, hová mész ma. semmit sem lehet megtenni a "
+              "segítséged nélkül, köszönök mindent, és holnap találkozunk az állomáson. "
+              "a gyerekek az iskolában vannak, én pedig otthon vagyok a feleségemmel.",
+        "hr": "brza smeđa lisica skače preko lijenog psa. o tome smo razgovarali s njima "
+              "i žele znati kamo danas ideš. ne postoji ništa što se može učiniti bez tvoje "
+              "pomoći, hvala na svemu i vidimo se sutra na kolodvoru. djeca su u školi, a ja "
+              "sam kod kuće sa svojom ženom. što misliš o tome?",
+        "sk": "rýchla hnedá líška skáče cez lenivého psa. o tom sme sa s nimi rozprávali a "
+              "chcú vedieť, kam dnes ideš. nie je nič, čo by sa dalo urobiť bez tvojej "
+              "pomoci, ďakujem za všetko a uvidíme sa zajtra na stanici. deti sú v škole a "
+              "ja som doma so svojou ženou. to je naozaj pekný deň.",
+        "sl": "hitra rjava lisica skoči čez lenega psa. o tem smo se pogovarjali z njimi "
+              "in želijo vedeti, kam greš danes. ni ničesar, kar bi se dalo narediti brez "
+              "tvoje pomoči, hvala za vse in se vidimo jutri na postaji. otroci so v šoli, "
+              "jaz pa sem doma s svojo ženo. kaj misliš o tem?",
+        "et": "kiire pruun rebane hüppab üle laisa koera. sellest me nendega rääkisime ja "
+              "nad tahavad teada, kuhu sa täna lähed. mitte midagi ei saa teha ilma sinu "
+              "abita, aitäh kõige eest ja näeme homme jaamas. lapsed on koolis ja mina olen "
+              "kodus oma naisega. see on väga ilus päev.",
+        "lv": "ātrā brūnā lapsa lec pāri slinkajam sunim. par to mēs ar viņiem runājām, "
+              "un viņi vēlas zināt, kurp tu šodien ej. nav nekā, ko varētu izdarīt bez tavas "
+              "palīdzības, paldies par visu un tiekamies rīt stacijā. bērni ir skolā, un es "
+              "esmu mājās ar savu sievu. šī ir ļoti skaista diena.",
+        "lt": "greita ruda lapė peršoka per tingų šunį. apie tai mes su jais kalbėjome, ir "
+              "jie nori žinoti, kur tu šiandien eini. nėra nieko, ką būtų galima padaryti "
+              "be tavo pagalbos, ačiū už viską ir iki pasimatymo rytoj stotyje. vaikai yra "
+              "mokykloje, o aš esu namuose su savo žmona.",
+        "vi": "con cáo nâu nhanh nhẹn nhảy qua con chó lười. đây là điều chúng tôi đã nói "
+              "với họ và họ muốn biết hôm nay bạn đi đâu. không có gì có thể làm được nếu "
+              "không có sự giúp đỡ của bạn, cảm ơn vì tất cả và hẹn gặp lại ngày mai ở nhà "
+              "ga. các con đang ở trường và tôi ở nhà với vợ của tôi.",
+        "id": "rubah cokelat yang cepat melompati anjing yang malas. inilah yang kami "
+              "bicarakan dengan mereka dan mereka ingin tahu ke mana kamu pergi hari ini. "
+              "tidak ada yang bisa dilakukan tanpa bantuanmu, terima kasih untuk semuanya "
+              "dan sampai jumpa besok di stasiun. anak-anak sedang di sekolah dan saya "
+              "di rumah bersama istri saya. bagaimana kabarmu? tidak apa-apa.",
+        "ms": "musang coklat yang pantas melompat ke atas anjing yang malas. inilah yang "
+              "kami bincangkan dengan mereka dan mereka mahu tahu ke mana awak pergi hari "
+              "ini. tiada apa yang boleh dilakukan tanpa bantuan awak, terima kasih untuk "
+              "segalanya dan jumpa esok di stesen. kanak-kanak berada di sekolah dan saya "
+              "di rumah bersama isteri saya. apa khabar? tidak mengapa.",
+        "tl": "ang mabilis na kayumangging soro ay tumalon sa ibabaw ng tamad na aso. ito "
+              "ang pinag-usapan namin sa kanila at gusto nilang malaman kung saan ka pupunta "
+              "ngayon. walang magagawa kung wala ang tulong mo, salamat sa lahat at kita "
+              "tayo bukas sa istasyon. ang mga bata ay nasa paaralan at ako ay nasa bahay "
+              "kasama ang aking asawa. kumusta ka na? mabuti naman.",
+    },
+    "cyrillic": {
+        "ru": "быстрая коричневая лиса прыгает через ленивую собаку. именно об этом мы "
+              "говорили с ними, и они хотят знать, куда ты идёшь сегодня. ничего нельзя "
+              "сделать без твоей помощи, спасибо за всё и увидимся завтра на вокзале. дети "
+              "в школе, а я дома с женой. это очень хороший день, мы были рады.",
+        "uk": "швидка коричнева лисиця стрибає через лінивого собаку. саме про це ми "
+              "говорили з ними, і вони хочуть знати, куди ти йдеш сьогодні. нічого не можна "
+              "зробити без твоєї допомоги, дякую за все і побачимося завтра на вокзалі. діти "
+              "в школі, а я вдома з дружиною. це дуже гарний день, ми були раді.",
+        "bg": "бързата кафява лисица прескача мързеливото куче. точно за това говорихме с "
+              "тях и те искат да знаят къде отиваш днес. нищо не може да се направи без "
+              "твоята помощ, благодаря за всичко и ще се видим утре на гарата. децата са в "
+              "училище, а аз съм вкъщи със съпругата си. това е много хубав ден.",
+    },
+    "arabic": {
+        "ar": "الثعلب البني السريع يقفز فوق الكلب الكسول. هذا ما كنا نتحدث عنه معهم وهم "
+              "يريدون أن يعرفوا إلى أين تذهب اليوم. لا يوجد شيء يمكن القيام به بدون "
+              "مساعدتك، شكرا لك على كل شيء ونراك غدا في المحطة. الأطفال في المدرسة وأنا في "
+              "البيت مع زوجتي. هذا يوم جميل جدا.",
+        "fa": "روباه قهوه‌ای سریع از روی سگ تنبل می‌پرد. این همان چیزی است که ما با آن‌ها "
+              "درباره‌اش صحبت می‌کردیم و آن‌ها می‌خواهند بدانند امروز کجا می‌روی. هیچ کاری "
+              "بدون کمک تو انجام نمی‌شود، برای همه چیز ممنونم و فردا در ایستگاه می‌بینمت. "
+              "بچه‌ها در مدرسه هستند و من با همسرم در خانه هستم. این یک روز خیلی خوب است.",
+        "ur": "تیز بھورا لومڑی سست کتے کے اوپر سے چھلانگ لگاتی ہے۔ یہی وہ بات ہے جس کے "
+              "بارے میں ہم ان سے بات کر رہے تھے اور وہ جاننا چاہتے ہیں کہ آج آپ کہاں جا رہے "
+              "ہیں۔ آپ کی مدد کے بغیر کچھ نہیں ہو سکتا، ہر چیز کے لیے شکریہ اور کل اسٹیشن پر "
+              "ملتے ہیں۔ بچے اسکول میں ہیں اور میں اپنی بیوی کے ساتھ گھر پر ہوں۔",
+    },
+    "devanagari": {
+        "hi": "तेज़ भूरी लोमड़ी आलसी कुत्ते के ऊपर से कूदती है। यही वह बात है जिसके बारे में हम "
+              "उनसे बात कर रहे थे और वे जानना चाहते हैं कि आज आप कहाँ जा रहे हैं। आपकी मदद के "
+              "बिना कुछ नहीं हो सकता, सब कुछ के लिए धन्यवाद और कल स्टेशन पर मिलते हैं। बच्चे "
+              "स्कूल में हैं और मैं अपनी पत्नी के साथ घर पर हूँ।",
+        "ne": "छिटो खैरो स्याल अल्छी कुकुरमाथि उफ्रन्छ। यही कुरा हामीले उनीहरूसँग गरिरहेका "
+              "थियौं र उनीहरू तिमी आज कहाँ जाँदैछौ भनेर जान्न चाहन्छन्। तिम्रो सहयोग बिना केही "
+              "गर्न सकिँदैन, सबैका लागि धन्यवाद र भोलि स्टेसनमा भेटौंला। बच्चाहरू विद्यालयमा छन् "
+              "र म मेरी श्रीमतीसँग घरमा छु।",
+    },
+}
+
+# The most frequent words of each language. They dominate real text, so
+# they separate close neighbours (da/no, cs/sk, hr/sl, id/ms) better than
+# a sentence or two of running text does.
+COMMON_WORDS: Dict[str, str] = {
+    "en": "the of and to in is you that it he was for on are as with his they at be this "
+          "have from or one had by but not what all were we when your can said there use "
+          "an each which she do how their if will up about out many then them these so",
+    "es": "de la que el en y a los se del las un por con no una su para es al lo como más "
+          "pero sus le ya o este sí porque esta entre cuando muy sin sobre también me hasta "
+          "hay donde quien desde todo nos durante todos uno les ni contra otros ese eso",
+    "fr": "de la le et les des en un du une que est pour qui dans par plus pas au sur ne se "
+          "ce il sont avec ou mais comme été elle nous vous tout bien fait leur aussi peut "
+          "je ils cette être même deux sans très où ces avait après dont ça moi",
+    "de": "der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als "
+          "auch es an werden aus er hat dass sie nach wird bei einer um am sind noch wie "
+          "einem über einen so zum war haben nur oder aber vor zur bis mehr durch ich",
+    "it": "di e il la che in a per un è del non sono una con si da le i al della lo ma come "
+          "anche gli più ha se questo nel io mi ci alla dei nella cosa ti sei tutto molto "
+          "perché quando essere fatto stato sua suo dove chi già così",
+    "pt": "de a o que e do da em um para é com não uma os no se na por mais as dos como mas "
+          "foi ao ele das tem à seu sua ou ser quando muito há nos já está eu também só "
+          "pelo pela até isso ela entre era depois sem mesmo aos ter seus você",
+    "tr": "bir ve bu da de için ile çok ne o ben sen gibi daha var olarak ama kadar sonra "
+          "en mi değil her şey olan bana onu diye benim yok nasıl iyi şimdi ki evet hayır "
+          "zaman neden bunu onun bizim burada değildir olduğu",
+    "pl": "i w nie na się z że do to jest jak o co ale po tak za od jego już tylko ja mnie "
+          "czy by był jej są ten może mi go tym ich jeszcze bardzo przez tu dla kiedy być "
+          "która który jestem gdzie wszystko teraz może też ty nas",
+    "nl": "de en van ik te dat die in een hij het niet zijn is was op aan met als voor had "
+          "er maar om hem dan zou of wat mijn men dit zo door over ze zich bij ook tot je "
+          "mij uit der daar haar naar heb hoe heeft hebben deze u wil nog zal",
+    "sv": "och i att det som en på är av för med till den har de inte om ett han men var jag "
+          "sig från vi så kan man när år säger hon under också efter eller nu sin där vid "
+          "mot ska skulle kommer ut får finns vara hade alla andra mycket än här",
+    "da": "og i at det er en til på som de med han af for ikke der var jeg den har hun sig "
+          "om et men sin så man hvor også fra blev efter kan vil skal nu når have ved hvad "
+          "være mig dig havde meget hvordan gerne tak jo bare nogle noget ud",
+    "no": "og i det på som er en til å han av for med at var de ikke den har jeg om et men "
+          "så seg hun hadde fra vi du kan da ble ut skal må nå når etter over dette også "
+          "hva meg deg bare noen noe mye hvordan gjerne takk hei ikkje kva",
+    "fi": "ja on ei se että hän oli ovat mutta kun niin kuin myös tai jos sen hänen mitä "
+          "minä sinä me he tämä siitä ole voi vain nyt jo kanssa sitten joka mikä kaikki "
+          "ollut olen olet tässä siinä mukaan koska vielä paljon",
+    "cs": "a se na v je že to s z o do ale jako by jsem jsou pro k tak po jeho jak už jen "
+          "co byl bylo její které když který nebo tom také ještě jsme může aby jste mě "
+          "tady proč není bude asi něco všechno teď",
+    "ro": "și de în a la cu că nu o pe este un din se mai care ce pentru sunt ca am sau "
+          "dar fost acest lui ei el ea fi după toate foarte când unde cum acum aici eu tu "
+          "noi voi lor său sa mult avea era bine",
+    "hu": "a az és hogy nem is egy meg de van volt csak már el ez azt mint ki még ha vagy "
+          "mert nagyon most lesz kell itt ott mi te ő én mit hol hogyan miért minden sem "
+          "amikor aki ami lehet után előtt vele neki",
+    "hr": "i je u da se na za su s od a kao što ne to sam li bi ili iz koji koja koje ali "
+          "biti bio bila samo još ima kako gdje zašto sve ovo ono ja ti mi vi oni jer "
+          "vrlo sada ovdje tamo bih htio hvala molim kuća",
+    "sk": "a v sa na je že to s z o do ako by som sú pre k tak po jeho už len čo bol bolo "
+          "jej ktoré keď ktorý alebo tom aj ešte sme môže aby ste ma tu prečo nie bude asi "
+          "niečo všetko teraz veľmi ďakujem prosím",
+    "sl": "in je v da se na za so s od a kot ki ne to sem bi ali iz tudi pa samo še ima "
+          "kako kje zakaj vse to jaz ti mi vi oni ker zelo zdaj tukaj tam bil bila bilo "
+          "lahko smo ste hvala prosim kaj",
+    "et": "ja on ei et see ta oli kui mis ka aga nii siis oma ma sa me te nad veel kõik "
+          "seda mida kes kus miks kuidas olen oled oleme nüüd juba ainult väga palju "
+          "pärast enne koos tema meie teie",
+    "lv": "un ir ka no uz ar par kā es tu viņš viņa mēs jūs viņi bet vai arī ne tas tā "
+          "kas kur kad kāpēc visi viss būt bija tikai vēl jau ļoti tagad šeit tur pēc "
+          "pirms jā nē paldies lūdzu",
+    "lt": "ir yra kad iš į su apie kaip aš tu jis ji mes jūs jie bet ar taip ne tai kas "
+          "kur kada kodėl visi viskas būti buvo tik dar jau labai dabar čia ten po prieš "
+          "ačiū prašau mano tavo jo jos",
+    "vi": "và của là có không được trong một cho những người này với các đã để khi đến "
+          "thì từ như làm tôi bạn anh chị em chúng ta họ rất nhiều cũng nào gì đây đó "
+          "sẽ đang vì nên nhưng",
+    "id": "yang dan di itu dengan untuk tidak ini dari dalam akan pada juga saya ke karena "
+          "tersebut bisa ada mereka lebih kami sudah kita apa atau hanya oleh kamu anda "
+          "dia belum sangat sekarang bagaimana mengapa tapi banyak",
+    "ms": "yang dan di itu dengan untuk tidak ini dari dalam akan pada juga saya ke kerana "
+          "tersebut boleh ada mereka lebih kami sudah kita apa atau hanya oleh awak anda "
+          "dia belum sangat sekarang bagaimana mengapa tetapi banyak tiada mahu",
+    "tl": "ang ng sa na at mga ay hindi ko ka siya ito kung may para lang din rin niya "
+          "ako ikaw kami tayo sila po opo kasi pero naman nga ba yung dito doon ano "
+          "bakit paano saan kailan lahat",
+    "ru": "и в не на я что он с как а то все она так его но да ты к у же вы за бы по "
+          "только ее мне было вот от меня еще нет о из ему теперь когда даже ну вдруг "
+          "ли если уже или быть был него до вас нибудь опять уж вам",
+    "uk": "і в не на я що він з як а то все вона так його але так ти до у же ви за би по "
+          "тільки її мені було ось від мене ще немає про із йому тепер коли навіть ну "
+          "чи якщо вже або бути був нього є це ці цей",
+    "bg": "и в не на аз че той с как а то всичко тя така го но да ти към у ли вие за би "
+          "по само я ми беше ето от мен още няма за от му сега когато дори ако вече или "
+          "бъде беше него е това тези този съм са сте",
+    "ar": "في من على أن إلى عن مع هذا هذه التي الذي كان لا ما هو هي كل بين بعد قد لم "
+          "أو ثم حتى عند إذا كما لكن أنا نحن أنت هم هل ماذا كيف أين لماذا",
+    "fa": "و در به از که این را با است آن برای یک تا هم می شود بود کرد ها نیز یا "
+          "باید اما خود من تو ما شما آنها چه چرا کجا چطور هست نیست",
+    "ur": "کے میں کی ہے اور سے کو کا نے یہ وہ ہیں پر تھا ایک کہ بھی تو جو کر گیا "
+          "لیے ہو نہیں میں تم ہم آپ کیا کیوں کہاں کیسے تھے ہوں",
+    "hi": "के है में की और से को एक पर यह भी नहीं ने कि तो हैं था हो कर लिए जो "
+          "मैं तुम हम आप क्या क्यों कहाँ कैसे वह वे गया रहा",
+    "ne": "र को मा छ लाई ले पनि यो त्यो गर्न हो भने एक थियो छन् हुन्छ गरेको "
+          "म तिमी हामी तपाईं के किन कहाँ कसरी उनी उनीहरू भयो गर्छ",
+}
+
+_NGRAM_SIZES = (1, 2, 3)
+_WORD = re.compile(r"[^\W\d_]+(?:['’‌-][^\W\d_]+)*")
+
+
+def _ngrams(text: str) -> Iterable[str]:
+    text = unicodedata.normalize("NFC", text.lower())
+    for word in _WORD.findall(text):
+        padded = f" {word} "
+        for n in _NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                gram = padded[i:i + n]
+                if gram.strip():
+                    yield gram
+
+
+# ----- IDENTIFIER -----
+
+class LanguageIdentifier:
+    """Script detection plus per-script character n-gram models."""
+
+    # Below this many letters the n-gram stage is a coin toss
+    MIN_LETTERS = 8
+    # Per-gram margin that maps to ~63% confidence
+    MARGIN_SCALE = 0.03
+
+    def __init__(self, seed_texts: Optional[Dict[str, Dict[str, str]]] = None,
+                 common_words: Optional[Dict[str, str]] = None):
+        self.seed_texts = seed_texts or SEED_TEXTS
+        self.common_words = COMMON_WORDS if common_words is None else common_words
+        self._models = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        models = {}
+        for script, samples in self.seed_texts.items():
+            vocabulary = set()
+            counts = {}
+            for lang, sample in samples.items():
+                counts[lang] = Counter(_ngrams(sample + " " + self.common_words.get(lang, "")))
+                vocabulary.update(counts[lang])
+            size = len(vocabulary) + 1
+            models[script] = {
+                lang: ({g: math.log((c + 1) / (sum(grams.values()) + size)) for g, c in grams.items()},
+                       math.log(1 / (sum(grams.values()) + size)))
+                for lang, grams in counts.items()
+            }
+        return models
+
+    @property
+    def models(self):
+        if self._models is None:
+            with self._lock:
+                if self._models is None:
+                    self._models = self._build()
+        return self._models
+
+    def identify(self, text: str, candidates: Optional[Iterable[str]] = None) -> Tuple[Optional[str], float]:
+        """
+        Returns (language code, confidence in [0, 1]), or (None, 0.0) when
+        the text has no letters in a known script. Restricting `candidates`
+        drops languages the caller cannot use.
+        """
+        allowed = set(candidates) if candidates is not None else None
+        scripts = script_counts(text)
+        if not scripts:
+            return None, 0.0
+        letters = sum(scripts.values())
+
+        # Any kana means Japanese even though Japanese text is mostly Han
+        if scripts.get("kana") and scripts["kana"] + scripts.get("han", 0) >= letters / 2:
+            script = "kana"
+        else:
+            script = scripts.most_common(1)[0][0]
+        share = scripts[script] / letters
+
+        if script in _SCRIPT_LANGUAGE:
+            lang = _SCRIPT_LANGUAGE[script]
+            if allowed is not None and lang not in allowed:
+                return None, 0.0
+            return lang, round(share, 3)
+
+        model = {
+            lang: m for lang, m in self.models.get(script, {}).items()
+            if allowed is None or lang in allowed
+        }
+        if not model:
+            return None, 0.0
+        if len(model) == 1:
+            return next(iter(model)), round(share, 3)
+
+        grams = [g for g in _ngrams(text) if _script(g.strip()[0]) == script]
+        if not grams:
+            return None, 0.0
+        scores = {
+            lang: sum(logp.get(g, unseen) for g in grams)
+            for lang, (logp, unseen) in model.items()
+        }
+
+        # Confidence grows with the per-gram log-likelihood margin over the
+        # runner-up, so ties between close neighbours (da/no, id/ms) come out
+        # near zero however long the text is
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        best = ranked[0]
+        margin = (scores[best] - scores[ranked[1]]) / len(grams)
+        confidence = share * (1 - math.exp(-margin / self.MARGIN_SCALE))
+        if scripts[script] < self.MIN_LETTERS:
+            confidence *= scripts[script] / self.MIN_LETTERS
+        return best, round(confidence, 3)
+
+    def detect(self, text: str, candidates: Optional[Iterable[str]] = None,
+               min_confidence: float = 0.5) -> str:
+        """Best language code, or "unknown" below `min_confidence`."""
+        lang, confidence = self.identify(text, candidates)
+        return lang if lang and confidence >= min_confidence else "unknown"
+
+
+identifier = LanguageIdentifier()
+
+
+# ----- LANGUAGE CODES -----
+
+def base_language(code: Optional[str]) -> Optional[str]:
+    """
+    Reduce a locale to the code the translator uses: "en-US" -> "en",
+    "pt_BR" -> "pt". Chinese keeps its traditional variant ("zh-TW")
+    because it translates differently from "zh".
+    """
+    if not code:
+        return None
+    code = code.strip().replace("_", "-")
+    lower = code.lower()
+    if lower in ("zh-tw", "zh-hk", "zh-hant"):
+        return "zh-TW"
+    return lower.split("-")[0] or None
+
+
+def same_language(a: Optional[str], b: Optional[str]) -> bool:
+    return bool(a and b) and base_language(a) == base_language(b)
@@ -0,0 +1,227 @@
+"""
+Per-stage timing spans and a small Prometheus-format metrics registry.
+
+Spans opened with `span("stage")` are recorded twice: into the current
+request's timer (rendered as a Server-Timing header) and into the
+process-wide stage histogram served by /metrics. The request timer is
+carried in a ContextVar, so blocking work must be dispatched with
+`run_in_context` (or contextvars.copy_context) for its spans to attach.
+"""
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Gauge:
+    """A gauge that is either set directly or computed by a callback at scrape time."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.callback = callback
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, *label_values):
+        self.inc(-amount, *label_values)
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def value(self, *label_values) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception as e:
+                print(f"Metrics callback for {self.name} failed: {e}")
+                values = {}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[label_values] = series
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labels, label_values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            le = _format_labels(self.labels, label_values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            plain = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{plain} {series[-1]}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.register(Histogram(
+    "voicemaker_request_duration_seconds", "HTTP request latency", ("route", "method", "status")
+))
+STAGE_SECONDS = registry.register(Histogram(
+    "voicemaker_stage_duration_seconds", "Latency of individual pipeline stages", ("stage",)
+))
+IN_FLIGHT = registry.register(Gauge(
+    "voicemaker_requests_in_flight", "HTTP requests currently being served"
+))
+
+
+# ---------------------------------------------------------------------
+#  REQUEST TIMERS / SPANS
+# ---------------------------------------------------------------------
+class RequestTimer:
+    """Collects the spans of one request; safe to append from worker threads."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._spans: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self._spans.append((name, seconds))
+
+    def spans(self) -> List[Tuple[str, float]]:
+        with self._lock:
+            return list(self._spans)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; repeated stages are summed."""
+        totals: Dict[str, List[float]] = {}
+        for name, seconds in self.spans():
+            entry = totals.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+        parts = []
+        for name, (seconds, count) in totals.items():
+            desc = f';desc="x{count}"' if count > 1 else ""
+            parts.append(f"{name};dur={seconds * 1000:.1f}{desc}")
+        total = time.perf_counter() - self.started
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_timer: contextvars.ContextVar = contextvars.ContextVar("request_timer", default=None)
+
+
+def start_request_timer() -> RequestTimer:
+    timer = RequestTimer()
+    _current_timer.set(timer)
+    return timer
+
+
+def current_timer() -> Optional[RequestTimer]:
+    return _current_timer.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as pipeline stage `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, name)
+        timer = _current_timer.get()
+        if timer is not None:
+            timer.add(name, elapsed)
+
+
+def run_in_context(executor, fn, *args):
+    """loop.run_in_executor that carries the caller's context (and request timer)."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return loop.run_in_executor(executor, ctx.run, fn, *args)
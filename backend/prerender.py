@@ -0,0 +1,214 @@
+"""
+Batch pre-rendering of a phrase catalog into the shared cache.
+
+Translates and synthesizes every (text, target language, voice)
+combination with bounded concurrency and stores the results in the same
+SharedStore the server reads, so those phrases are served warm from the
+first request. Work already present in the store is skipped, which makes
+runs idempotent and lets an interrupted run resume where it stopped.
+
+Catalog formats (one phrase per row):
+    JSONL: {"text": "...", "languages": ["es", "fr"], "voices": [null], "source": "en"}
+    CSV:   text,languages,voices,source   (list columns separated by ';' or ',')
+Rows without languages/voices use --languages/--voices. A row's "source"
+is part of the translation cache key; requests that send no source still
+find it when offline detection agrees (see Translator.lookup_keys).
+
+Usage (from backend/):
+    python prerender.py catalog.jsonl --languages es,fr,de --concurrency 8 \\
+        --failures failed.jsonl
+    python prerender.py catalog.jsonl --invalidate translation,audio   # re-render from scratch
+"""
+import compat  # noqa: F401  (must precede speech/audio imports)
+from dotenv import load_dotenv
+load_dotenv()
+
+import csv
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from shared_store import SharedStore
+from translate import Translator
+from tts import TextToSpeech
+
+
+# --invalidate names -> shared store namespaces
+CACHES = {"translation": Translator.NAMESPACES, "audio": TextToSpeech.NAMESPACES}
+
+
+def _split_list(value) -> List:
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return value
+    sep = ";" if ";" in value else ","
+    return [v.strip() for v in str(value).split(sep) if v.strip()]
+
+
+def read_catalog(path: str) -> Iterator[Dict]:
+    """Yield catalog rows as dicts with text/languages/voices/source keys."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield row
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping line {line_no}: {e}")
+
+
+def expand(rows, default_languages: List[str], default_voices: List) -> List[Dict]:
+    """Cross every row with its languages and voices, dropping duplicates."""
+    items = []
+    seen = set()
+    for row in rows:
+        text = (row.get("text") or "").strip()
+        if not text:
+            continue
+        languages = _split_list(row.get("languages")) or default_languages
+        voices = _split_list(row.get("voices")) or default_voices
+        source = row.get("source") or None
+        for lang in languages:
+            for voice in voices:
+                voice = voice or None
+                item = (text, lang, voice, source)
+                if item not in seen:
+                    seen.add(item)
+                    items.append({"text": text, "language": lang, "voice": voice, "source": source})
+    return items
+
+
+class Prerenderer:
+    def __init__(self, store: SharedStore, translator: Translator, tts: TextToSpeech):
+        self.store = store
+        self.translator = translator
+        self.tts = tts
+        self.counts = {"rendered": 0, "skipped": 0, "failed": 0}
+        self.failures: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def _cached_translation(self, item) -> Optional[str]:
+        return self.translator.cached(item["text"], item["language"], item["source"])
+
+    def _has_audio(self, text: str, item) -> bool:
+        key = self.tts.cache_key(text, item["language"], item["voice"])
+        return self.store.get(TextToSpeech.CACHE_NAMESPACE, key) is not None
+
+    def render(self, item) -> str:
+        """Returns 'rendered', 'skipped' or 'failed'."""
+        try:
+            if not self.translator.needs_translation(item["text"], item["language"], item["source"]):
+                translated = item["text"]
+            else:
+                translated = self._cached_translation(item)
+            if translated is not None and self._has_audio(translated, item):
+                return "skipped"
+
+            if translated is None:
+                translated = self.translator.translate(
+                    item["text"], target_lang=item["language"], source_lang=item["source"]
+                )
+                # Translator falls back to the input text on errors without caching it
+                if self._cached_translation(item) is None:
+                    raise Exception("translation failed")
+
+            self.tts.synthesize(translated, item["language"], item["voice"])
+            if not self._has_audio(translated, item):
+                raise Exception("synthesis produced no audio")
+            return "rendered"
+        except Exception as e:
+            with self._lock:
+                self.failures.append({**item, "error": str(e)})
+            return "failed"
+
+    def _record(self, outcome: str):
+        with self._lock:
+            self.counts[outcome] += 1
+            return sum(self.counts.values())
+
+    def run(self, items: List[Dict], concurrency: int, progress_every: int = 50) -> float:
+        started = time.perf_counter()
+
+        def work(item):
+            done = self._record(self.render(item))
+            if done % progress_every == 0 or done == len(items):
+                rate = done / (time.perf_counter() - started)
+                print(f"  {done}/{len(items)}  {rate:.1f} items/s  {self.counts}")
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            list(pool.map(work, items))
+        return time.perf_counter() - started
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-render a phrase catalog into the shared cache")
+    parser.add_argument("catalog", help="JSONL or CSV phrase catalog")
+    parser.add_argument("--languages", default="", help="Default target languages, comma separated")
+    parser.add_argument("--voices", default="", help="Default voice IDs, comma separated (empty = default voice)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--store", help="Shared store path (defaults to SHARED_STORE_PATH)")
+    parser.add_argument("--failures", help="Write failed items here as JSONL (re-runnable catalog)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the work items")
+    parser.add_argument("--invalidate", default="",
+                        help="Flush these caches (translation,audio) for every worker before rendering")
+    args = parser.parse_args(argv)
+
+    items = expand(
+        read_catalog(args.catalog),
+        _split_list(args.languages),
+        _split_list(args.voices) or [None],
+    )
+    if not items:
+        print("Nothing to render: catalog is empty or rows have no target languages")
+        return 1
+    print(f"{len(items)} work items from {args.catalog}")
+    if args.dry_run:
+        return 0
+
+    invalidate = _split_list(args.invalidate)
+    unknown = [name for name in invalidate if name not in CACHES]
+    if unknown:
+        print(f"Unknown cache {unknown[0]!r}; expected one of {', '.join(CACHES)}")
+        return 2
+
+    store = SharedStore(args.store)
+    for name in invalidate:
+        for namespace in CACHES[name]:
+            print(f"Invalidated {namespace} (generation {store.invalidate(namespace)})")
+    renderer = Prerenderer(store, Translator(store=store), TextToSpeech(store=store))
+    elapsed = renderer.run(items, args.concurrency)
+
+    counts = renderer.counts
+    rate = counts["rendered"] / elapsed if elapsed else 0.0
+    print(f"\nRendered {counts['rendered']}, skipped {counts['skipped']} (already cached), "
+          f"failed {counts['failed']} in {elapsed:.1f}s ({rate:.2f} renders/s)")
+
+    if renderer.failures:
+        for failure in renderer.failures[:10]:
+            print(f"  FAILED [{failure['language']}] {failure['text'][:60]!r}: {failure['error']}")
+        if args.failures:
+            with open(args.failures, "w", encoding="utf-8") as f:
+                for failure in renderer.failures:
+                    row = {
+                        "text": failure["text"], "languages": [failure["language"]],
+                        "voices": [failure["voice"]], "source": failure["source"],
+                    }
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            print(f"Wrote {len(renderer.failures)} failed items to {args.failures}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+On-demand profiling for a live worker.
+
+- SamplingProfiler: a background thread that samples every thread's stack
+  via sys._current_frames() and aggregates them as collapsed stacks
+  ("frame;frame;frame count"), the input format of flamegraph.pl,
+  speedscope and inferno.
+- memory_snapshot: top allocators from tracemalloc, both as a table and
+  as byte-weighted collapsed stacks.
+
+Nothing here runs unless an admin endpoint or the per-request profiling
+header asks for it, so idle overhead is zero.
+"""
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, Optional
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical CPU profiler; costs one stack walk per thread per interval."""
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Frames that mean "waiting", not "working"; dropped unless include_idle
+    IDLE_FUNCTIONS = {"wait", "select", "poll", "_worker", "epoll", "sleep", "accept"}
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            if not self.include_idle and frame.f_code.co_name in self.IDLE_FUNCTIONS:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def memory_snapshot(top: int = 25, trace_seconds: float = 0.0, frames: int = 25) -> Dict:
+    """
+    Top allocators by size. If tracemalloc is not already running it is
+    started for trace_seconds (blocking) and stopped again afterwards, so
+    only allocations made in that window are reported.
+    """
+    started_here = False
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        started_here = True
+        time.sleep(trace_seconds)
+
+    try:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    by_line = snapshot.statistics("lineno")[:top]
+    table = [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in by_line
+    ]
+
+    folded = []
+    for stat in snapshot.statistics("traceback")[:top * 4]:
+        stack = ";".join(
+            f"{os.path.basename(f.filename)}:{f.lineno}" for f in stat.traceback
+        )
+        folded.append(f"{stack} {stat.size}")
+
+    return {
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": table,
+        "collapsed": "\n".join(folded) + "\n",
+    }
+
+
+def write_profile(directory: str, name: str, content: str) -> str:
+    """Save a collapsed-stack profile and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{safe}.folded")
+    with open(path, "w") as f:
+        f.write(content)
+    return path
@@ -0,0 +1,268 @@
+"""
+Priority and fair-queuing scheduler for provider calls.
+
+Every blocking provider call (STT, translate, Gemini, TTS) asks the
+scheduler for a slot before it is handed to the executor:
+
+  * Priority classes: queued interactive work is always granted before
+    batch work.
+  * Fairness within a class: start-time fair queuing per client. Each
+    client's calls get virtual start tags spaced 1/weight apart, so a
+    client with 50 queued calls is interleaved with everyone else
+    instead of served first-come-first-served.
+  * Provider rate limits: a token bucket per provider. A provider that
+    is out of tokens does not hold up work for the others.
+  * At most `concurrency` calls run at once, so queueing happens here,
+    in order, instead of in the executor's FIFO.
+
+A call that fans out into several upstream requests from its own threads
+(long-audio STT) holds one slot and calls wait_for_token() before each
+extra request, so the provider's rate limit still counts every request.
+
+The client and priority of the current request live in a ContextVar set
+by the HTTP middleware. Limits are per worker process: with
+WEB_CONCURRENCY > 1, divide upstream quotas by the worker count.
+"""
+import time
+import heapq
+import threading
+import asyncio
+import itertools
+import contextvars
+from typing import Dict, Optional, Tuple
+
+import metrics
+from metrics import run_in_context
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+QUEUE_WAIT_SECONDS = metrics.registry.register(metrics.Histogram(
+    "voicemaker_queue_wait_seconds", "Time provider calls waited for a scheduler slot",
+    ("provider", "priority"),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+))
+
+_current_client: contextvars.ContextVar = contextvars.ContextVar(
+    "scheduler_client", default=("anonymous", INTERACTIVE)
+)
+
+
+def set_client(client: str, priority: Optional[str] = None):
+    """Tag work started from this context; unknown priorities count as interactive."""
+    priority = priority if priority in PRIORITIES else INTERACTIVE
+    return _current_client.set((client, priority))
+
+
+def current_client() -> Tuple[str, str]:
+    return _current_client.get()
+
+
+def parse_limits(spec: Optional[str]) -> Dict[str, float]:
+    """"translate=20,gemini=1" -> {"translate": 20.0, "gemini": 1.0}."""
+    limits = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        try:
+            limits[name.strip()] = float(value)
+        except ValueError:
+            print(f"Scheduler: ignoring invalid limit {item!r}")
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 when one is available now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Waiter:
+    __slots__ = ("order", "future", "provider", "priority", "enqueued")
+
+    def __init__(self, order, future, provider, priority):
+        self.order = order  # (priority rank, start tag, sequence)
+        self.future = future
+        self.provider = provider
+        self.priority = priority
+        self.enqueued = time.perf_counter()
+
+    def __lt__(self, other):
+        return self.order < other.order
+
+
+class Scheduler:
+    def __init__(self, executor, concurrency: int, rate_limits: Optional[Dict[str, float]] = None,
+                 weights: Optional[Dict[str, float]] = None):
+        self.executor = executor
+        self.concurrency = max(1, concurrency)
+        self.buckets = {name: TokenBucket(rate) for name, rate in (rate_limits or {}).items() if rate > 0}
+        # Start tags are spaced 1/weight apart, so a weight of 0 cannot be
+        # used and a negative one would jump the queue; like non-positive
+        # rates, those entries are ignored
+        self.weights = {client: weight for client, weight in (weights or {}).items() if weight > 0}
+        for client in (weights or {}).keys() - self.weights.keys():
+            print(f"Scheduler: ignoring non-positive weight for client {client!r}")
+        self.active = 0
+        # Granted calls handed to the executor that no thread has picked up yet
+        self.executor_queued = 0
+        self._queued_lock = threading.Lock()
+        self._queues: Dict[str, list] = {}
+        self._virtual: Dict[str, float] = {p: 0.0 for p in PRIORITIES}
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def run(self, provider: str, fn, *args):
+        """Wait for a slot for `provider`, then run fn(*args) on the executor."""
+        await self.acquire(provider)
+        with self._queued_lock:
+            self.executor_queued += 1
+        dequeued = False
+
+        def leave_queue():
+            # Once: when a thread picks the call up, or when it is given up
+            nonlocal dequeued
+            with self._queued_lock:
+                if not dequeued:
+                    dequeued = True
+                    self.executor_queued -= 1
+
+        def call():
+            leave_queue()
+            return fn(*args)
+
+        try:
+            return await run_in_context(self.executor, call)
+        finally:
+            leave_queue()
+            self.release()
+
+    async def run_async(self, provider: str, coro_fn, *args):
+        """Wait for a slot for `provider`, then await coro_fn(*args) on this loop."""
+        await self.acquire(provider)
+        try:
+            return await coro_fn(*args)
+        finally:
+            self.release()
+
+    async def acquire(self, provider: str):
+        self._loop = asyncio.get_running_loop()
+        client, priority = current_client()
+        weight = self.weights.get(client, 1.0)
+        virtual = self._virtual[priority]
+        start = max(virtual, self._last_finish.get((priority, client), virtual))
+        finish = start + 1.0 / weight
+        self._last_finish[(priority, client)] = finish
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter((PRIORITIES[priority], start, next(self._sequence)), future, provider, priority)
+        heapq.heappush(self._queues.setdefault(provider, []), waiter)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted, but the caller went away before using the slot
+                self.release()
+            raise
+
+        waited = time.perf_counter() - waiter.enqueued
+        QUEUE_WAIT_SECONDS.observe(waited, provider, priority)
+        timer = metrics.current_timer()
+        if timer is not None:
+            timer.add(f"queue.{provider}", waited)
+
+    def release(self):
+        self.active -= 1
+        self._dispatch()
+
+    async def take_token(self, provider: str):
+        """Wait for a rate-limit token only; the caller already holds a slot."""
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return
+        while True:
+            delay = bucket.delay(time.monotonic())
+            if delay <= 0:
+                bucket.take()
+                return
+            await asyncio.sleep(delay)
+
+    def wait_for_token(self, provider: str):
+        """Blocking take_token() for executor threads working on a granted call."""
+        if self._loop is None or provider not in self.buckets:
+            return
+        asyncio.run_coroutine_threadsafe(self.take_token(provider), self._loop).result()
+
+    def queued(self) -> Dict[str, int]:
+        return {
+            provider: sum(1 for w in heap if not w.future.done())
+            for provider, heap in self._queues.items()
+        }
+
+    def _dispatch(self):
+        now = time.monotonic()
+        wake_in = None
+        while self.active < self.concurrency:
+            best = None
+            for provider, heap in self._queues.items():
+                while heap and heap[0].future.done():
+                    heapq.heappop(heap)  # cancelled while queued
+                if not heap:
+                    continue
+                bucket = self.buckets.get(provider)
+                delay = bucket.delay(now) if bucket else 0.0
+                if delay > 0:
+                    wake_in = delay if wake_in is None else min(wake_in, delay)
+                    continue
+                if best is None or heap[0] < best[0]:
+                    best = heap
+            if best is None:
+                break
+            self._grant(heapq.heappop(best))
+
+        if wake_in is not None:
+            loop = asyncio.get_running_loop()
+            if self._wakeup is not None:
+                if self._wakeup.when() <= loop.time() + wake_in:
+                    return
+                self._wakeup.cancel()
+
+            def wake():
+                self._wakeup = None
+                self._dispatch()
+            self._wakeup = loop.call_later(wake_in, wake)
+
+    def _grant(self, waiter: _Waiter):
+        bucket = self.buckets.get(waiter.provider)
+        if bucket:
+            bucket.take()
+        self.active += 1
+        start = waiter.order[1]
+        self._virtual[waiter.priority] = max(self._virtual[waiter.priority], start)
+
+        # Clients whose last finish tag is behind virtual time restart from it anyway
+        if len(self._last_finish) > 1024:
+            self._last_finish = {
+                k: f for k, f in self._last_finish.items() if f > self._virtual[k[0]]
+            }
+        waiter.future.set_result(None)
@@ -0,0 +1,269 @@
+"""
+Cross-process shared store backed by SQLite in WAL mode.
+Lets several uvicorn workers on one host share the translation cache,
+audio cache and cloned-voice registry without an external service.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Optional
+
+
+class SharedStore:
+    """
+    Namespaced key/value store. Every worker opens its own connection to
+    the same database file; WAL lets readers proceed while one writer
+    commits, so a value written by one worker is visible to all others on
+    their next read.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 50_000):
+        self.path = path or os.getenv("SHARED_STORE_PATH", "cache/shared_store.db")
+        self.max_entries = max_entries
+        # Optional per-namespace cap on total value bytes, see limit_bytes()
+        self.max_bytes: Dict[str, int] = {}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS kv (
+                namespace  TEXT NOT NULL,
+                key        TEXT NOT NULL,
+                value      BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE INDEX IF NOT EXISTS kv_created ON kv (namespace, created_at);
+            CREATE TABLE IF NOT EXISTS generations (
+                namespace TEXT PRIMARY KEY,
+                gen       INTEGER NOT NULL
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Stable hash key for a tuple of request parameters."""
+        raw = "\x1f".join("" if p is None else str(p) for p in parts)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, counter: Dict[str, int], namespace: str):
+        with self._lock:
+            counter[namespace] = counter.get(namespace, 0) + 1
+
+    # -----------------------------------------------------------------
+    #  BASIC OPERATIONS
+    # -----------------------------------------------------------------
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            self._count(self.misses, namespace)
+            return None
+        self._count(self.hits, namespace)
+        return bytes(row[0])
+
+    def get_any(self, namespace: str, keys: Iterable[str]) -> Optional[bytes]:
+        """First value found under any of `keys`; counted as one hit or miss."""
+        now = time.time()
+        conn = self._conn()
+        for key in keys:
+            row = conn.execute(
+                "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is not None and (row[1] is None or row[1] >= now):
+                self._count(self.hits, namespace)
+                return bytes(row[0])
+        self._count(self.misses, namespace)
+        return None
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None,
+            generation: Optional[int] = None):
+        """
+        Store a value. With `generation` (read via generation() before the
+        value was computed), the write is skipped if the namespace has been
+        invalidated since, so work started before a flush cannot refill it.
+        """
+        now = time.time()
+        row = (namespace, key, sqlite3.Binary(value), now, now + ttl if ttl else None)
+        if generation is None:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                row
+            )
+        else:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, created_at, expires_at) "
+                "SELECT ?, ?, ?, ?, ? "
+                "WHERE COALESCE((SELECT gen FROM generations WHERE namespace = ?), 0) = ?",
+                row + (namespace, generation)
+            )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 256 == 0
+        if prune:
+            self.prune()
+
+    def delete(self, namespace: str, key: str):
+        self._conn().execute(
+            "DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+
+    def keys(self, namespace: str):
+        rows = self._conn().execute(
+            "SELECT key FROM kv WHERE namespace = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (namespace, time.time())
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def get_json(self, namespace: str, key: str):
+        raw = self.get(namespace, key)
+        return json.loads(raw) if raw is not None else None
+
+    def set_json(self, namespace: str, key: str, value, ttl: Optional[float] = None):
+        self.set(namespace, key, json.dumps(value).encode("utf-8"), ttl)
+
+    # -----------------------------------------------------------------
+    #  INVALIDATION / EVICTION
+    # -----------------------------------------------------------------
+    def generation(self, namespace: str) -> int:
+        row = self._conn().execute(
+            "SELECT gen FROM generations WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def invalidate(self, namespace: str) -> int:
+        """
+        Drop every entry in a namespace and bump its generation in one
+        transaction, so all workers observe the flush atomically.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+            conn.execute(
+                "INSERT INTO generations (namespace, gen) VALUES (?, 1) "
+                "ON CONFLICT(namespace) DO UPDATE SET gen = gen + 1",
+                (namespace,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.generation(namespace)
+
+    def limit_bytes(self, namespace: str, max_bytes: Optional[int]):
+        """Cap a namespace's total value size; prune() evicts oldest first past it."""
+        if max_bytes and max_bytes > 0:
+            self.max_bytes[namespace] = max_bytes
+        else:
+            self.max_bytes.pop(namespace, None)
+
+    def size(self, namespace: str) -> int:
+        row = self._conn().execute(
+            "SELECT COALESCE(SUM(length(value)), 0) FROM kv WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0]
+
+    def prune(self, namespace: Optional[str] = None):
+        """
+        Remove expired rows and keep at most max_entries, and at most the
+        namespace's byte limit, newest first. Without a namespace every
+        namespace is pruned, so rarely written ones are still reclaimed.
+        """
+        conn = self._conn()
+        if namespace is None:
+            namespaces = [r[0] for r in conn.execute("SELECT DISTINCT namespace FROM kv").fetchall()]
+            for name in namespaces:
+                self.prune(name)
+            return
+        conn.execute(
+            "DELETE FROM kv WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at < ?",
+            (namespace, time.time())
+        )
+        conn.execute(
+            "DELETE FROM kv WHERE namespace = ? AND key IN ("
+            "  SELECT key FROM kv WHERE namespace = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?"
+            ")",
+            (namespace, namespace, self.max_entries)
+        )
+        max_bytes = self.max_bytes.get(namespace)
+        if max_bytes:
+            conn.execute(
+                "DELETE FROM kv WHERE namespace = ? AND key IN ("
+                "  SELECT key FROM ("
+                "    SELECT key, SUM(length(value)) OVER (ORDER BY created_at DESC) AS total"
+                "    FROM kv WHERE namespace = ?"
+                "  ) WHERE total > ?"
+                ")",
+                (namespace, namespace, max_bytes)
+            )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            namespaces = set(self.hits) | set(self.misses)
+            return {
+                ns: {"hits": self.hits.get(ns, 0), "misses": self.misses.get(ns, 0)}
+                for ns in namespaces
+            }
+
+
+class SharedDict(MutableMapping):
+    """
+    Dict view over one SharedStore namespace with JSON values, so existing
+    code that mutates a plain dict (e.g. VoiceCloning.cloned_voices) stays
+    consistent across workers.
+    """
+
+    def __init__(self, store: SharedStore, namespace: str):
+        self.store = store
+        self.namespace = namespace
+
+    def __getitem__(self, key):
+        value = self.store.get_json(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.store.set_json(self.namespace, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.store.delete(self.namespace, key)
+
+    def __contains__(self, key):
+        return self.store.get(self.namespace, key) is not None
+
+    def __iter__(self):
+        return iter(self.store.keys(self.namespace))
+
+    def __len__(self):
+        return len(self.store.keys(self.namespace))
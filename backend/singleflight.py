@@ -0,0 +1,106 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one in-flight
+computation instead of each hitting the provider. Works from plain
+threads (executor path, `do`) and from coroutines (`do_async`), and the
+two paths join each other's calls: a coroutine can await a computation a
+worker thread started, and vice versa.
+
+Errors raised by the computation are re-raised in every waiter. A
+coroutine waiter that is cancelled only stops waiting; the shared
+computation is cancelled once every coroutine waiting on it has been
+cancelled and no thread is waiting.
+"""
+import asyncio
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("future", "waiters", "task", "loop")
+
+    def __init__(self):
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.waiters = 0
+        self.task = None
+        self.loop = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0  # calls answered by someone else's computation
+
+    def _join(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+            call.waiters += 1
+            return call, leader
+
+    def _forget(self, key, call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs):
+        """Run fn(*args, **kwargs) unless an identical call is in flight; blocks."""
+        call, leader = self._join(key)
+        if not leader:
+            return call.future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.future.set_exception(e)
+            self._forget(key, call)
+            raise
+        call.future.set_result(result)
+        self._forget(key, call)
+        return result
+
+    async def do_async(self, key: Hashable, coro_fn: Callable[..., Any], *args, **kwargs):
+        """Await coro_fn(*args, **kwargs) unless an identical call is in flight."""
+        call, leader = self._join(key)
+        if leader:
+            call.loop = asyncio.get_running_loop()
+            call.task = call.loop.create_task(self._lead(key, call, coro_fn, args, kwargs))
+
+        try:
+            return await asyncio.shield(asyncio.wrap_future(call.future))
+        except asyncio.CancelledError:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0 and call.task is not None
+                # Forget it now: a caller arriving before the task sees its
+                # cancellation must start afresh, not join a dying call
+                if abandoned and self._calls.get(key) is call:
+                    del self._calls[key]
+            if abandoned and not call.task.done():
+                call.loop.call_soon_threadsafe(call.task.cancel)
+            raise
+
+    async def _lead(self, key, call, coro_fn, args, kwargs):
+        try:
+            result = await coro_fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            call.future.cancel()
+            raise
+        except BaseException as e:
+            call.future.set_exception(e)
+        else:
+            call.future.set_result(result)
+        finally:
+            self._forget(key, call)
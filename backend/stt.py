@@ -1,12 +1,35 @@
 import speech_recognition as sr
-import io
 from pydub import AudioSegment
+from pydub.silence import detect_silence
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import tempfile
 import os
 import shutil
 
+from metrics import span
+
+class AudioTooLong(Exception):
+    pass
+
+
 class SpeechToText:
-    def __init__(self):
+    # Long-audio mode: recordings longer than this are split at silences
+    # and recognized chunk by chunk (Google rejects requests past ~60s).
+    LONG_AUDIO_THRESHOLD_MS = 50_000
+    MAX_CHUNK_MS = 45_000
+    MIN_CHUNK_MS = 5_000
+    CHUNK_OVERLAP_MS = 300
+    MIN_SILENCE_MS = 400
+    LONG_AUDIO_WORKERS = 4
+    # Recordings past this are refused; decoding stops just after it
+    MAX_AUDIO_SECONDS = 600
+
+    def __init__(self, max_audio_seconds=None, before_request=None):
+        self.max_audio_seconds = self.MAX_AUDIO_SECONDS if max_audio_seconds is None else max_audio_seconds
+        # Called (blocking) before each extra Google request in long-audio
+        # mode, so a rate limiter sees every chunk and not just the call
+        self.before_request = before_request
         self.recognizer = sr.Recognizer()
         self.recognizer.energy_threshold = 200
         self.recognizer.dynamic_energy_threshold = True
@@ -28,67 +51,100 @@ class SpeechToText:
             "ko": "ko-KR"
         }
 
-    def transcribe(self, audio_file: io.BytesIO, filename_hint=None, language="en"):
-        audio_file.seek(0)
-        audio_bytes = audio_file.read()
+    def _resolve_language(self, language):
+        if language:
+            lang_key = language.split('-')[0] if '-' in language else language
+            return self.lang_map.get(lang_key, self.lang_map.get(language, "en-US"))
+        return "en-US"
 
-        if not audio_bytes:
-            raise Exception("Empty audio received")
+    def _load_audio(self, temp_in_path, filename_hint=None):
+        """Decode the upload to 16 kHz mono and apply loudness correction."""
+        # Decode one second past the limit so ffmpeg never produces more
+        limit = {"duration": self.max_audio_seconds + 1} if self.max_audio_seconds else {}
+        fmt = None
+        if filename_hint:
+            ext = filename_hint.split(".")[-1].lower()
+            if ext in ["webm", "wav", "mp3", "ogg", "opus", "m4a"]:
+                fmt = ext
+
+        try:
+            if fmt:
+                audio = AudioSegment.from_file(temp_in_path, format=fmt, **limit)
+            else:
+                audio = AudioSegment.from_file(temp_in_path, **limit)
+        except Exception as e:
+            try:
+                audio = AudioSegment.from_file(temp_in_path, format="webm", **limit)
+            except:
+                raise Exception(f"Could not load audio file: {str(e)}")
 
-        if not shutil.which("ffmpeg"):
+        if self.max_audio_seconds and len(audio) > self.max_audio_seconds * 1000:
+            raise AudioTooLong(f"Audio longer than {self.max_audio_seconds:g} seconds")
+
+        audio = audio.set_channels(1).set_frame_rate(16000)
+
+        normalized_audio = audio.normalize()
+
+        if normalized_audio.dBFS < -30:
+            gain_needed = -20 - normalized_audio.dBFS
+            gain_needed = min(gain_needed, 10)
+            normalized_audio = normalized_audio + gain_needed
+
+        return normalized_audio
+
+    def transcribe(self, audio_file, filename_hint=None, language="en", long_audio=None):
+        """
+        Transcribe an uploaded recording, given as a path or a binary file
+        object (e.g. a spooled upload, copied to disk in chunks).
+        long_audio=None picks the chunked path automatically for recordings
+        longer than LONG_AUDIO_THRESHOLD_MS; True/False forces either path.
+        Raises AudioTooLong past max_audio_seconds (0 disables the limit).
+        """
+        # pydub decodes WAV natively; every other container needs ffmpeg
+        is_wav = bool(filename_hint) and filename_hint.lower().endswith(".wav")
+        if not is_wav and not shutil.which("ffmpeg"):
             raise Exception("FFmpeg is not installed in the system")
 
-        temp_in = tempfile.NamedTemporaryFile(delete=False, suffix=".webm")
-        temp_in.write(audio_bytes)
-        temp_in.close()
-        temp_in_path = temp_in.name
+        if isinstance(audio_file, (str, os.PathLike)):
+            temp_in_path = os.fspath(audio_file)
+            owns_input = False
+        else:
+            audio_file.seek(0)
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as temp_in:
+                shutil.copyfileobj(audio_file, temp_in)
+            temp_in_path = temp_in.name
+            owns_input = True
+
+        if os.path.getsize(temp_in_path) == 0:
+            if owns_input:
+                os.remove(temp_in_path)
+            raise Exception("Empty audio received")
 
         temp_out = temp_in_path + ".wav"
 
         try:
-            fmt = None
-            if filename_hint:
-                ext = filename_hint.split(".")[-1].lower()
-                if ext in ["webm", "wav", "mp3", "ogg", "opus", "m4a"]:
-                    fmt = ext
+            with span("stt.decode"):
+                normalized_audio = self._load_audio(temp_in_path, filename_hint)
+            lang_code = self._resolve_language(language)
 
-            try:
-                if fmt:
-                    audio = AudioSegment.from_file(temp_in_path, format=fmt)
-                else:
-                    audio = AudioSegment.from_file(temp_in_path)
-            except Exception as e:
-                try:
-                    audio = AudioSegment.from_file(temp_in_path, format="webm")
-                except:
-                    raise Exception(f"Could not load audio file: {str(e)}")
-
-            audio = audio.set_channels(1).set_frame_rate(16000)
-            
-            normalized_audio = audio.normalize()
-            
-            if normalized_audio.dBFS < -30:
-                gain_needed = -20 - normalized_audio.dBFS
-                gain_needed = min(gain_needed, 10)
-                normalized_audio = normalized_audio + gain_needed
-            
-            normalized_audio.export(temp_out, format="wav")
-
-            if not os.path.exists(temp_out) or os.path.getsize(temp_out) == 0:
-                raise Exception("WAV conversion failed - empty output file")
-
-            with sr.AudioFile(temp_out) as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.2)
-                data = self.recognizer.record(source)
-
-            if language:
-                lang_key = language.split('-')[0] if '-' in language else language
-                lang_code = self.lang_map.get(lang_key, self.lang_map.get(language, "en-US"))
-            else:
-                lang_code = "en-US"
+            if long_audio is None:
+                long_audio = len(normalized_audio) > self.LONG_AUDIO_THRESHOLD_MS
+            if long_audio:
+                return self._transcribe_chunked(normalized_audio, lang_code)
+
+            with span("stt.export"):
+                normalized_audio.export(temp_out, format="wav")
+
+                if not os.path.exists(temp_out) or os.path.getsize(temp_out) == 0:
+                    raise Exception("WAV conversion failed - empty output file")
+
+                with sr.AudioFile(temp_out) as source:
+                    self.recognizer.adjust_for_ambient_noise(source, duration=0.2)
+                    data = self.recognizer.record(source)
 
             try:
-                text = self.recognizer.recognize_google(data, language=lang_code)
+                with span("stt.recognize"):
+                    text = self.recognizer.recognize_google(data, language=lang_code)
                 if not text or text.strip() == "":
                     return {"text": "", "language": lang_code, "confidence": 0.0, "error": "No speech detected"}
                 return {"text": text.strip(), "language": lang_code, "confidence": 0.9}
@@ -97,6 +153,9 @@ class SpeechToText:
             except sr.RequestError as e:
                 raise Exception(f"Speech recognition service error: {str(e)}")
 
+        except AudioTooLong:
+            raise
+
         except Exception as e:
             error_msg = str(e)
             print(f"STT Error: {error_msg}")
@@ -104,12 +163,142 @@ class SpeechToText:
 
         finally:
             try:
-                if os.path.exists(temp_in_path):
+                if owns_input and os.path.exists(temp_in_path):
                     os.remove(temp_in_path)
-            except: 
+            except:
                 pass
             try:
                 if os.path.exists(temp_out):
                     os.remove(temp_out)
-            except: 
+            except:
                 pass
+
+    # -----------------------------------------------------------------
+    #  LONG AUDIO  (silence-based chunking + parallel recognition)
+    # -----------------------------------------------------------------
+    def split_on_silence(self, audio: AudioSegment, max_chunk_ms=None, overlap_ms=None):
+        """
+        Return (start_ms, end_ms) chunk bounds, cut at the middle of the
+        last silence before max_chunk_ms. Stretches without a usable
+        silence are cut hard at max_chunk_ms. Each chunk is widened by
+        overlap_ms on both sides so words at a boundary are not clipped.
+        """
+        return [(s, e) for s, e, _ in self._chunk_bounds(audio, max_chunk_ms, overlap_ms)]
+
+    def _chunk_bounds(self, audio: AudioSegment, max_chunk_ms=None, overlap_ms=None):
+        """split_on_silence bounds as (start_ms, end_ms, starts_at_hard_cut)."""
+        max_chunk_ms = max_chunk_ms or self.MAX_CHUNK_MS
+        overlap_ms = self.CHUNK_OVERLAP_MS if overlap_ms is None else overlap_ms
+        total = len(audio)
+
+        silence_thresh = (audio.dBFS if audio.dBFS != float('-inf') else -50) - 16
+        silences = detect_silence(
+            audio,
+            min_silence_len=self.MIN_SILENCE_MS,
+            silence_thresh=silence_thresh,
+            seek_step=10
+        )
+        cut_points = [(s + e) // 2 for s, e in silences]
+
+        bounds = []
+        start = 0
+        hard = False
+        while total - start > max_chunk_ms:
+            limit = start + max_chunk_ms
+            candidates = [c for c in cut_points if start + self.MIN_CHUNK_MS <= c <= limit]
+            end = candidates[-1] if candidates else limit
+            bounds.append((start, end, hard))
+            start = end
+            hard = not candidates
+        bounds.append((start, total, hard))
+
+        return [
+            (max(0, s - overlap_ms), min(total, e + overlap_ms), hard)
+            for s, e, hard in bounds
+        ]
+
+    def _recognize_chunk(self, chunk: AudioSegment, lang_code: str, extra_request=False):
+        if extra_request and self.before_request is not None:
+            self.before_request()
+        data = sr.AudioData(chunk.raw_data, chunk.frame_rate, chunk.sample_width)
+        try:
+            with span("stt.recognize"):
+                text, confidence = self.recognizer.recognize_google(
+                    data, language=lang_code, with_confidence=True
+                )
+            return {"text": (text or "").strip(), "confidence": float(confidence)}
+        except sr.UnknownValueError:
+            return {"text": "", "confidence": 0.0}
+        except sr.RequestError as e:
+            return {"text": "", "confidence": 0.0, "error": f"Speech recognition service error: {str(e)}"}
+
+    @staticmethod
+    def _merge_overlap(previous: str, current: str, max_words=6):
+        """Drop words at the start of current that repeat the end of previous."""
+        prev_words = previous.split()
+        cur_words = current.split()
+        for n in range(min(max_words, len(prev_words), len(cur_words)), 0, -1):
+            if [w.lower() for w in prev_words[-n:]] == [w.lower() for w in cur_words[:n]]:
+                return " ".join(cur_words[n:])
+        return current
+
+    def _transcribe_chunked(self, audio: AudioSegment, lang_code: str,
+                            max_chunk_ms=None, overlap_ms=None, workers=None):
+        bounds = self._chunk_bounds(audio, max_chunk_ms, overlap_ms)
+        workers = max(1, min(workers or self.LONG_AUDIO_WORKERS, len(bounds)))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Each chunk runs in a copy of the caller's context so its spans
+            # land on the request timer. The first chunk is the request the
+            # caller was already admitted for; the rest go through before_request.
+            futures = [
+                pool.submit(
+                    contextvars.copy_context().run,
+                    self._recognize_chunk, audio[start:end], lang_code, index > 0
+                )
+                for index, (start, end, _) in enumerate(bounds)
+            ]
+            results = [f.result() for f in futures]
+
+        chunks = []
+        merged = []
+        for index, ((start, end, hard_cut), result) in enumerate(zip(bounds, results)):
+            text = result["text"]
+            # Only a hard cut can split a word into both chunks; across a
+            # silence the overlap is silence and repeats are real speech
+            if text and merged and hard_cut:
+                text = self._merge_overlap(merged[-1], text)
+            if text:
+                merged.append(text)
+            chunk = {
+                "index": index,
+                "start": start / 1000.0,
+                "end": end / 1000.0,
+                "text": text,
+                "confidence": result["confidence"]
+            }
+            if "error" in result:
+                chunk["error"] = result["error"]
+            chunks.append(chunk)
+
+        full_text = " ".join(merged).strip()
+        if not full_text:
+            errors = [c["error"] for c in chunks if "error" in c]
+            return {
+                "text": "", "language": lang_code, "confidence": 0.0,
+                "chunks": chunks,
+                "error": errors[0] if errors else "Could not understand audio"
+            }
+
+        # Duration-weighted confidence over the chunks that produced text
+        spoken = [c for c in chunks if c["text"]]
+        weight = sum(c["end"] - c["start"] for c in spoken) or 1.0
+        confidence = sum(c["confidence"] * (c["end"] - c["start"]) for c in spoken) / weight
+
+        return {
+            "text": full_text,
+            "language": lang_code,
+            "confidence": round(confidence, 3),
+            "duration": len(audio) / 1000.0,
+            "chunks": chunks
+        }
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the backend's flat modules the way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compat  # noqa: E402,F401  (must precede audio imports)
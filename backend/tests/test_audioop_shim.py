@@ -0,0 +1,48 @@
+"""
+The NumPy audioop shim against outputs recorded from CPython's C audioop
+(tests/data/audioop_reference.json, written by
+`python -m bench.audioop_bench --write-reference` on Python <= 3.12), so
+the shim is checked on interpreters that no longer ship audioop.
+"""
+import os
+import json
+import math
+
+import pytest
+
+import compat
+from bench.audioop_bench import decode
+
+REFERENCE = os.path.join(os.path.dirname(__file__), "data", "audioop_reference.json")
+
+with open(REFERENCE) as f:
+    VECTORS = json.load(f)["vectors"]
+
+shim = compat.build_audioop_module()
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return a == b or (math.isnan(a) and math.isnan(b))
+    if isinstance(a, (tuple, list)) and isinstance(b, (tuple, list)) and len(a) == len(b):
+        return all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+@pytest.mark.parametrize(
+    "vector", VECTORS, ids=[f"{i}-{v['name']}" for i, v in enumerate(VECTORS)]
+)
+def test_matches_cpython(vector):
+    args = decode(vector["args"])
+    expected = decode(vector["expected"])
+    try:
+        actual = ("ok", getattr(shim, vector["name"])(*args))
+    except Exception as e:
+        actual = ("raise", type(e).__name__, str(e))
+    assert _same(actual, tuple(expected))
+
+
+def test_covers_every_function():
+    recorded = {v["name"] for v in VECTORS}
+    public = {name for name in dir(shim) if not name.startswith("_") and callable(getattr(shim, name))}
+    assert public - {"error"} <= recorded
@@ -0,0 +1,100 @@
+import json
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from gemini_service import GeminiService
+
+TEXT = "Hello, how are you today? I hope everything is fine at home."
+ES = "Hola, ¿cómo estás hoy? Espero que todo vaya bien en casa."
+FR = "Bonjour, comment allez-vous aujourd'hui ? J'espère que tout va bien."
+
+
+def reply(payload):
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+    return SimpleNamespace(text=text)
+
+
+@pytest.fixture
+def gemini():
+    service = GeminiService()
+    service.client = mock.Mock()
+    return service
+
+
+def translate(gemini, payload, langs=("es", "fr")):
+    with mock.patch.object(gemini, "_generate_json", return_value=reply(payload)):
+        return gemini.enhance_and_translate(TEXT, list(langs), "en")
+
+
+def test_accepts_valid_translations(gemini):
+    result = translate(gemini, {"enhanced_text": TEXT, "translations": {"es": ES, "fr": FR}})
+    assert result == {"enhanced_text": TEXT, "translations": {"es": ES, "fr": FR}, "missing": []}
+
+
+def test_accepts_fenced_json(gemini):
+    payload = "```json\n" + json.dumps({"enhanced_text": TEXT, "translations": {"es": ES}}) + "\n```"
+    assert translate(gemini, payload, ["es"])["translations"] == {"es": ES}
+
+
+@pytest.mark.parametrize("payload", ["not json at all", '{"enhanced_text": "cut off', "[1, 2]"])
+def test_malformed_json_leaves_every_language_missing(gemini, payload):
+    result = translate(gemini, payload)
+    assert result == {"enhanced_text": TEXT, "translations": {}, "missing": ["es", "fr"]}
+
+
+def test_missing_language_is_left_to_the_translator(gemini):
+    result = translate(gemini, {"enhanced_text": TEXT, "translations": {"es": ES}})
+    assert result["translations"] == {"es": ES}
+    assert result["missing"] == ["fr"]
+
+
+def test_untranslated_echo_is_rejected(gemini):
+    result = translate(gemini, {"enhanced_text": TEXT, "translations": {"es": TEXT, "fr": FR}})
+    assert result["translations"] == {"fr": FR}
+    assert result["missing"] == ["es"]
+
+
+def test_wrong_language_is_rejected(gemini):
+    result = translate(gemini, {"enhanced_text": TEXT, "translations": {"es": FR, "fr": FR}})
+    assert result["missing"] == ["es"]
+
+
+def test_plain_output_when_json_mode_is_unsupported(gemini):
+    gemini.client.generate_content.side_effect = [
+        Exception("response_mime_type is not supported"), reply("{}")
+    ]
+    gemini._generate_json("prompt")
+    assert gemini._json_mode is False
+    assert "response_mime_type" not in gemini.client.generate_content.call_args.kwargs["generation_config"]
+
+
+def test_pipeline_translates_rejected_languages_with_the_translator(gemini, monkeypatch, tmp_path):
+    monkeypatch.setenv("SHARED_STORE_PATH", str(tmp_path / "shared.db"))
+    import app
+    import jobs
+
+    gemini.multilingual = True
+    monkeypatch.setattr(app, "gemini_service", gemini)
+    translate_call = mock.Mock(side_effect=lambda text, lang, source: f"[{lang}] {text}")
+    monkeypatch.setattr(app.translator, "translate", translate_call)
+
+    async def synthesize(text, lang, *args):
+        return text.encode(), "audio/mp3"
+    monkeypatch.setattr(app.tts_service, "synthesize_async", synthesize)
+
+    payload = {"enhanced_text": TEXT, "translations": {"es": TEXT}}
+
+    async def scenario():
+        job = jobs.Job("test")
+        with mock.patch.object(gemini, "_generate_json", return_value=reply(payload)):
+            await app.run_pipeline_job(job, None, None, TEXT, ["es"], None, "en", None, None,
+                                       single_call=True)
+        return job
+
+    job = asyncio.run(scenario())
+    translate_call.assert_called_once_with(TEXT, "es", "en")
+    translation = next(e["data"] for e in job.events if e["event"] == "translation")
+    assert translation == {"language": "es", "text": f"[es] {TEXT}", "by": "translator"}
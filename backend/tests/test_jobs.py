@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+import pytest
+
+import jobs
+from shared_store import SharedStore
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two job stores over one SQLite file, as two uvicorn workers see it."""
+    store = SharedStore(str(tmp_path / "shared.db"))
+    return (
+        jobs.JobStore(shared=jobs.SharedJobs(store, 60), cancel_poll=0.05),
+        jobs.JobStore(shared=jobs.SharedJobs(store, 60), cancel_poll=0.05),
+    )
+
+
+def test_other_worker_serves_events_and_audio(workers):
+    owner, other = workers
+
+    async def scenario():
+        job = owner.create()
+
+        async def pipeline():
+            job.publish("progress", {"stage": "translate"})
+            await asyncio.sleep(0.1)
+            job.add_artifact("es", b"audio", "audio/mpeg")
+            job.publish("audio", {"language": "es"})
+
+        owner.start(job, pipeline())
+        await owner.flush()
+        remote = await other.get(job.id)
+        assert isinstance(remote, jobs.RemoteJob)
+        events = [e["event"] async for e in remote.subscribe(interval=0.02) if e is not None]
+        return job, await other.get(job.id), events
+
+    job, remote, events = asyncio.run(scenario())
+    assert events == ["status", "progress", "audio", "done"]
+    assert remote.status == jobs.DONE
+    assert remote.snapshot()["events"] == job.events
+    assert remote.artifact("es") == (b"audio", "audio/mpeg")
+    assert other.cancel(remote) is False
+
+
+def test_other_worker_cancels_job(workers):
+    owner, other = workers
+
+    async def scenario():
+        job = owner.create()
+        owner.start(job, asyncio.sleep(10))
+        await owner.flush()
+        assert other.cancel(await other.get(job.id)) is True
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(job.task, 2)
+        await owner.flush()
+        return job, await other.get(job.id)
+
+    job, remote = asyncio.run(scenario())
+    assert job.status == jobs.CANCELLED
+    assert remote.status == jobs.CANCELLED
+
+
+def test_unknown_job(workers):
+    assert asyncio.run(workers[1].get("missing")) is None
+
+
+def test_store_writes_stay_off_the_event_loop(workers, monkeypatch):
+    owner, other = workers
+    loop_thread = threading.get_ident()
+    writers = set()
+    set_json = owner.shared.store.set_json
+
+    def recording_set_json(*args, **kwargs):
+        writers.add(threading.get_ident())
+        return set_json(*args, **kwargs)
+
+    monkeypatch.setattr(owner.shared.store, "set_json", recording_set_json)
+
+    async def scenario():
+        job = owner.create()
+        owner.start(job, asyncio.sleep(0))
+        await job.task
+        await owner.flush()
+
+    asyncio.run(scenario())
+    assert writers and loop_thread not in writers
@@ -0,0 +1,56 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from pydub import AudioSegment
+
+import scheduler
+from stt import SpeechToText
+
+
+def test_long_audio_chunks_take_rate_tokens():
+    provider = scheduler.Scheduler(ThreadPoolExecutor(4), concurrency=1, rate_limits={"stt": 2})
+    stt = SpeechToText(before_request=lambda: provider.wait_for_token("stt"))
+    stt.recognizer.recognize_google = mock.Mock(return_value=("words", 0.9))
+    audio = AudioSegment.silent(4000, frame_rate=16000)
+    bounds = [(0, 1000, False), (1000, 2000, False), (2000, 3000, False), (3000, 4000, False)]
+
+    async def transcribe():
+        started = time.monotonic()
+        with mock.patch.object(stt, "_chunk_bounds", return_value=bounds):
+            result = await provider.run("stt", stt._transcribe_chunked, audio, "en-US")
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(transcribe())
+    assert len(result["chunks"]) == 4
+    assert stt.recognizer.recognize_google.call_count == 4
+    # Burst of 2 covers the call and one chunk; two more tokens refill at 2/s
+    assert elapsed >= 0.9
+
+
+def test_non_positive_weights_are_ignored():
+    provider = scheduler.Scheduler(ThreadPoolExecutor(1), concurrency=1, weights={"a": 0, "b": -1, "c": 2})
+    assert provider.weights == {"c": 2}
+
+    async def call():
+        scheduler.set_client("a")
+        return await provider.run("translate", lambda: "ok")
+
+    assert asyncio.run(call()) == "ok"
+
+
+def test_counts_calls_waiting_for_an_executor_thread():
+    # More slots than threads: granted calls queue in the executor
+    provider = scheduler.Scheduler(ThreadPoolExecutor(1), concurrency=3)
+    seen = []
+
+    async def scenario():
+        calls = [asyncio.create_task(provider.run("tts", time.sleep, 0.1)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        seen.append(provider.executor_queued)
+        await asyncio.gather(*calls)
+        seen.append(provider.executor_queued)
+
+    asyncio.run(scenario())
+    assert seen == [2, 0]
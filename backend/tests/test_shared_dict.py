@@ -0,0 +1,38 @@
+import pytest
+
+from shared_store import SharedDict, SharedStore
+from voice_cloning import VoiceCloning
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SharedStore(str(tmp_path / "shared.db"))
+
+
+def test_shared_dict_behaves_like_a_dict(store):
+    voices = SharedDict(store, "voices")
+    voices["v1"] = {"language": "en"}
+    voices["v2"] = {"language": "fr"}
+    assert voices["v1"] == {"language": "en"}
+    assert "v2" in voices and "v3" not in voices
+    assert sorted(voices) == ["v1", "v2"]
+    assert len(voices) == 2
+    del voices["v1"]
+    assert dict(voices.items()) == {"v2": {"language": "fr"}}
+    with pytest.raises(KeyError):
+        voices["v1"]
+    with pytest.raises(KeyError):
+        del voices["v1"]
+
+
+def test_shared_dict_is_visible_through_another_connection(store):
+    SharedDict(store, "voices")["v1"] = {"language": "en"}
+    other = SharedDict(SharedStore(store.path), "voices")
+    assert other["v1"] == {"language": "en"}
+
+
+def test_voice_registry_is_shared_between_services(store, tmp_path):
+    first = VoiceCloning(models_dir=str(tmp_path / "models"), store=store)
+    second = VoiceCloning(models_dir=str(tmp_path / "models"), store=SharedStore(store.path))
+    first.cloned_voices["mine"] = {"voice_id": "mine", "language": "en"}
+    assert "mine" in second.cloned_voices
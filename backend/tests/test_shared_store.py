@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from shared_store import SharedStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SharedStore(str(tmp_path / "shared.db"))
+
+
+def test_write_from_before_a_flush_is_skipped(store):
+    generation = store.generation("audio")
+    store.invalidate("audio")
+    store.set("audio", "k", b"stale", generation=generation)
+    assert store.get("audio", "k") is None
+
+    store.set("audio", "k", b"fresh", generation=store.generation("audio"))
+    assert store.get("audio", "k") == b"fresh"
+
+
+def test_invalidate_bumps_generation_and_clears_only_its_namespace(store):
+    store.set("audio", "a", b"1")
+    store.set("translation", "t", b"2")
+    assert store.invalidate("audio") == 1
+    assert store.invalidate("audio") == 2
+    assert store.generation("audio") == 2
+    assert store.keys("audio") == []
+    assert store.get("translation", "t") == b"2"
+
+
+def test_second_connection_sees_the_flush(store):
+    other = SharedStore(store.path)
+    generation = other.generation("audio")
+    store.invalidate("audio")
+    other.set("audio", "k", b"stale", generation=generation)
+    assert store.get("audio", "k") is None
+
+
+def test_prune_keeps_newest_entries(tmp_path):
+    store = SharedStore(str(tmp_path / "shared.db"), max_entries=3)
+    for i in range(5):
+        store.set("ns", str(i), b"x")
+    store.prune("ns")
+    assert sorted(store.keys("ns")) == ["2", "3", "4"]
+
+
+def test_prune_enforces_byte_limit_newest_first(store):
+    store.limit_bytes("audio", 250)
+    for i in range(4):
+        store.set("audio", str(i), b"x" * 100)
+    store.prune("audio")
+    assert sorted(store.keys("audio")) == ["2", "3"]
+    assert store.size("audio") == 200
+
+
+def test_prune_reclaims_expired_rows_in_every_namespace(store):
+    store.set("rare", "old", b"x", ttl=0.01)
+    store.set("busy", "old", b"x", ttl=0.01)
+    store.set("busy", "live", b"x")
+    time.sleep(0.02)
+    store.prune()
+    rows = store._conn().execute("SELECT namespace, key FROM kv ORDER BY namespace").fetchall()
+    assert rows == [("busy", "live")]
+
+
+def test_periodic_prune_covers_other_namespaces(store):
+    store.set("rare", "old", b"x", ttl=0.01)
+    time.sleep(0.02)
+    for i in range(256):
+        store.set("busy", str(i), b"x")
+    assert store._conn().execute("SELECT COUNT(*) FROM kv WHERE namespace = 'rare'").fetchone()[0] == 0
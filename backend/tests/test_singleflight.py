@@ -0,0 +1,148 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return "audio"
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "key", compute) for _ in range(4)]
+        while flight.coalesced < 3:
+            time.sleep(0.01)
+        release.set()
+        assert [f.result() for f in futures] == ["audio"] * 4
+    assert calls == [1]
+    assert flight.in_flight() == 0
+
+
+def test_thread_leader_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(2)
+        raise ValueError("provider down")
+
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(flight.do, "key", compute) for _ in range(3)]
+        while flight.coalesced < 2:
+            time.sleep(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match="provider down"):
+                future.result()
+    assert flight.in_flight() == 0
+
+
+def test_concurrent_coroutines_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "audio"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do_async("key", compute) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["audio"] * 5
+    assert calls == [1]
+    assert flight.coalesced == 4
+
+
+def test_coroutine_leader_error_reaches_every_waiter():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise ValueError("provider down")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.do_async("key", compute) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.in_flight() == 0
+
+
+def test_cancelled_leader_does_not_cancel_other_waiters():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "audio"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do_async("key", compute))
+        follower = asyncio.create_task(flight.do_async("key", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "audio"
+
+
+def test_abandoned_call_is_cancelled_and_not_joined():
+    flight = SingleFlight()
+    started = []
+    cancelled = []
+
+    async def compute():
+        started.append(1)
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+        return "audio"
+
+    async def scenario():
+        first = asyncio.create_task(flight.do_async("key", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        # Arrives before the abandoned computation has seen its cancellation
+        return await flight.do_async("key", compute)
+
+    assert asyncio.run(scenario()) == "audio"
+    assert started == [1, 1]
+    assert cancelled == [1]
+    assert flight.in_flight() == 0
+
+
+def test_thread_joins_coroutine_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "audio"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do_async("key", compute))
+        await asyncio.sleep(0.01)
+        joined = await asyncio.to_thread(flight.do, "key", lambda: "recomputed")
+        return await leader, joined
+
+    assert asyncio.run(scenario()) == ("audio", "audio")
+    assert calls == [1]
@@ -0,0 +1,88 @@
+from unittest import mock
+
+import pytest
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from stt import SpeechToText
+
+
+def tone(ms):
+    return Sine(440).to_audio_segment(duration=ms).set_frame_rate(16000).set_channels(1)
+
+
+def silence(ms):
+    return AudioSegment.silent(ms, frame_rate=16000)
+
+
+@pytest.fixture
+def stt():
+    return SpeechToText()
+
+
+def test_short_audio_is_one_chunk(stt):
+    assert stt.split_on_silence(tone(3000), max_chunk_ms=10_000, overlap_ms=0) == [(0, 3000)]
+
+
+def test_cuts_at_middle_of_last_silence(stt):
+    audio = tone(8000) + silence(1000) + tone(6000) + silence(1000) + tone(8000)
+    bounds = stt._chunk_bounds(audio, max_chunk_ms=20_000, overlap_ms=0)
+    # Silence 15000-16000 is the last one before 20 s
+    assert bounds == [(0, 15500, False), (15500, 24000, False)]
+
+
+def test_hard_cut_without_silence(stt):
+    bounds = stt._chunk_bounds(tone(25_000), max_chunk_ms=10_000, overlap_ms=0)
+    assert bounds == [(0, 10_000, False), (10_000, 20_000, True), (20_000, 25_000, True)]
+
+
+def test_silence_too_early_is_not_used(stt):
+    # A cut would leave a first chunk shorter than MIN_CHUNK_MS
+    audio = tone(1000) + silence(1000) + tone(20_000)
+    bounds = stt._chunk_bounds(audio, max_chunk_ms=10_000, overlap_ms=0)
+    assert bounds[0] == (0, 10_000, False)
+    assert bounds[1][2] is True
+
+
+def test_overlap_widens_chunks_within_audio(stt):
+    bounds = stt.split_on_silence(tone(25_000), max_chunk_ms=10_000, overlap_ms=300)
+    assert bounds == [(0, 10_300), (9_700, 20_300), (19_700, 25_000)]
+
+
+@pytest.mark.parametrize("previous, current, expected", [
+    ("we went to the", "the park today", "park today"),
+    ("see you at the park", "At The Park tomorrow", "tomorrow"),
+    ("hello there", "general kenobi", "general kenobi"),
+    ("done", "done", ""),
+])
+def test_merge_overlap(previous, current, expected):
+    assert SpeechToText._merge_overlap(previous, current) == expected
+
+
+def transcribe(stt, bounds, results):
+    """_transcribe_chunked over fixed bounds with canned (text, confidence) per chunk."""
+    audio = silence(bounds[-1][1])
+    stt.recognizer.recognize_google = mock.Mock(side_effect=results)
+    with mock.patch.object(stt, "_chunk_bounds", return_value=bounds):
+        return stt._transcribe_chunked(audio, "en-US", workers=1)
+
+
+def test_repeats_across_a_silence_are_kept(stt):
+    result = transcribe(stt, [(0, 10_000, False), (10_000, 20_000, False)],
+                        [("and I said thank you", 0.9), ("thank you for coming", 0.9)])
+    assert result["text"] == "and I said thank you thank you for coming"
+
+
+def test_repeats_across_a_hard_cut_are_merged(stt):
+    result = transcribe(stt, [(0, 10_300, False), (9_700, 20_000, True)],
+                        [("we went to the", 0.9), ("the park today", 0.9)])
+    assert result["text"] == "we went to the park today"
+    assert result["chunks"][1]["text"] == "park today"
+
+
+def test_confidence_is_weighted_by_duration_of_spoken_chunks(stt):
+    result = transcribe(stt, [(0, 30_000, False), (30_000, 40_000, False), (40_000, 50_000, False)],
+                        [("long part", 0.9), ("short part", 0.5), ("", 0.0)])
+    assert result["confidence"] == pytest.approx((0.9 * 30 + 0.5 * 10) / 40, abs=1e-3)
+    assert result["duration"] == 50.0
+    assert [c["index"] for c in result["chunks"]] == [0, 1, 2]
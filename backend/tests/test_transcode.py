@@ -0,0 +1,49 @@
+import io
+import shutil
+
+import pytest
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+import transcode
+
+
+@pytest.mark.parametrize("fmt, bitrate, expected", [
+    (None, None, (None, None)),
+    ("", "", (None, None)),
+    ("MP3", None, ("mp3", "48k")),
+    ("opus", None, ("opus", "24k")),
+    ("opus", "32", ("opus", "32k")),
+    ("webm", " 064K ", ("webm", "64k")),
+    (None, "32k", ("mp3", "32k")),
+    ("wav", "32k", ("wav", None)),
+    ("pcm", None, ("pcm", None)),
+])
+def test_normalize(fmt, bitrate, expected):
+    assert transcode.normalize(fmt, bitrate) == expected
+
+
+@pytest.mark.parametrize("fmt, bitrate", [
+    ("flac", None), ("mp4", "32k"),
+    ("mp3", "5k"), ("mp3", "321k"), ("opus", "fast"), ("opus", "32kbps"), ("mp3", "1000k"),
+])
+def test_normalize_rejects(fmt, bitrate):
+    with pytest.raises(ValueError):
+        transcode.normalize(fmt, bitrate)
+
+
+def test_mime_type():
+    assert transcode.mime_type(None) == "audio/mp3"
+    assert transcode.mime_type("opus") == "audio/ogg"
+    assert transcode.mime_type("wav") == "audio/wav"
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")),
+                    reason="needs ffmpeg and ffprobe")
+def test_transcode_to_opus():
+    buf = io.BytesIO()
+    Sine(440).to_audio_segment(duration=1000).export(buf, format="mp3")
+    opus = transcode.transcode(buf.getvalue(), "opus", "24k")
+    decoded = AudioSegment.from_file(io.BytesIO(opus), format="ogg")
+    assert decoded.channels == 1
+    assert abs(len(decoded) - 1000) < 100
@@ -0,0 +1,33 @@
+from unittest import mock
+
+import pytest
+
+from translate import Translator
+
+
+@pytest.fixture(scope="module")
+def translator():
+    return Translator()
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("zh-CN", "zh-CN"), ("zh", "zh-CN"), ("zh_Hans", "zh-CN"), ("zh-TW", "zh-TW"),
+    ("he", "iw"), ("he-IL", "iw"), ("en-US", "en"), ("pt-BR", "pt"),
+    ("xx", None), (None, None),
+])
+def test_google_code(translator, code, expected):
+    assert translator.google_code(code) == expected
+
+
+def test_stt_locale_is_sent_in_googles_spelling(translator):
+    with mock.patch("translate.GoogleTranslator") as google:
+        google.return_value.translate.return_value = "The weather is nice today"
+        assert translator.translate("你好，今天天气很好", "en", "zh-CN") == "The weather is nice today"
+    google.assert_called_once_with(source="zh-CN", target="en")
+
+
+def test_unknown_source_falls_back_to_auto(translator):
+    with mock.patch("translate.GoogleTranslator") as google:
+        google.return_value.translate.return_value = "hola"
+        translator.translate("hello", "es", "xx")
+    google.assert_called_once_with(source="auto", target="es")
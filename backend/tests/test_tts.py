@@ -0,0 +1,88 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from tts import TextToSpeech
+
+
+class SlowCommunicate:
+    """edge_tts.Communicate stand-in that counts streams and can be held open."""
+    streams = []
+
+    def __init__(self, text, voice=None, **kwargs):
+        self.text = text
+
+    async def stream(self):
+        self.streams.append(self.text)
+        await asyncio.sleep(0.1)
+        yield {"type": "audio", "data": b"mp3:" + self.text.encode()}
+
+
+@pytest.fixture
+def tts():
+    SlowCommunicate.streams = []
+    with mock.patch("tts.edge_tts.Communicate", SlowCommunicate):
+        yield TextToSpeech()
+
+
+def test_async_and_blocking_callers_share_one_synthesis(tts):
+    async def scenario():
+        return await asyncio.gather(
+            tts.synthesize_async("hola", "es"),
+            tts.synthesize_async("hola", "es"),
+            asyncio.to_thread(tts.synthesize_bytes, "hola", "es"),
+        )
+
+    results = asyncio.run(scenario())
+    assert results == [(b"mp3:hola", "audio/mp3")] * 3
+    assert SlowCommunicate.streams == ["hola"]
+
+
+def test_cancelled_caller_cancels_its_synthesis(tts):
+    async def scenario():
+        task = asyncio.create_task(tts.synthesize_async("hola", "es"))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        return tts._flight.in_flight()
+
+    assert asyncio.run(scenario()) == 0
+
+
+@pytest.fixture
+def cached_tts(tmp_path):
+    from shared_store import SharedStore
+    return TextToSpeech(store=SharedStore(str(tmp_path / "shared.db")))
+
+
+def test_encode_without_format_returns_original(cached_tts):
+    with mock.patch("tts.transcode.transcode") as encode:
+        assert cached_tts._encode(b"mp3", ("hi", "en", None), None) == (b"mp3", "audio/mp3")
+    encode.assert_not_called()
+
+
+def test_encode_caches_each_variant(cached_tts):
+    key = cached_tts.cache_key("hi", "en")
+    with mock.patch("tts.transcode.transcode", side_effect=lambda a, f, b: f"{f}@{b}".encode()) as encode:
+        first = cached_tts._encode(b"mp3", ("hi", "en", None), key, "opus", "24k")
+        again = cached_tts._encode(b"mp3", ("hi", "en", None), key, "OPUS", "24")
+        other = cached_tts._encode(b"mp3", ("hi", "en", None), key, "opus", "32k")
+    assert first == again == (b"opus@24k", "audio/ogg")
+    assert other == (b"opus@32k", "audio/ogg")
+    assert encode.call_count == 2
+    assert len(cached_tts.store.keys(TextToSpeech.VARIANT_NAMESPACE)) == 2
+
+
+def test_encode_failure_falls_back_to_mp3(cached_tts):
+    key = cached_tts.cache_key("hi", "en")
+    with mock.patch("tts.transcode.transcode", side_effect=RuntimeError("ffmpeg missing")):
+        assert cached_tts._encode(b"mp3", ("hi", "en", None), key, "opus") == (b"mp3", "audio/mp3")
+    assert cached_tts.store.keys(TextToSpeech.VARIANT_NAMESPACE) == []
+
+
+def test_encode_rejects_invalid_options(cached_tts):
+    with pytest.raises(ValueError):
+        cached_tts._encode(b"mp3", ("hi", "en", None), None, "flac")
@@ -0,0 +1,74 @@
+"""
+Output codecs for synthesized speech.
+
+Speech survives aggressive compression, so mobile clients and
+multi-language responses can ask for Opus or low-bitrate mono MP3
+instead of edge-tts's default MP3. Transcoding goes through pydub/ffmpeg
+and is CPU-bound: call it from a worker thread, never on the event loop.
+"""
+import io
+import re
+from typing import Optional, Tuple
+
+from pydub import AudioSegment
+
+from metrics import span
+
+# name -> (pydub/ffmpeg container, codec, MIME type, default bitrate)
+FORMATS = {
+    "mp3": ("mp3", None, "audio/mpeg", "48k"),
+    "opus": ("ogg", "libopus", "audio/ogg", "24k"),
+    "ogg": ("ogg", "libopus", "audio/ogg", "24k"),
+    "webm": ("webm", "libopus", "audio/webm", "24k"),
+    "wav": ("wav", None, "audio/wav", None),
+    "pcm": ("wav", None, "audio/wav", None),
+}
+
+_BITRATE = re.compile(r"^(\d{1,3})k?$")
+
+
+def normalize(fmt: Optional[str], bitrate: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Validate a requested format/bitrate pair. Returns (None, None) when the
+    caller wants the provider's original audio untouched.
+    Raises ValueError for unknown formats or out-of-range bitrates.
+    """
+    if not fmt and not bitrate:
+        return None, None
+    fmt = (fmt or "mp3").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Choose one of: {', '.join(sorted(FORMATS))}")
+
+    if FORMATS[fmt][3] is None:
+        return fmt, None
+    if bitrate:
+        match = _BITRATE.match(str(bitrate).strip().lower())
+        if not match or not 6 <= int(match.group(1)) <= 320:
+            raise ValueError("Bitrate must be between 6k and 320k, e.g. '32k'")
+        return fmt, f"{int(match.group(1))}k"
+    return fmt, FORMATS[fmt][3]
+
+
+def mime_type(fmt: Optional[str]) -> str:
+    return FORMATS[fmt][2] if fmt else "audio/mp3"
+
+
+def transcode(audio: bytes, fmt: str, bitrate: Optional[str] = None, source_format: str = "mp3") -> bytes:
+    """Re-encode audio as mono `fmt` at `bitrate` (ignored for PCM)."""
+    container, codec, _, _ = FORMATS[fmt]
+    with span(f"transcode.{fmt}"):
+        segment = AudioSegment.from_file(io.BytesIO(audio), format=source_format).set_channels(1)
+        if container == "wav":
+            segment = segment.set_sample_width(2)
+
+        out = io.BytesIO()
+        kwargs = {"format": container}
+        if codec:
+            kwargs["codec"] = codec
+        if bitrate:
+            kwargs["bitrate"] = bitrate
+        if codec == "libopus":
+            # Tuned for speech rather than music
+            kwargs["parameters"] = ["-application", "voip"]
+        segment.export(out, **kwargs)
+        return out.getvalue()
@@ -1,12 +1,37 @@
 from deep_translator import GoogleTranslator
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+import http_pool
+from langid import identifier, base_language, same_language
+from metrics import span
+from singleflight import SingleFlight
 
 class Translator:
     """
     Translation service using Deep Translator → Google Translate API
     """
 
-    def __init__(self):
+    CACHE_NAMESPACE = "translation"
+    NAMESPACES = (CACHE_NAMESPACE,)
+    # Local detection must be this sure before translation is skipped
+    SKIP_CONFIDENCE = 0.9
+    # Codes Google spells differently from STT locales and our language list
+    GOOGLE_ALIASES = {
+        "zh": "zh-CN", "zh-cn": "zh-CN", "zh-sg": "zh-CN", "zh-hans": "zh-CN",
+        "zh-tw": "zh-TW", "zh-hk": "zh-TW", "zh-hant": "zh-TW",
+        "he": "iw", "jv": "jw", "fil": "tl", "nb": "no",
+    }
+
+    def __init__(self, store=None):
+        self.store = store
+        # Identical concurrent (text, source, target) requests share one call
+        self._flight = SingleFlight()
+        # Reuse keep-alive connections to Google instead of a handshake per call
+        http_pool.install()
+        self._google_codes = {
+            code.lower(): code
+            for code in GoogleTranslator().get_supported_languages(as_dict=True).values()
+        }
         self.supported_languages: Dict[str, str] = {
             "en": "English", "es": "Spanish", "fr": "French", "de": "German",
             "it": "Italian", "pt": "Portuguese", "ru": "Russian", "ja": "Japanese",
@@ -27,22 +52,101 @@ class Translator:
         if not text.strip():
             return ""
 
+        # Google rejects codes it does not know (e.g. "zh"), so the source it
+        # gets is its own spelling, or "auto"; base_language is only for
+        # comparing languages and keying the cache
+        source = self.google_code(source_lang) or "auto"
+        target = self.google_code(target_lang) or target_lang
+        source_lang = base_language(source_lang)
+        if not self.needs_translation(text, target_lang, source_lang):
+            return text
+
+        key = self.cache_key(text, target_lang, source_lang)
+        generation = None
+        if key is not None:
+            cached = self.cached(text, target_lang, source_lang)
+            if cached is not None:
+                return cached
+            generation = self.store.generation(self.CACHE_NAMESPACE)
+
+        return self._flight.do(
+            (text, source, target),
+            self._translate_remote, text, source, target, key, generation
+        )
+
+    def google_code(self, code: Optional[str]) -> Optional[str]:
+        """The code GoogleTranslator accepts for a language, or None if it has none."""
+        if not code:
+            return None
+        lower = code.strip().replace("_", "-").lower()
+        for candidate in (lower, lower.split("-")[0]):
+            candidate = self.GOOGLE_ALIASES.get(candidate, candidate)
+            if candidate.lower() in self._google_codes:
+                return self._google_codes[candidate.lower()]
+        return None
+
+    def needs_translation(self, text: str, target_lang: str, source_lang: Optional[str] = None) -> bool:
+        """
+        False when the text is already in the target language: either the
+        caller says so (e.g. the language STT recognized) or, with no source
+        given, offline detection is confident of it.
+        """
+        if source_lang:
+            return not same_language(source_lang, target_lang)
+        detected, confidence = identifier.identify(text, self.supported_languages)
+        return not (same_language(detected, target_lang) and confidence >= self.SKIP_CONFIDENCE)
+
+    def cache_key(self, text: str, target_lang: str, source_lang: Optional[str] = None) -> Optional[str]:
+        """Shared-store key for a translation, or None when caching is off."""
+        if self.store is None:
+            return None
+        return self.store.make_key(text, base_language(source_lang) or "auto", target_lang)
+
+    def lookup_keys(self, text: str, target_lang: str, source_lang: Optional[str] = None) -> List[str]:
+        """
+        Keys a cached translation may be under, best first. Results are
+        stored under the request's source ("auto" without one). A request
+        with a source also accepts the "auto" entry; one without accepts
+        the entry for the language offline detection is confident of, so
+        catalog rows prerendered with a "source" still serve requests that
+        send none.
+        """
+        keys = [self.cache_key(text, target_lang, source_lang)]
+        if source_lang:
+            keys.append(self.cache_key(text, target_lang))
+        else:
+            detected, confidence = identifier.identify(text, self.supported_languages)
+            if detected and confidence >= self.SKIP_CONFIDENCE:
+                keys.append(self.cache_key(text, target_lang, detected))
+        return keys
+
+    def cached(self, text: str, target_lang: str, source_lang: Optional[str] = None) -> Optional[str]:
+        """A cached translation under any of lookup_keys(), or None."""
+        if self.store is None:
+            return None
+        value = self.store.get_any(self.CACHE_NAMESPACE, self.lookup_keys(text, target_lang, source_lang))
+        return value.decode("utf-8") if value is not None else None
+
+    def _translate_remote(self, text: str, source: str, target_lang: str, key: Optional[str],
+                          generation: Optional[int] = None) -> str:
         try:
             translator = GoogleTranslator(
-                source=source_lang if source_lang else "auto",
+                source=source,
                 target=target_lang
             )
-            return translator.translate(text)
+            with span("translate.google"):
+                translated = translator.translate(text)
         except Exception as e:
             print("Translation error:", e)
             return text
 
+        if key is not None and translated:
+            self.store.set(self.CACHE_NAMESPACE, key, translated.encode("utf-8"), generation=generation)
+        return translated
+
     def detect_language(self, text: str) -> str:
-        try:
-            test = GoogleTranslator(source="auto", target="en").translate(text)
-            return "en" if test == text else "unknown"
-        except Exception:
-            return "unknown"
+        """Offline detection; returns a supported language code or "unknown"."""
+        return identifier.detect(text, self.supported_languages)
 
     def get_supported_languages(self) -> Dict[str, str]:
         return self.supported_languages
@@ -5,8 +5,30 @@ from gtts import gTTS
 import tempfile
 import os
 
+import http_pool
+import transcode
+from metrics import span
+from singleflight import SingleFlight
+
 class TextToSpeech:
-    def __init__(self):
+    CACHE_NAMESPACE = "audio"
+    VARIANT_NAMESPACE = "audio_variants"
+    # Flushed together: variants are derived from the cached audio
+    NAMESPACES = (CACHE_NAMESPACE, VARIANT_NAMESPACE)
+
+    # Cached MP3s expire after AUDIO_CACHE_TTL seconds, and each audio
+    # namespace is capped at AUDIO_CACHE_MAX_MB (0 disables either bound)
+    def __init__(self, store=None, cache_ttl=None, cache_max_mb=None):
+        self.store = store
+        self.cache_ttl = float(os.getenv("AUDIO_CACHE_TTL", str(30 * 86400))) if cache_ttl is None else cache_ttl
+        cache_max_mb = float(os.getenv("AUDIO_CACHE_MAX_MB", "1024")) if cache_max_mb is None else cache_max_mb
+        if store is not None:
+            for namespace in (self.CACHE_NAMESPACE, self.VARIANT_NAMESPACE):
+                store.limit_bytes(namespace, int(cache_max_mb * 1024 * 1024))
+        # Identical concurrent (text, lang, voice) requests share one synthesis
+        self._flight = SingleFlight()
+        # gTTS fallback shares the keep-alive connection pool
+        http_pool.install()
         # Map language codes to valid edge-tts voices
         # Supports all 14 languages from STT service
         self.voice_map = {
@@ -80,18 +102,120 @@ class TextToSpeech:
             except Exception:
                 pass
 
-    def synthesize(self, text: str, lang: str, voice_id=None):
+    def synthesize(self, text: str, lang: str, voice_id=None, fmt=None, bitrate=None):
         """
-        Synthesize text to speech.
+        Synthesize text to speech and return it as a data URL.
         Prefers edge-tts, falls back to gTTS if edge-tts fails.
+        Results are cached in the shared store when one is configured.
+        fmt/bitrate select a compact output codec (see transcode.FORMATS).
         """
+        audio, mime = self.synthesize_bytes(text, lang, voice_id, fmt, bitrate)
+        return self.to_data_url(audio, mime)
+
+    def synthesize_bytes(self, text: str, lang: str, voice_id=None, fmt=None, bitrate=None):
+        """Like synthesize, but returns (audio bytes, MIME type). Blocking."""
+        key, audio = self._cached_audio(text, lang, voice_id)
+        if audio is None:
+            audio = self._flight.do(
+                (text, lang, voice_id), self._synthesize_audio, text, lang, key
+            )
+        return self._encode(audio, (text, lang, voice_id), key, fmt, bitrate)
+
+    async def synthesize_async(self, text: str, lang: str, voice_id=None, fmt=None, bitrate=None):
+        """
+        Coroutine version of synthesize_bytes for callers already on an event
+        loop: edge-tts runs on the caller's loop, and concurrent identical
+        calls from either version share one synthesis.
+        """
+        key, audio = await asyncio.to_thread(self._cached_audio, text, lang, voice_id)
+        if audio is None:
+            audio = await self._flight.do_async(
+                (text, lang, voice_id), self._synthesize_audio_async, text, lang, key
+            )
+        if not (fmt or bitrate):
+            return audio, transcode.mime_type(None)
+        return await asyncio.to_thread(
+            self._encode, audio, (text, lang, voice_id), key, fmt, bitrate
+        )
+
+    def cache_key(self, text: str, lang: str, voice_id=None):
+        """Shared-store key for synthesized audio, or None when caching is off."""
+        if self.store is None:
+            return None
+        return self.store.make_key(text, lang, voice_id)
+
+    def _cached_audio(self, text: str, lang: str, voice_id=None):
+        key = self.cache_key(text, lang, voice_id)
+        if key is None:
+            return None, None
+        return key, self.store.get(self.CACHE_NAMESPACE, key)
+
+    def _store_audio(self, namespace: str, key: str, audio: bytes, generation: int):
+        self.store.set(namespace, key, audio, ttl=self.cache_ttl or None, generation=generation)
+
+    def _synthesize_audio(self, text: str, lang: str, key=None) -> bytes:
+        generation = self.store.generation(self.CACHE_NAMESPACE) if key is not None else None
+        try:
+            with span("tts.edge"):
+                audio = asyncio.run(self.synthesize_edge(text, lang))
+        except Exception as e:
+            print(f"Edge-TTS failed for language '{lang}': {e}. Falling back to gTTS.")
+            with span("tts.gtts"):
+                audio = self.synthesize_gtts(text, lang)
+
+        if key is not None and audio:
+            self._store_audio(self.CACHE_NAMESPACE, key, audio, generation)
+        return audio
+
+    async def _synthesize_audio_async(self, text: str, lang: str, key=None) -> bytes:
+        generation = None
+        if key is not None:
+            generation = await asyncio.to_thread(self.store.generation, self.CACHE_NAMESPACE)
         try:
-            audio = asyncio.run(self.synthesize_edge(text, lang))
+            with span("tts.edge"):
+                audio = await self.synthesize_edge(text, lang)
         except Exception as e:
             print(f"Edge-TTS failed for language '{lang}': {e}. Falling back to gTTS.")
-            audio = self.synthesize_gtts(text, lang)
+            with span("tts.gtts"):
+                audio = await asyncio.to_thread(self.synthesize_gtts, text, lang)
+
+        if key is not None and audio:
+            await asyncio.to_thread(self._store_audio, self.CACHE_NAMESPACE, key, audio, generation)
+        return audio
+
+    def _encode(self, audio: bytes, work_key, key, fmt=None, bitrate=None):
+        """
+        Transcode to the requested codec, caching each variant. On failure
+        the original MP3 is returned so the caller still gets audio.
+        """
+        fmt, bitrate = transcode.normalize(fmt, bitrate)
+        if fmt is None:
+            return audio, transcode.mime_type(None)
+        mime = transcode.mime_type(fmt)
+
+        variant_key = self.store.make_key(key, fmt, bitrate) if key is not None else None
+        generation = None
+        if variant_key is not None:
+            cached = self.store.get(self.VARIANT_NAMESPACE, variant_key)
+            if cached is not None:
+                return cached, mime
+            generation = self.store.generation(self.VARIANT_NAMESPACE)
+
+        try:
+            encoded = self._flight.do(
+                work_key + (fmt, bitrate), transcode.transcode, audio, fmt, bitrate
+            )
+        except Exception as e:
+            print(f"Transcoding to {fmt} failed: {e}. Returning original audio.")
+            return audio, transcode.mime_type(None)
+
+        if variant_key is not None:
+            self._store_audio(self.VARIANT_NAMESPACE, variant_key, encoded, generation)
+        return encoded, mime
 
-        return "data:audio/mp3;base64," + base64.b64encode(audio).decode()
+    def to_data_url(self, audio: bytes, mime: str = "audio/mp3") -> str:
+        with span("tts.encode"):
+            return f"data:{mime};base64," + base64.b64encode(audio).decode()
     
     def get_supported_languages(self):
         """Return list of supported language codes"""
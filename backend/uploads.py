@@ -0,0 +1,122 @@
+"""
+Bounded upload ingestion.
+
+Starlette already spools each multipart file part to a temporary file
+once it passes 1 MB, so an upload only sits in memory when a handler
+reads it back with `await file.read()`. Handlers pass the spooled file
+to STT instead, which copies it to disk in chunks for the decoder.
+
+UploadLimitMiddleware caps request bodies on the upload endpoints: a
+Content-Length over the limit is refused with 413 before any of the body
+is read, and a body without one is cut off with 413 as soon as it
+crosses the limit. The server discards whatever the client still sends,
+so the client can read the 413 instead of seeing a reset. Body bytes of
+uploads still being handled are exported as a gauge.
+"""
+import os
+import json
+import shutil
+import tempfile
+from typing import Iterable, Optional
+
+import metrics
+
+UPLOAD_BYTES_IN_FLIGHT = metrics.registry.register(metrics.Gauge(
+    "voicemaker_upload_bytes_in_flight", "Request body bytes received for uploads still being handled"
+))
+UPLOADS_REJECTED = metrics.registry.register(metrics.Counter(
+    "voicemaker_uploads_rejected_total", "Uploads refused for exceeding a limit", ("reason",)
+))
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def spool_to_disk(fileobj, suffix: str = "") -> str:
+    """Copy a file object to a named temporary file in chunks; the caller deletes it."""
+    fileobj.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as out:
+        shutil.copyfileobj(fileobj, out)
+    return out.name
+
+
+def discard(path: Optional[str]):
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class UploadLimitMiddleware:
+    def __init__(self, app, max_bytes: int, paths: Iterable[str] = ()):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = tuple(paths)
+
+    def _applies(self, scope) -> bool:
+        return (
+            self.max_bytes > 0
+            and scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"] in self.paths
+        )
+
+    async def _reject(self, send):
+        UPLOADS_REJECTED.inc(1, "size")
+        body = json.dumps({"detail": f"Upload larger than {self.max_bytes} bytes"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            return await self.app(scope, receive, send)
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            return await self._reject(send)
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                size = len(message.get("body", b""))
+                received += size
+                UPLOAD_BYTES_IN_FLIGHT.inc(size)
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge(f"Upload larger than {self.max_bytes} bytes")
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            # Once over the limit, whatever error the app produces is replaced by the 413
+            if exceeded:
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        finally:
+            UPLOAD_BYTES_IN_FLIGHT.dec(received)
+
+        if exceeded and not started:
+            await self._reject(send)
@@ -10,6 +10,9 @@ import uuid
 from typing import Optional, Dict, List
 from pathlib import Path
 
+from shared_store import SharedDict
+import transcode
+
 try:
     from TTS.api import TTS
     from TTS.utils.manage import ModelManager
@@ -31,12 +34,14 @@ class VoiceCloning:
     Allows users to clone their voice and use it for text-to-speech
     """
     
-    def __init__(self, models_dir: str = "voice_models"):
+    def __init__(self, models_dir: str = "voice_models", store=None):
         """
         Initialize voice cloning service
         
         Args:
             models_dir: Directory to store voice models and samples
+            store: Optional SharedStore; when given, the voice registry is
+                   shared by every worker process instead of held in memory
         """
         self.models_dir = Path(models_dir)
         self.models_dir.mkdir(exist_ok=True)
@@ -44,7 +49,8 @@ class VoiceCloning:
         self.samples_dir = self.models_dir / "samples"
         self.samples_dir.mkdir(exist_ok=True)
         
-        self.cloned_voices = {}  # {voice_id: sample_path}
+        # {voice_id: voice_info}
+        self.cloned_voices = SharedDict(store, "voices") if store is not None else {}
         self.tts_model = None
         
         if TTS_AVAILABLE:
@@ -149,7 +155,8 @@ class VoiceCloning:
             print(f"Voice cloning error: {e}")
             raise Exception(f"Failed to clone voice: {str(e)}")
     
-    def synthesize(self, text: str, voice_id: str, language: str = "en") -> str:
+    def synthesize(self, text: str, voice_id: str, language: str = "en",
+                   fmt: Optional[str] = None, bitrate: Optional[str] = None) -> str:
         """
         Generate speech using a cloned voice
         
@@ -157,6 +164,8 @@ class VoiceCloning:
             text: Text to convert to speech
             voice_id: ID of the cloned voice to use
             language: Language code (e.g., 'en', 'es', 'fr')
+            fmt: Optional compact output codec (opus, webm, mp3, ...); WAV if omitted
+            bitrate: Optional bitrate for fmt, e.g. '24k'
         
         Returns:
             Base64 encoded audio data
@@ -190,9 +199,15 @@ class VoiceCloning:
             if os.path.exists(output_path):
                 os.remove(output_path)
             
+            mime = "audio/wav"
+            fmt, bitrate = transcode.normalize(fmt, bitrate)
+            if fmt:
+                audio_data = transcode.transcode(audio_data, fmt, bitrate, source_format="wav")
+                mime = transcode.mime_type(fmt)
+            
             # Convert to base64
             audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-            return f"data:audio/wav;base64,{audio_base64}"
+            return f"data:{mime};base64,{audio_base64}"
             
         except Exception as e:
             print(f"Voice synthesis error: {e}")
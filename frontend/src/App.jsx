@@ -1,10 +1,10 @@
-import React, { useState, useEffect } from 'react'
+import React, { useState, useEffect, useRef } from 'react'
 import Recorder from './components/Recorder'
 import Avatar from './components/Avatar'
 import ChatBox from './components/ChatBox'
 import VoiceModeToggle from './components/VoiceModeToggle'
 import VoiceSetup from './components/VoiceSetup'
-import { getSupportedLanguages, speechToText, textToSpeech, checkVoiceCloningStatus } from './services/api'
+import { getSupportedLanguages, speechToText, submitJob, streamJob, getVisemes, checkVoiceCloningStatus } from './services/api'
 import './App.css'
 
 function App() {
@@ -19,13 +19,19 @@ function App() {
   const [isProcessing, setIsProcessing] = useState(false)
   const [isPlaying, setIsPlaying] = useState(false)
   const [currentPlayingLang, setCurrentPlayingLang] = useState(null)
+  const [currentAudio, setCurrentAudio] = useState(null)
+  const [visemeTimelines, setVisemeTimelines] = useState({})
   const [voiceMode, setVoiceMode] = useState('normal') // 'normal' or 'own-voice'
   const [currentVoiceId, setCurrentVoiceId] = useState(null)
   const [voiceCloningAvailable, setVoiceCloningAvailable] = useState(false)
+  const closeJobStream = useRef(null)
+  // Last STT result; its language only describes the text while they still match
+  const lastTranscript = useRef(null)
 
   useEffect(() => {
     loadSupportedLanguages()
     checkVoiceCloningAvailability()
+    return () => closeJobStream.current?.()
   }, [])
 
   const checkVoiceCloningAvailability = async () => {
@@ -86,6 +92,7 @@ function App() {
       const text = sttResult.text.trim()
       const detectedLang = sttResult.language || sttLanguage
       
+      lastTranscript.current = { text, language: detectedLang }
       setTranscribedText(text)
       setSttLanguageUsed(detectedLang)
       setEnhancedText('')
@@ -111,21 +118,46 @@ function App() {
     setIsProcessing(true)
     try {
       const voiceId = voiceMode === 'own-voice' ? currentVoiceId : null
-      const result = await textToSpeech(transcribedText, [targetLang], voiceId)
-      
-      // Update translated texts and audio URLs
-      setTranslatedTexts(prev => ({
-        ...prev,
-        ...result.translated_texts
-      }))
-      setAudioUrls(prev => ({
-        ...prev,
-        ...result.audio_urls
-      }))
+      const fromStt = lastTranscript.current?.text === transcribedText
+      // Convert speaks the transcript as shown, so Gemini enhancement is skipped
+      const job = await submitJob({
+        text: transcribedText,
+        targetLanguages: [targetLang],
+        voiceId,
+        sttLanguage: fromStt ? lastTranscript.current.language : null,
+        enhance: false
+      })
+
+      // Results arrive per language; play each as soon as its audio lands
+      closeJobStream.current?.()
+      closeJobStream.current = streamJob(job.events_url, {
+        enhanced: (data) => {
+          if (data.changed) setEnhancedText(data.text)
+        },
+        translation: (data) => {
+          setTranslatedTexts(prev => ({ ...prev, [data.language]: data.text }))
+          // Fetched while TTS runs; until it lands the avatar animates procedurally
+          getVisemes(data.text, data.language)
+            .then(timeline => setVisemeTimelines(prev => ({ ...prev, [data.language]: timeline })))
+            .catch(() => {})
+        },
+        audio: (data) => {
+          setAudioUrls(prev => ({ ...prev, [data.language]: data.url }))
+          playAudioUrl(data.url, data.language)
+        },
+        language_error: (data) => {
+          console.error(`Error converting ${data.language}:`, data.error)
+        },
+        done: () => setIsProcessing(false),
+        cancelled: () => setIsProcessing(false),
+        failed: (data) => {
+          setIsProcessing(false)
+          alert(`Error converting to speech: ${data.error || 'Please try again.'}`)
+        }
+      })
     } catch (error) {
       console.error('Error converting to speech:', error)
       alert('Error converting to speech. Please try again.')
-    } finally {
       setIsProcessing(false)
     }
   }
@@ -166,24 +198,31 @@ function App() {
     setSttLanguage(event.target.value)
   }
 
-  const handlePlayAudio = (langCode) => {
-    if (audioUrls[langCode]) {
-      const audio = new Audio(audioUrls[langCode])
-      setIsPlaying(true)
-      setCurrentPlayingLang(langCode)
+  const playAudioUrl = (url, langCode) => {
+    const audio = new Audio(url)
+    setIsPlaying(true)
+    setCurrentPlayingLang(langCode)
+    setCurrentAudio(audio)
 
-      audio.onended = () => {
-        setIsPlaying(false)
-        setCurrentPlayingLang(null)
-      }
+    audio.onended = () => {
+      setIsPlaying(false)
+      setCurrentPlayingLang(null)
+      setCurrentAudio(null)
+    }
 
-      audio.onerror = () => {
-        setIsPlaying(false)
-        setCurrentPlayingLang(null)
-        alert('Error playing audio')
-      }
+    audio.onerror = () => {
+      setIsPlaying(false)
+      setCurrentPlayingLang(null)
+      setCurrentAudio(null)
+      alert('Error playing audio')
+    }
+
+    audio.play()
+  }
 
-      audio.play()
+  const handlePlayAudio = (langCode) => {
+    if (audioUrls[langCode]) {
+      playAudioUrl(audioUrls[langCode], langCode)
     }
   }
 
@@ -292,7 +331,8 @@ function App() {
           <Avatar
             isPlaying={isPlaying}
             currentLanguage={currentPlayingLang}
-            visemeData={null}
+            visemeData={visemeTimelines[currentPlayingLang] || null}
+            audioElement={currentAudio}
           />
 
           <ChatBox
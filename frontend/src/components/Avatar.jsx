@@ -1,211 +1,307 @@
 import React, { useEffect, useRef } from 'react'
 import './Avatar.css'
 
-const Avatar = ({ isPlaying, currentLanguage, visemeData }) => {
-  const canvasRef = useRef(null)
-  const animationRef = useRef(null)
-  const timeRef = useRef(0)
-
-  useEffect(() => {
-    const canvas = canvasRef.current
-    if (!canvas) return
+// Mouth shape per viseme id from /api/avatar: [openness 0-1, width 0-1]
+const VISEME_SHAPES = [
+  [0, 0.5],                                                      // SIL
+  [1, 0.6], [0.8, 0.7], [0.7, 0.55], [0.8, 0.4], [0.6, 0.65],    // AA AE AH AO EH
+  [0.45, 0.45], [0.45, 0.7], [0.35, 0.8], [0.5, 0.4], [0.45, 0.3], // ER IH IY UH UW
+  [0, 0.5], [0.3, 0.4], [0.3, 0.6], [0.15, 0.6], [0.4, 0.55],    // B CH D F G
+  [0.4, 0.55], [0.35, 0.6], [0, 0.5], [0.3, 0.6], [0, 0.5],      // K L M N P
+  [0.35, 0.45], [0.2, 0.7], [0.3, 0.4], [0.3, 0.6], [0.25, 0.6], // R S SH T TH
+  [0.15, 0.6], [0.25, 0.3], [0.35, 0.7], [0.2, 0.7]              // V W Y Z
+]
 
-    const ctx = canvas.getContext('2d')
-    const centerX = canvas.width / 2
-    const centerY = canvas.height / 2
+// Without phonemizer the backend maps single letters, so vowels come back as SIL
+const LETTER_VISEMES = { a: 1, e: 5, i: 7, o: 4, u: 10, y: 8 }
 
-    // Clear canvas
-    ctx.clearRect(0, 0, canvas.width, canvas.height)
+// Audio-derived timelines carry loudness levels 0-15 instead of viseme ids
+const MAX_AUDIO_LEVEL = 15
 
-    // Draw avatar face
-    drawAvatar(ctx, centerX, centerY, isPlaying, 0)
-  }, [isPlaying])
+// Regions redrawn every frame; everything else comes from the cached layer
+const EYE_BOX = { x: -42, y: -56, width: 84, height: 30 }
+const MOUTH_BOX = { x: -34, y: -12, width: 68, height: 46 }
 
-  const drawAvatar = (ctx, centerX, centerY, isTalking, time) => {
-    const canvas = canvasRef.current
-    if (!canvas) return
-    
-    // Gradient background
-    const bgGradient = ctx.createLinearGradient(0, 0, canvas.width, canvas.height)
-    bgGradient.addColorStop(0, '#667eea')
-    bgGradient.addColorStop(1, '#764ba2')
-    ctx.fillStyle = bgGradient
-    ctx.fillRect(0, 0, canvas.width, canvas.height)
-
-    // Glow effect when talking
-    if (isTalking) {
-      const glowGradient = ctx.createRadialGradient(centerX, centerY - 20, 80, centerX, centerY - 20, 120)
-      glowGradient.addColorStop(0, 'rgba(255, 255, 255, 0.3)')
-      glowGradient.addColorStop(1, 'rgba(255, 255, 255, 0)')
-      ctx.fillStyle = glowGradient
-      ctx.beginPath()
-      ctx.arc(centerX, centerY - 20, 120, 0, Math.PI * 2)
-      ctx.fill()
+// Index of the last frame starting at or before `time`, or -1
+const findFrame = (frames, time) => {
+  let low = 0
+  let high = frames.length - 1
+  let found = -1
+  while (low <= high) {
+    const mid = (low + high) >> 1
+    if (frames[mid].time <= time) {
+      found = mid
+      low = mid + 1
+    } else {
+      high = mid - 1
     }
+  }
+  return found
+}
 
-    // Draw head (circle with gradient)
-    const headGradient = ctx.createRadialGradient(
-      centerX - 20, centerY - 40, 0,
-      centerX, centerY - 20, 80
-    )
-    headGradient.addColorStop(0, '#FFE5CC')
-    headGradient.addColorStop(1, '#FFDBAC')
-    ctx.fillStyle = headGradient
-    ctx.beginPath()
-    ctx.arc(centerX, centerY - 20, 80, 0, Math.PI * 2)
-    ctx.fill()
-    
-    // Head shadow
-    ctx.strokeStyle = 'rgba(0, 0, 0, 0.1)'
-    ctx.lineWidth = 3
-    ctx.stroke()
+const mouthShape = (frame) => {
+  if (frame.phoneme === undefined) {
+    return [Math.min(frame.viseme, MAX_AUDIO_LEVEL) / MAX_AUDIO_LEVEL, 0.55]
+  }
+  const id = frame.viseme || LETTER_VISEMES[frame.phoneme.toLowerCase()] || 0
+  return VISEME_SHAPES[id] || VISEME_SHAPES[0]
+}
 
-    // Draw hair with gradient
-    const hairGradient = ctx.createLinearGradient(centerX - 85, centerY - 20, centerX + 85, centerY - 20)
-    hairGradient.addColorStop(0, '#654321')
-    hairGradient.addColorStop(0.5, '#8B4513')
-    hairGradient.addColorStop(1, '#654321')
-    ctx.fillStyle = hairGradient
-    ctx.beginPath()
-    ctx.arc(centerX, centerY - 20, 85, Math.PI, 0, false)
-    ctx.fill()
+// Target mouth [openness, width] at the audio's current position, or null
+// when there is no timeline to follow
+const visemeAt = (visemeData, audio) => {
+  const frames = visemeData?.visemes
+  if (!frames?.length || !audio) return null
 
-    // Hair highlights
-    ctx.strokeStyle = 'rgba(255, 200, 150, 0.3)'
-    ctx.lineWidth = 2
-    ctx.beginPath()
-    ctx.arc(centerX, centerY - 20, 85, Math.PI * 0.7, Math.PI * 1.3, false)
-    ctx.stroke()
+  // Text timelines are paced at a fixed rate (and their `duration` counts
+  // frames, not time), so measure the span and stretch it over the audio
+  const last = frames[frames.length - 1]
+  const step = frames.length > 1 ? last.time / (frames.length - 1) : 1 / (visemeData.fps || 30)
+  const span = last.time + step
+  let time = audio.currentTime
+  if (Number.isFinite(audio.duration) && audio.duration > 0) {
+    time *= span / audio.duration
+  }
 
-    // Draw eyes with blinking animation
-    const eyeBlink = isTalking ? 1 : Math.abs(Math.sin(time * 0.002)) < 0.1 ? 0.3 : 1
-    const eyeY = centerY - 40
-    
-    // Left eye
-    ctx.fillStyle = '#FFFFFF'
-    ctx.beginPath()
-    ctx.arc(centerX - 25, eyeY, 12, 0, Math.PI * 2)
-    ctx.fill()
-    
-    // Right eye
-    ctx.beginPath()
-    ctx.arc(centerX + 25, eyeY, 12, 0, Math.PI * 2)
-    ctx.fill()
+  const index = findFrame(frames, time)
+  if (index < 0 || time >= span) {
+    return VISEME_SHAPES[0]
+  }
+  return mouthShape(frames[index])
+}
 
-    // Eye pupils with movement when talking
-    const pupilOffsetX = isTalking ? Math.sin(time * 0.01) * 2 : 0
-    const pupilOffsetY = isTalking ? Math.cos(time * 0.008) * 1 : 0
-    
-    ctx.fillStyle = '#333'
-    ctx.beginPath()
-    ctx.arc(centerX - 25 + pupilOffsetX, eyeY + pupilOffsetY, 8 * eyeBlink, 0, Math.PI * 2)
-    ctx.fill()
+// Background, head, hair, eye whites and brows: drawn once per talking state
+const renderStaticLayer = (width, height, isTalking) => {
+  const layer = document.createElement('canvas')
+  layer.width = width
+  layer.height = height
+  const ctx = layer.getContext('2d')
+  const centerX = width / 2
+  const centerY = height / 2
+
+  // Gradient background
+  const bgGradient = ctx.createLinearGradient(0, 0, width, height)
+  bgGradient.addColorStop(0, '#667eea')
+  bgGradient.addColorStop(1, '#764ba2')
+  ctx.fillStyle = bgGradient
+  ctx.fillRect(0, 0, width, height)
+
+  // Glow effect when talking
+  if (isTalking) {
+    const glowGradient = ctx.createRadialGradient(centerX, centerY - 20, 80, centerX, centerY - 20, 120)
+    glowGradient.addColorStop(0, 'rgba(255, 255, 255, 0.3)')
+    glowGradient.addColorStop(1, 'rgba(255, 255, 255, 0)')
+    ctx.fillStyle = glowGradient
     ctx.beginPath()
-    ctx.arc(centerX + 25 + pupilOffsetX, eyeY + pupilOffsetY, 8 * eyeBlink, 0, Math.PI * 2)
+    ctx.arc(centerX, centerY - 20, 120, 0, Math.PI * 2)
     ctx.fill()
+  }
+
+  // Draw head (circle with gradient)
+  const headGradient = ctx.createRadialGradient(
+    centerX - 20, centerY - 40, 0,
+    centerX, centerY - 20, 80
+  )
+  headGradient.addColorStop(0, '#FFE5CC')
+  headGradient.addColorStop(1, '#FFDBAC')
+  ctx.fillStyle = headGradient
+  ctx.beginPath()
+  ctx.arc(centerX, centerY - 20, 80, 0, Math.PI * 2)
+  ctx.fill()
+
+  // Head shadow
+  ctx.strokeStyle = 'rgba(0, 0, 0, 0.1)'
+  ctx.lineWidth = 3
+  ctx.stroke()
 
-    // Eye shine
-    ctx.fillStyle = '#FFFFFF'
+  // Draw hair with gradient
+  const hairGradient = ctx.createLinearGradient(centerX - 85, centerY - 20, centerX + 85, centerY - 20)
+  hairGradient.addColorStop(0, '#654321')
+  hairGradient.addColorStop(0.5, '#8B4513')
+  hairGradient.addColorStop(1, '#654321')
+  ctx.fillStyle = hairGradient
+  ctx.beginPath()
+  ctx.arc(centerX, centerY - 20, 85, Math.PI, 0, false)
+  ctx.fill()
+
+  // Hair highlights
+  ctx.strokeStyle = 'rgba(255, 200, 150, 0.3)'
+  ctx.lineWidth = 2
+  ctx.beginPath()
+  ctx.arc(centerX, centerY - 20, 85, Math.PI * 0.7, Math.PI * 1.3, false)
+  ctx.stroke()
+
+  // Eye whites
+  const eyeY = centerY - 40
+  ctx.fillStyle = '#FFFFFF'
+  ctx.beginPath()
+  ctx.arc(centerX - 25, eyeY, 12, 0, Math.PI * 2)
+  ctx.fill()
+  ctx.beginPath()
+  ctx.arc(centerX + 25, eyeY, 12, 0, Math.PI * 2)
+  ctx.fill()
+
+  // Draw eyebrows
+  ctx.strokeStyle = '#654321'
+  ctx.lineWidth = 4
+  ctx.lineCap = 'round'
+  ctx.beginPath()
+  ctx.moveTo(centerX - 40, eyeY - 15)
+  ctx.quadraticCurveTo(centerX - 25, eyeY - 20, centerX - 10, eyeY - 15)
+  ctx.stroke()
+  ctx.beginPath()
+  ctx.moveTo(centerX + 10, eyeY - 15)
+  ctx.quadraticCurveTo(centerX + 25, eyeY - 20, centerX + 40, eyeY - 15)
+  ctx.stroke()
+
+  // Cheeks blush when talking
+  if (isTalking) {
+    const blushGradient = ctx.createRadialGradient(centerX - 35, centerY + 5, 0, centerX - 35, centerY + 5, 15)
+    blushGradient.addColorStop(0, 'rgba(255, 182, 193, 0.6)')
+    blushGradient.addColorStop(1, 'rgba(255, 182, 193, 0)')
+    ctx.fillStyle = blushGradient
     ctx.beginPath()
-    ctx.arc(centerX - 22, eyeY - 2, 3, 0, Math.PI * 2)
+    ctx.arc(centerX - 35, centerY + 5, 15, 0, Math.PI * 2)
     ctx.fill()
     ctx.beginPath()
-    ctx.arc(centerX + 28, eyeY - 2, 3, 0, Math.PI * 2)
+    ctx.arc(centerX + 35, centerY + 5, 15, 0, Math.PI * 2)
     ctx.fill()
+  }
 
-    // Draw eyebrows
-    ctx.strokeStyle = '#654321'
-    ctx.lineWidth = 4
+  return layer
+}
+
+const drawEyes = (ctx, centerX, centerY, isTalking, time) => {
+  const eyeBlink = isTalking ? 1 : Math.abs(Math.sin(time * 0.002)) < 0.1 ? 0.3 : 1
+  const eyeY = centerY - 40
+
+  // Eye pupils with movement when talking
+  const pupilOffsetX = isTalking ? Math.sin(time * 0.01) * 2 : 0
+  const pupilOffsetY = isTalking ? Math.cos(time * 0.008) * 1 : 0
+
+  ctx.fillStyle = '#333'
+  ctx.beginPath()
+  ctx.arc(centerX - 25 + pupilOffsetX, eyeY + pupilOffsetY, 8 * eyeBlink, 0, Math.PI * 2)
+  ctx.fill()
+  ctx.beginPath()
+  ctx.arc(centerX + 25 + pupilOffsetX, eyeY + pupilOffsetY, 8 * eyeBlink, 0, Math.PI * 2)
+  ctx.fill()
+
+  // Eye shine
+  ctx.fillStyle = '#FFFFFF'
+  ctx.beginPath()
+  ctx.arc(centerX - 22, eyeY - 2, 3, 0, Math.PI * 2)
+  ctx.fill()
+  ctx.beginPath()
+  ctx.arc(centerX + 28, eyeY - 2, 3, 0, Math.PI * 2)
+  ctx.fill()
+}
+
+const drawMouth = (ctx, centerX, centerY, mouthWidth, mouthHeight) => {
+  if (mouthHeight < 4) {
+    // Closed mouth (smile)
+    ctx.strokeStyle = '#FF6B9D'
+    ctx.lineWidth = 3
     ctx.lineCap = 'round'
     ctx.beginPath()
-    ctx.moveTo(centerX - 40, eyeY - 15)
-    ctx.quadraticCurveTo(centerX - 25, eyeY - 20, centerX - 10, eyeY - 15)
+    ctx.arc(centerX, centerY + 10, 10, 0, Math.PI)
     ctx.stroke()
+    return
+  }
+
+  ctx.fillStyle = '#FF6B9D'
+  ctx.beginPath()
+  ctx.ellipse(centerX, centerY + 10, mouthWidth, mouthHeight, 0, 0, Math.PI * 2)
+  ctx.fill()
+
+  // Teeth
+  ctx.fillStyle = '#FFFFFF'
+  const teethCount = 4
+  const teethWidth = (mouthWidth * 2) / teethCount
+  for (let i = 0; i < teethCount; i++) {
     ctx.beginPath()
-    ctx.moveTo(centerX + 10, eyeY - 15)
-    ctx.quadraticCurveTo(centerX + 25, eyeY - 20, centerX + 40, eyeY - 15)
-    ctx.stroke()
+    ctx.rect(centerX - mouthWidth + i * teethWidth, centerY + 5, teethWidth - 1, mouthHeight * 0.4)
+    ctx.fill()
+  }
+}
 
-    // Draw mouth (animated when talking)
-    ctx.fillStyle = '#FF6B9D'
-    if (isTalking) {
-      // Animated open mouth
-      const mouthHeight = 12 + Math.sin(time * 0.15) * 8
-      const mouthWidth = 20 + Math.cos(time * 0.12) * 5
-      ctx.beginPath()
-      ctx.ellipse(centerX, centerY + 10, mouthWidth, mouthHeight, 0, 0, Math.PI * 2)
-      ctx.fill()
-      
-      // Teeth
-      ctx.fillStyle = '#FFFFFF'
-      const teethCount = 4
-      const teethWidth = (mouthWidth * 2) / teethCount
-      for (let i = 0; i < teethCount; i++) {
-        ctx.beginPath()
-        ctx.rect(centerX - mouthWidth + i * teethWidth, centerY + 5, teethWidth - 1, mouthHeight * 0.4)
-        ctx.fill()
-      }
-    } else {
-      // Closed mouth (smile)
-      ctx.strokeStyle = '#FF6B9D'
-      ctx.lineWidth = 3
-      ctx.lineCap = 'round'
-      ctx.beginPath()
-      ctx.arc(centerX, centerY + 10, 10, 0, Math.PI)
-      ctx.stroke()
-    }
+const Avatar = ({ isPlaying, currentLanguage, visemeData, audioElement }) => {
+  const canvasRef = useRef(null)
+  const animationRef = useRef(null)
+  const layersRef = useRef({})
+  const mouthRef = useRef([0, 0.5])
+  // Read by the animation loop, so new data doesn't restart it
+  const visemeDataRef = useRef(visemeData)
+  const audioRef = useRef(audioElement)
 
-    // Cheeks blush when talking
-    if (isTalking) {
-      const blushGradient = ctx.createRadialGradient(centerX - 35, centerY + 5, 0, centerX - 35, centerY + 5, 15)
-      blushGradient.addColorStop(0, 'rgba(255, 182, 193, 0.6)')
-      blushGradient.addColorStop(1, 'rgba(255, 182, 193, 0)')
-      ctx.fillStyle = blushGradient
-      ctx.beginPath()
-      ctx.arc(centerX - 35, centerY + 5, 15, 0, Math.PI * 2)
-      ctx.fill()
-      ctx.beginPath()
-      ctx.arc(centerX + 35, centerY + 5, 15, 0, Math.PI * 2)
-      ctx.fill()
+  useEffect(() => {
+    visemeDataRef.current = visemeData
+    audioRef.current = audioElement
+  }, [visemeData, audioElement])
+
+  const getLayer = (canvas, isTalking) => {
+    const layers = layersRef.current
+    if (!layers[isTalking]) {
+      layers[isTalking] = renderStaticLayer(canvas.width, canvas.height, isTalking)
     }
+    return layers[isTalking]
+  }
+
+  // Copy a region of the cached layer back over the previous frame
+  const restore = (ctx, layer, centerX, centerY, box) => {
+    const x = centerX + box.x
+    const y = centerY + box.y
+    ctx.drawImage(layer, x, y, box.width, box.height, x, y, box.width, box.height)
   }
 
-  // Animate when playing
   useEffect(() => {
-    if (isPlaying) {
-      const canvas = canvasRef.current
-      if (!canvas) return
-
-      const animate = () => {
-        timeRef.current += 16 // ~60fps
-        const ctx = canvas.getContext('2d')
-        const centerX = canvas.width / 2
-        const centerY = canvas.height / 2
-        ctx.clearRect(0, 0, canvas.width, canvas.height)
-        drawAvatar(ctx, centerX, centerY, true, timeRef.current)
-        animationRef.current = requestAnimationFrame(animate)
-      }
+    const canvas = canvasRef.current
+    if (!canvas) return
 
-      animate()
-    } else {
-      if (animationRef.current) {
-        cancelAnimationFrame(animationRef.current)
-        animationRef.current = null
-      }
-      timeRef.current = 0
-      const canvas = canvasRef.current
-      if (canvas) {
-        const ctx = canvas.getContext('2d')
-        const centerX = canvas.width / 2
-        const centerY = canvas.height / 2
-        ctx.clearRect(0, 0, canvas.width, canvas.height)
-        drawAvatar(ctx, centerX, centerY, false, 0)
+    const ctx = canvas.getContext('2d')
+    const centerX = canvas.width / 2
+    const centerY = canvas.height / 2
+    const layer = getLayer(canvas, isPlaying)
+
+    ctx.clearRect(0, 0, canvas.width, canvas.height)
+    ctx.drawImage(layer, 0, 0)
+
+    if (!isPlaying) {
+      mouthRef.current = [0, 0.5]
+      drawEyes(ctx, centerX, centerY, false, 0)
+      drawMouth(ctx, centerX, centerY, 0, 0)
+      return
+    }
+
+    const start = performance.now()
+    const animate = (now) => {
+      const time = now - start
+
+      restore(ctx, layer, centerX, centerY, EYE_BOX)
+      drawEyes(ctx, centerX, centerY, true, time)
+
+      restore(ctx, layer, centerX, centerY, MOUTH_BOX)
+      const target = visemeAt(visemeDataRef.current, audioRef.current)
+      if (target) {
+        // Ease toward the target shape so 30 fps timelines look smooth at 60 fps
+        const [open, width] = mouthRef.current
+        const next = [open + (target[0] - open) * 0.5, width + (target[1] - width) * 0.5]
+        mouthRef.current = next
+        drawMouth(ctx, centerX, centerY, 14 + next[1] * 14, next[0] * 20)
+      } else {
+        // No timeline yet: procedural talking mouth
+        const frameTime = time / 16
+        drawMouth(ctx, centerX, centerY, 20 + Math.cos(frameTime * 0.12) * 5, 12 + Math.sin(frameTime * 0.15) * 8)
       }
+
+      animationRef.current = requestAnimationFrame(animate)
     }
+    animationRef.current = requestAnimationFrame(animate)
 
     return () => {
       if (animationRef.current) {
         cancelAnimationFrame(animationRef.current)
+        animationRef.current = null
       }
     }
   }, [isPlaying])
@@ -255,4 +351,3 @@ const Avatar = ({ isPlaying, currentLanguage, visemeData }) => {
 }
 
 export default Avatar
-
@@ -238,6 +238,86 @@ export const completePipeline = async (audioBlob, targetLanguages, voiceId = nul
   }
 };
 
+/* ---------------------------------------------------------
+   Pipeline jobs: results stream per language over SSE
+--------------------------------------------------------- */
+export const submitJob = async ({ audioBlob = null, text = null, targetLanguages, voiceId = null, sttLanguage = null, enhance = true }) => {
+  try {
+    const formData = new FormData();
+    if (audioBlob) formData.append("file", audioBlob, "recording.webm");
+    if (text) formData.append("text", text);
+    formData.append(
+      "target_languages",
+      Array.isArray(targetLanguages) ? targetLanguages.join(",") : targetLanguages
+    );
+    if (voiceId) formData.append("voice_id", voiceId);
+    if (sttLanguage) formData.append("stt_language", sttLanguage);
+    if (!enhance) formData.append("enhance", "false");
+
+    const res = await api.post("/api/jobs", formData);
+    return res.data;
+  } catch (err) {
+    console.error("❌ Job submit error:", err);
+    throw err;
+  }
+};
+
+// handlers: { transcript, enhanced, translation, audio, language_error, done, failed, cancelled }
+// Returns a function that closes the stream.
+export const streamJob = (eventsUrl, handlers = {}) => {
+  const source = new EventSource(`${API_BASE_URL}${eventsUrl}`);
+  const events = ["status", "transcript", "enhanced", "translation", "audio", "language_error"];
+  const finalEvents = ["done", "failed", "cancelled"];
+
+  events.forEach((name) => {
+    source.addEventListener(name, (e) => {
+      const data = JSON.parse(e.data);
+      if (name === "audio") data.url = `${API_BASE_URL}${data.url}`;
+      handlers[name]?.(data);
+    });
+  });
+  finalEvents.forEach((name) => {
+    source.addEventListener(name, (e) => {
+      source.close();
+      handlers[name]?.(JSON.parse(e.data));
+    });
+  });
+  // EventSource reconnects by itself (resuming after Last-Event-ID);
+  // only give up once the browser has closed the stream for good
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) {
+      handlers.failed?.({ error: "Lost connection to job stream" });
+    }
+  };
+  return () => source.close();
+};
+
+export const cancelJob = async (jobId) => {
+  try {
+    const res = await api.delete(`/api/jobs/${jobId}`);
+    return res.data;
+  } catch (err) {
+    console.error("❌ Job cancel error:", err);
+    throw err;
+  }
+};
+
+/* ---------------------------------------------------------
+   Avatar viseme timeline for a text
+--------------------------------------------------------- */
+export const getVisemes = async (text, language = "en") => {
+  try {
+    const res = await api.post("/api/avatar", JSON.stringify(text), {
+      params: { language },
+      headers: { "Content-Type": "application/json" }
+    });
+    return res.data;
+  } catch (err) {
+    console.error("❌ Viseme error:", err);
+    throw err;
+  }
+};
+
 /* ---------------------------------------------------------
    Voice Cloning (Dummy Back-End Support)
 --------------------------------------------------------- */